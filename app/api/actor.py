@@ -0,0 +1,30 @@
+from app.service.audit_service import current_actor
+
+ACTOR_HEADER = b"x-actor"
+MAX_ACTOR_LENGTH = 100
+
+
+def request_actor(scope) -> str | None:
+    for name, value in scope.get("headers", []):
+        if name == ACTOR_HEADER:
+            actor = value.decode("latin-1").strip()[:MAX_ACTOR_LENGTH]
+            if actor:
+                return actor
+    client = scope.get("client")
+    return client[0] if client else None
+
+
+class ActorMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] in ("GET", "HEAD", "OPTIONS"):
+            await self.app(scope, receive, send)
+            return
+
+        token = current_actor.set(request_actor(scope))
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            current_actor.reset(token)
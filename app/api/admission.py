@@ -0,0 +1,157 @@
+import asyncio
+import json
+import math
+import time
+from urllib.parse import parse_qs
+
+from app import metrics
+from app.config import (
+    ADMISSION_QUEUE_TIMEOUT_SECONDS,
+    HEAVY_LIST_LIMIT,
+    ROUTE_LIMITS,
+    TRUST_FORWARDED_FOR,
+)
+
+READ_METHODS = {"GET", "HEAD", "OPTIONS"}
+HEAVY_PREFIXES = ("/api/reports/",)
+STREAM_PATHS = {"/api/events"}
+MAX_BUCKETS = 10_000
+
+
+def classify(method: str, path: str, query_string: bytes) -> str:
+    if method not in READ_METHODS:
+        return "writes"
+    if path.startswith(HEAVY_PREFIXES):
+        return "heavy"
+    limit = parse_qs(query_string.decode("latin-1")).get("limit")
+    if limit and limit[0].isdigit() and int(limit[0]) > HEAVY_LIST_LIMIT:
+        return "heavy"
+    return "cheap"
+
+
+def client_key(scope) -> str:
+    if TRUST_FORWARDED_FOR:
+        for name, value in scope.get("headers", []):
+            if name == b"x-forwarded-for":
+                return value.decode("latin-1").split(",")[0].strip()
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+class TokenBuckets:
+    def __init__(self, limits: dict):
+        self._limits = limits
+        self._buckets: dict[tuple[str, str], list[float]] = {}
+
+    def take(self, client: str, route_class: str) -> float:
+        limit = self._limits[route_class]
+        now = time.monotonic()
+        bucket = self._buckets.get((client, route_class))
+        if bucket is None:
+            if len(self._buckets) >= MAX_BUCKETS:
+                self._prune(now)
+            bucket = self._buckets[(client, route_class)] = [limit["burst"], now]
+
+        tokens = min(limit["burst"], bucket[0] + (now - bucket[1]) * limit["rate"])
+        bucket[1] = now
+        if tokens >= 1:
+            bucket[0] = tokens - 1
+            return 0.0
+        bucket[0] = tokens
+        return (1 - tokens) / limit["rate"]
+
+    def _prune(self, now: float) -> None:
+        for key, (tokens, updated) in list(self._buckets.items()):
+            limit = self._limits[key[1]]
+            if tokens + (now - updated) * limit["rate"] >= limit["burst"]:
+                del self._buckets[key]
+
+
+class ConcurrencyLimiter:
+    def __init__(self, route_class: str, concurrency: int, queue: int):
+        self.route_class = route_class
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._max_queue = queue
+        self.in_flight = 0
+        self.waiting = 0
+
+    async def acquire(self, timeout: float) -> bool:
+        if self._semaphore.locked():
+            if self.waiting >= self._max_queue:
+                return False
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), timeout)
+            except asyncio.TimeoutError:
+                return False
+            finally:
+                self.waiting -= 1
+        else:
+            await self._semaphore.acquire()
+        self.in_flight += 1
+        self._report()
+        return True
+
+    def release(self) -> None:
+        self.in_flight -= 1
+        self._semaphore.release()
+        self._report()
+
+    def _report(self) -> None:
+        metrics.set_gauge("admission_in_flight", self.in_flight, route_class=self.route_class)
+        metrics.set_gauge("admission_waiting", self.waiting, route_class=self.route_class)
+
+
+class AdmissionControlMiddleware:
+    def __init__(self, app, limits: dict = ROUTE_LIMITS):
+        self.app = app
+        self.buckets = TokenBuckets(limits)
+        self.limiters = {
+            name: ConcurrencyLimiter(name, limit["concurrency"], limit["queue"])
+            for name, limit in limits.items()
+        }
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith("/api/"):
+            await self.app(scope, receive, send)
+            return
+
+        route_class = classify(scope["method"], scope["path"], scope.get("query_string", b""))
+        retry_after = self.buckets.take(client_key(scope), route_class)
+        if retry_after > 0:
+            metrics.increment("admission_rejected", route_class=route_class, reason="rate")
+            await self._reject(send, retry_after, "Too many requests, slow down.")
+            return
+
+        if scope["path"] in STREAM_PATHS:
+            metrics.increment("admission_allowed", route_class=route_class)
+            await self.app(scope, receive, send)
+            return
+
+        limiter = self.limiters[route_class]
+        if not await limiter.acquire(ADMISSION_QUEUE_TIMEOUT_SECONDS):
+            metrics.increment("admission_rejected", route_class=route_class, reason="concurrency")
+            await self._reject(send, 1, "Server is busy, try again shortly.")
+            return
+
+        metrics.increment("admission_allowed", route_class=route_class)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release()
+
+    @staticmethod
+    async def _reject(send, retry_after: float, detail: str) -> None:
+        body = json.dumps({"detail": detail}).encode()
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 429,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
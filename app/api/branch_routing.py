@@ -0,0 +1,51 @@
+from app import metrics
+from app.api.idempotency import respond_error
+from app.data.backends import branch_exists, current_branch, sharding_enabled
+
+BRANCH_HEADER = b"x-branch"
+BRANCH_PREFIX = "/b/"
+
+
+def header_branch(scope) -> str | None:
+    for name, value in scope.get("headers", []):
+        if name == BRANCH_HEADER:
+            return value.decode("latin-1").strip().lower()
+    return None
+
+
+def split_branch_path(path: str) -> tuple[str | None, str]:
+    if not path.startswith(BRANCH_PREFIX):
+        return None, path
+    branch, _, rest = path[len(BRANCH_PREFIX):].partition("/")
+    return branch.lower(), "/" + rest
+
+
+class BranchRoutingMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not sharding_enabled():
+            await self.app(scope, receive, send)
+            return
+
+        branch, path = split_branch_path(scope["path"])
+        if branch is not None:
+            scope = dict(scope, path=path, raw_path=path.encode("latin-1"))
+        elif scope["path"].startswith("/api/"):
+            branch = header_branch(scope)
+
+        if branch is None or not path.startswith("/api/"):
+            await self.app(scope, receive, send)
+            return
+        if not branch_exists(branch):
+            metrics.increment("branch_rejected")
+            await respond_error(send, 404, f"Unknown branch: {branch}")
+            return
+
+        metrics.increment("branch_requests", branch=branch)
+        token = current_branch.set(branch)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            current_branch.reset(token)
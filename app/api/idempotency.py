@@ -0,0 +1,143 @@
+import hashlib
+import json
+
+from starlette.concurrency import run_in_threadpool
+
+from app import metrics
+from app.config import IDEMPOTENCY_TTL_SECONDS
+from app.data import idempotency_repo
+
+IDEMPOTENT_METHODS = {"POST", "PUT"}
+KEY_HEADER = b"idempotency-key"
+MAX_KEY_LENGTH = 255
+SKIPPED_HEADERS = {b"content-length", b"set-cookie"}
+
+
+def request_key(scope) -> str | None:
+    for name, value in scope.get("headers", []):
+        if name == KEY_HEADER:
+            return value.decode("latin-1").strip()
+    return None
+
+
+def request_fingerprint(scope, body: bytes) -> str:
+    digest = hashlib.sha256()
+    for part in (scope["method"].encode(), scope["path"].encode(), scope.get("query_string", b"")):
+        digest.update(part)
+        digest.update(b"\0")
+    digest.update(body)
+    return digest.hexdigest()
+
+
+async def read_body(receive) -> bytes:
+    chunks = []
+    while True:
+        message = await receive()
+        if message["type"] != "http.request":
+            break
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body"):
+            break
+    return b"".join(chunks)
+
+
+async def respond(send, status: int, body: bytes, headers: list[tuple[bytes, bytes]]) -> None:
+    await send(
+        {
+            "type": "http.response.start",
+            "status": status,
+            "headers": headers + [(b"content-length", str(len(body)).encode())],
+        }
+    )
+    await send({"type": "http.response.body", "body": body})
+
+
+async def respond_error(send, status: int, detail: str) -> None:
+    body = json.dumps({"detail": detail}).encode()
+    await respond(send, status, body, [(b"content-type", b"application/json")])
+
+
+class IdempotencyMiddleware:
+    def __init__(self, app, ttl_seconds: int = IDEMPOTENCY_TTL_SECONDS):
+        self.app = app
+        self.ttl_seconds = ttl_seconds
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or scope["method"] not in IDEMPOTENT_METHODS
+            or not scope["path"].startswith("/api/")
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        key = request_key(scope)
+        if key is None:
+            await self.app(scope, receive, send)
+            return
+        if not key or len(key) > MAX_KEY_LENGTH:
+            await respond_error(send, 400, f"Idempotency-Key must be 1-{MAX_KEY_LENGTH} characters.")
+            return
+
+        body = await read_body(receive)
+        fingerprint = request_fingerprint(scope, body)
+        stored = await run_in_threadpool(
+            idempotency_repo.claim_key, key, fingerprint, self.ttl_seconds
+        )
+
+        if stored is not None:
+            if stored["fingerprint"] != fingerprint:
+                metrics.increment("idempotency_rejected", reason="mismatch")
+                await respond_error(send, 422, "Idempotency-Key was already used with a different request.")
+            elif stored["status_code"] is None:
+                metrics.increment("idempotency_rejected", reason="in_progress")
+                await respond_error(send, 409, "A request with this Idempotency-Key is still in progress.")
+            else:
+                metrics.increment("idempotency_replays")
+                headers = [
+                    (name.encode("latin-1"), value.encode("latin-1"))
+                    for name, value in stored["headers"]
+                ]
+                headers.append((b"idempotent-replayed", b"true"))
+                await respond(send, stored["status_code"], stored["body"], headers)
+            return
+
+        body_sent = False
+
+        async def replay_receive():
+            nonlocal body_sent
+            if not body_sent:
+                body_sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        response = {"status": None, "headers": [], "body": []}
+
+        async def capture_send(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                response["headers"] = [
+                    [name.decode("latin-1"), value.decode("latin-1")]
+                    for name, value in message.get("headers", [])
+                    if name.lower() not in SKIPPED_HEADERS
+                ]
+            elif message["type"] == "http.response.body":
+                response["body"].append(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, replay_receive, capture_send)
+        except Exception:
+            await run_in_threadpool(idempotency_repo.release_key, key)
+            raise
+
+        if response["status"] is None or response["status"] >= 500:
+            await run_in_threadpool(idempotency_repo.release_key, key)
+            return
+        await run_in_threadpool(
+            idempotency_repo.save_response,
+            key,
+            response["status"],
+            response["headers"],
+            b"".join(response["body"]),
+        )
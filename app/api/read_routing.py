@@ -0,0 +1,62 @@
+import time
+from http.cookies import SimpleCookie
+
+from app.config import READ_STICKINESS_SECONDS
+from app.data.backends import read_primary, replicas_fresh_since
+
+READ_METHODS = {"GET", "HEAD", "OPTIONS"}
+LOOKUP_PATHS = {"/api/books/lookup", "/api/members/lookup"}
+STICKY_COOKIE = "easystock_written_at"
+STICKY_MAX_AGE_SECONDS = 86400
+
+
+def last_write(scope) -> float:
+    for name, value in scope.get("headers", []):
+        if name == b"cookie":
+            cookie = SimpleCookie(value.decode("latin-1"))
+            if STICKY_COOKIE in cookie:
+                try:
+                    return float(cookie[STICKY_COOKIE].value)
+                except ValueError:
+                    return 0.0
+    return 0.0
+
+
+class ReadYourWritesMiddleware:
+    def __init__(self, app, stickiness_seconds: float = READ_STICKINESS_SECONDS):
+        self.app = app
+        self.stickiness_seconds = stickiness_seconds
+
+    def needs_primary(self, written_at: float) -> bool:
+        # Replica snapshots can be a refresh interval old, so the stickiness window alone is not enough.
+        if not written_at:
+            return False
+        return written_at + self.stickiness_seconds > time.time() or not replicas_fresh_since(written_at)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith("/api/"):
+            await self.app(scope, receive, send)
+            return
+
+        is_write = scope["method"] not in READ_METHODS and scope["path"] not in LOOKUP_PATHS
+        if not is_write and not self.needs_primary(last_write(scope)):
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_cookie(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [
+                    (
+                        b"set-cookie",
+                        f"{STICKY_COOKIE}={time.time():.3f}; Max-Age={STICKY_MAX_AGE_SECONDS}; "
+                        f"Path=/api; HttpOnly; SameSite=Lax".encode("latin-1"),
+                    )
+                ]
+            await send(message)
+
+        token = read_primary.set(True)
+        try:
+            await self.app(scope, receive, send_with_cookie if is_write else send)
+        finally:
+            read_primary.reset(token)
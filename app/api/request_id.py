@@ -0,0 +1,39 @@
+import uuid
+
+from app.logs import request_id
+
+REQUEST_ID_HEADER = b"x-request-id"
+MAX_REQUEST_ID_LENGTH = 128
+
+
+def incoming_request_id(scope) -> str | None:
+    for name, value in scope.get("headers", []):
+        if name == REQUEST_ID_HEADER:
+            value = value.decode("latin-1").strip()
+            if 0 < len(value) <= MAX_REQUEST_ID_LENGTH and value.isprintable():
+                return value
+    return None
+
+
+class RequestIdMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        value = incoming_request_id(scope) or uuid.uuid4().hex
+        header = (REQUEST_ID_HEADER, value.encode("latin-1"))
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                message = dict(message, headers=list(message.get("headers", [])) + [header])
+            await send(message)
+
+        token = request_id.set(value)
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            request_id.reset(token)
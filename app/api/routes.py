@@ -1,29 +1,59 @@
-from fastapi import APIRouter, HTTPException, Query, Response
-
+from fastapi import APIRouter, Header, HTTPException, Query, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel
+
+from app import metrics
+from app.data.backends import current_branch
+from app.data.errors import VersionConflictError
+from app.models.audit import AuditEntryOut
 from app.models.author import Author
-from app.models.book import BookCreate, BookUpdate, BookOut
+from app.models.backup import BackupOut
+from app.models.fields import partial_adapter
+from app.models.book import BookCreate, BookUpdate, BookOut, BookSearchResult, CopyCreate, CopyOut
 from app.models.genre import Genre, GenreOut
+from app.models.hold import HoldCreate, HoldOut
 from app.models.member import Member, MemberOut
 from app.models.loan import LoanCreate, LoanOut
+from app.models.lookup import IdLookup
+from app.models.job import JobOut, JobRunOut
 from app.models.response import (
     AuthorResponse,
+    BackupResponse,
     BookResponse,
+    CopyResponse,
     LoanResponse,
     MemberResponse,
     MessageOut,
     GenreResponse,
+    HoldResponse,
+    JobResponse,
 )
 from app.models.report import (
+    BranchSummary,
+    DailyCirculation,
+    LoanDurationReport,
+    LoanStatistics,
     MemberActiveLoan,
     MemberBorrowRecord,
+    MemberDashboard,
     OverdueLoan,
+    TopBook,
+    TopGenre,
 )
 
+from app.service.analytics_service import AnalyticsService
+from app.service.audit_service import AuditService
 from app.service.author_service import AuthorService
+from app.service.backup_service import BackupService
+from app.service.batch_report_service import BatchReportService
 from app.service.book_service import BookService
+from app.service.branch_service import BranchService
 from app.service.member_service import MemberService
 from app.service.loan_service import LoanService
 from app.service.genre_service import GenreService
+from app.service.hold_service import HoldService
+from app.service.events import event_stream
+from app.service.job_service import JobService
 
 router = APIRouter()
 
@@ -32,9 +62,58 @@ book_service = BookService()
 member_service = MemberService()
 loan_service = LoanService()
 genre_service = GenreService()
+hold_service = HoldService()
+job_service = JobService()
+analytics_service = AnalyticsService()
+batch_report_service = BatchReportService()
+branch_service = BranchService()
+backup_service = BackupService()
+audit_service = AuditService()
 
 PAGE = Query(1, ge=1)
 LIMIT = Query(10, ge=1, le=1000)
+DAYS = Query(30, ge=1, le=3650)
+IF_MATCH = Header(None)
+
+
+def parse_if_match(if_match: str | None) -> int | None:
+    if if_match is None or if_match.strip() == "*":
+        return None
+    tag = if_match.strip().removeprefix("W/").strip('"')
+    if not tag.isdigit():
+        raise HTTPException(status_code=412, detail="If-Match must be a version ETag.")
+    return int(tag)
+
+
+def set_etag(response: Response, record: dict) -> None:
+    response.headers["ETag"] = f'"{record["version"]}"'
+
+
+def parse_ids(ids: str) -> list[int]:
+    parts = [part.strip() for part in ids.split(",") if part.strip()]
+    if not all(part.isdigit() for part in parts):
+        raise HTTPException(status_code=400, detail="ids must be a comma-separated list of integers.")
+    return [int(part) for part in parts]
+
+
+def parse_fields(fields: str | None, model: type[BaseModel]) -> tuple[str, ...] | None:
+    if fields is None:
+        return None
+    names = {part.strip() for part in fields.split(",") if part.strip()}
+    unknown = sorted(names - model.model_fields.keys())
+    if not names or unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown fields: {', '.join(unknown)}. Allowed: {', '.join(model.model_fields)}.",
+        )
+    return tuple(name for name in model.model_fields if name in names)
+
+
+def sparse_response(response: Response, data, model: type[BaseModel], fields: tuple[str, ...] | None):
+    if fields is None or data is None:
+        return data
+    adapter = partial_adapter(model, fields, isinstance(data, list))
+    return JSONResponse(adapter.dump_python(adapter.validate_python(data), mode="json"), headers=dict(response.headers))
 
 
 @router.post("/authors", response_model=AuthorResponse, status_code=201)
@@ -56,11 +135,18 @@ def list_authors(response: Response, page: int = PAGE, limit: int = LIMIT):
 
 
 @router.put("/authors/{author_id}", response_model=AuthorResponse)
-def update_author(author_id: int, payload: Author):
+def update_author(
+        author_id: int, payload: Author, response: Response, if_match: str | None = IF_MATCH
+):
     try:
-        author = author_service.update_author(author_id, payload)
+        author = author_service.update_author(author_id, payload, parse_if_match(if_match))
+    except VersionConflictError as exc:
+        raise HTTPException(status_code=412, detail=str(exc)) from exc
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
+    if not author:
+        raise HTTPException(status_code=404, detail="Author not found")
+    set_etag(response, author)
     return {
         "message": f'Author {author["name"]} updated.',
         "data": author,
@@ -95,9 +181,30 @@ def list_books(
         page: int = PAGE,
         limit: int = LIMIT,
         genre: str | None = None,
+        ids: str | None = None,
+        fields: str | None = None,
 ):
-    response.headers["X-Total-Count"] = str(book_service.count_books(genre))
-    return book_service.list_books(page, limit, genre)
+    columns = parse_fields(fields, BookOut)
+    if ids is not None:
+        books = find_books(parse_ids(ids), columns)
+        response.headers["X-Total-Count"] = str(len(books))
+    else:
+        response.headers["X-Total-Count"] = str(book_service.count_books(genre))
+        books = book_service.list_books(page, limit, genre, columns)
+    return sparse_response(response, books, BookOut, columns)
+
+
+@router.post("/books/lookup", response_model=list[BookOut])
+def lookup_books(payload: IdLookup, response: Response, fields: str | None = None):
+    columns = parse_fields(fields, BookOut)
+    return sparse_response(response, find_books(payload.ids, columns), BookOut, columns)
+
+
+def find_books(ids: list[int], columns: tuple[str, ...] | None) -> list[dict]:
+    try:
+        return book_service.get_books(ids, columns)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
 
 
 @router.get("/genres", response_model=list[GenreOut])
@@ -135,17 +242,27 @@ def delete_genre(genre_id: int):
 
 
 @router.get("/books/{book_id}", response_model=BookOut)
-def get_book(book_id: int):
-    book = book_service.get_book(book_id)
-    return book
+def get_book(book_id: int, response: Response, fields: str | None = None):
+    columns = parse_fields(fields, BookOut)
+    book = book_service.get_book(book_id, columns)
+    if book:
+        set_etag(response, book)
+    return sparse_response(response, book, BookOut, columns)
 
 
 @router.put("/books/{book_id}", response_model=BookResponse)
-def update_book(book_id: int, payload: BookUpdate):
+def update_book(
+        book_id: int, payload: BookUpdate, response: Response, if_match: str | None = IF_MATCH
+):
     try:
-        book = book_service.update_book(book_id, payload)
+        book = book_service.update_book(book_id, payload, parse_if_match(if_match))
+    except VersionConflictError as exc:
+        raise HTTPException(status_code=412, detail=str(exc)) from exc
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
+    if not book:
+        raise HTTPException(status_code=404, detail="Book not found")
+    set_etag(response, book)
     return {
         "message": f'Book {book["title"]} updated.',
         "data": book,
@@ -175,17 +292,49 @@ def create_member(payload: Member):
 
 
 @router.get("/members", response_model=list[MemberOut])
-def list_members(response: Response, page: int = PAGE, limit: int = LIMIT):
-    response.headers["X-Total-Count"] = str(member_service.count_members())
-    return member_service.list_members(page, limit)
+def list_members(
+        response: Response,
+        page: int = PAGE,
+        limit: int = LIMIT,
+        ids: str | None = None,
+        fields: str | None = None,
+):
+    columns = parse_fields(fields, MemberOut)
+    if ids is not None:
+        members = find_members(parse_ids(ids), columns)
+        response.headers["X-Total-Count"] = str(len(members))
+    else:
+        response.headers["X-Total-Count"] = str(member_service.count_members())
+        members = member_service.list_members(page, limit, columns)
+    return sparse_response(response, members, MemberOut, columns)
+
+
+@router.post("/members/lookup", response_model=list[MemberOut])
+def lookup_members(payload: IdLookup, response: Response, fields: str | None = None):
+    columns = parse_fields(fields, MemberOut)
+    return sparse_response(response, find_members(payload.ids, columns), MemberOut, columns)
+
+
+def find_members(ids: list[int], columns: tuple[str, ...] | None) -> list[dict]:
+    try:
+        return member_service.get_members(ids, columns)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
 
 
 @router.put("/members/{member_id}", response_model=MemberResponse)
-def update_member(member_id: int, payload: Member):
+def update_member(
+        member_id: int, payload: Member, response: Response, if_match: str | None = IF_MATCH
+):
     try:
-        member = member_service.update_member(member_id, payload)
+        member = member_service.update_member(member_id, payload, parse_if_match(if_match))
+    except VersionConflictError as exc:
+        raise HTTPException(status_code=412, detail=str(exc)) from exc
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
+    if not member:
+        raise HTTPException(status_code=404, detail="Member not found")
+    set_etag(response, member)
     return {
         "message": f'Member {member["name"]} updated.',
         "data": member,
@@ -212,6 +361,63 @@ def overdue_loans():
     return loan_service.overdue_loans()
 
 
+@router.get("/reports/top-books", response_model=list[TopBook])
+def top_books(days: int = DAYS, limit: int = LIMIT):
+    return analytics_service.top_books(days, limit)
+
+
+@router.get("/reports/top-genres", response_model=list[TopGenre])
+def top_genres(days: int = DAYS, limit: int = LIMIT):
+    return analytics_service.top_genres(days, limit)
+
+
+@router.get("/reports/loan-duration", response_model=LoanDurationReport)
+def loan_duration(days: int = DAYS, genre_id: int | None = None):
+    try:
+        return analytics_service.loan_duration(days, genre_id)
+    except ValueError as exc:
+        raise HTTPException(status_code=404, detail=str(exc)) from exc
+
+
+@router.get("/reports/circulation", response_model=list[DailyCirculation])
+def daily_circulation(days: int = DAYS):
+    return analytics_service.daily_circulation(days)
+
+
+@router.get("/reports/loan-statistics", response_model=LoanStatistics)
+def loan_statistics():
+    try:
+        return batch_report_service.loan_statistics()
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    except RuntimeError as exc:
+        raise HTTPException(status_code=503, detail=str(exc)) from exc
+
+
+@router.post("/reports/rebuild", response_model=MessageOut)
+def rebuild_rollups():
+    processed = analytics_service.rebuild_rollups()
+    return {"message": f"Rebuilt rollups from {processed} loans."}
+
+
+@router.get("/branches", response_model=list[str])
+def list_branches():
+    return branch_service.list_branches()
+
+
+@router.get("/search/books", response_model=list[BookSearchResult])
+def search_books(q: str = Query(..., max_length=200), limit: int = LIMIT):
+    try:
+        return branch_service.search_books(q, limit)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+
+@router.get("/reports/branches", response_model=list[BranchSummary])
+def branch_report():
+    return branch_service.branch_report()
+
+
 @router.get("/members/{member_id}/history", response_model=list[MemberBorrowRecord])
 def member_borrow_history(
         member_id: int,
@@ -228,6 +434,14 @@ def member_borrow_history(
         raise HTTPException(status_code=404, detail=str(exc)) from exc
 
 
+@router.get("/members/{member_id}/dashboard", response_model=MemberDashboard)
+def member_dashboard(member_id: int, history_limit: int = Query(10, ge=1, le=100)):
+    try:
+        return member_service.get_dashboard(member_id, history_limit)
+    except ValueError as exc:
+        raise HTTPException(status_code=404, detail=str(exc)) from exc
+
+
 @router.post("/loans/borrow", response_model=LoanResponse, status_code=201)
 def borrow_book(payload: LoanCreate):
     try:
@@ -256,7 +470,158 @@ def return_book(loan_id: int):
     }
 
 
+@router.post("/books/{book_id}/copies", response_model=CopyResponse, status_code=201)
+def add_copy(book_id: int, payload: CopyCreate):
+    try:
+        copy = book_service.add_copy(book_id, payload)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return {"message": f'Copy {copy["barcode"]} added.', "data": copy}
+
+
+@router.get("/books/{book_id}/copies", response_model=list[CopyOut])
+def list_copies(book_id: int):
+    try:
+        return book_service.list_copies(book_id)
+    except ValueError as exc:
+        raise HTTPException(status_code=404, detail=str(exc)) from exc
+
+
+@router.delete("/copies/{copy_id}", response_model=MessageOut)
+def withdraw_copy(copy_id: int):
+    try:
+        copy = book_service.withdraw_copy(copy_id)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return {"message": f'Copy {copy["barcode"]} withdrawn.'}
+
+
+@router.post("/books/{book_id}/holds", response_model=HoldResponse, status_code=201)
+def place_hold(book_id: int, payload: HoldCreate):
+    try:
+        hold = hold_service.place_hold(book_id, payload.member_id)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return {
+        "message": f'{hold["member_name"]} placed a hold on {hold["book_title"]}.',
+        "data": hold,
+    }
+
+
+@router.get("/books/{book_id}/holds", response_model=list[HoldOut])
+def list_holds(book_id: int):
+    try:
+        return hold_service.list_holds(book_id)
+    except ValueError as exc:
+        raise HTTPException(status_code=404, detail=str(exc)) from exc
+
+
+@router.delete("/holds/{hold_id}", response_model=MessageOut)
+def cancel_hold(hold_id: int):
+    try:
+        hold = hold_service.cancel_hold(hold_id)
+    except ValueError as exc:
+        raise HTTPException(status_code=404, detail=str(exc)) from exc
+    return {"message": f'Hold on {hold["book_title"]} for {hold["member_name"]} cancelled.'}
+
+
+@router.post("/loans/archive", response_model=MessageOut)
+def archive_returned_loans(older_than_days: int | None = None):
+    try:
+        archived = loan_service.archive_returned_loans(older_than_days)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return {"message": f"Archived {archived} returned loans."}
+
+
 @router.get("/loans/active", response_model=list[LoanOut])
 def list_active_loans(response: Response, page: int = PAGE, limit: int = LIMIT):
     response.headers["X-Total-Count"] = str(loan_service.count_active_loans())
     return loan_service.list_active_loans(page, limit)
+
+
+@router.get("/jobs", response_model=list[JobOut])
+def list_jobs():
+    return job_service.list_jobs()
+
+
+@router.get("/jobs/{name}/runs", response_model=list[JobRunOut])
+def list_job_runs(name: str, response: Response, page: int = PAGE, limit: int = LIMIT):
+    try:
+        response.headers["X-Total-Count"] = str(job_service.count_job_runs(name))
+        return job_service.list_job_runs(name, page, limit)
+    except ValueError as exc:
+        raise HTTPException(status_code=404, detail=str(exc)) from exc
+
+
+@router.post("/jobs/{name}/run", response_model=JobResponse)
+def trigger_job(name: str):
+    try:
+        job = job_service.trigger_job(name)
+    except ValueError as exc:
+        raise HTTPException(status_code=404, detail=str(exc)) from exc
+    return {"message": f"Job {name} scheduled.", "data": job}
+
+
+@router.get("/backups", response_model=list[BackupOut])
+def list_backups():
+    return backup_service.list_backups()
+
+
+@router.post("/backups", response_model=BackupResponse, status_code=201)
+def create_backup():
+    try:
+        backup = backup_service.create_backup()
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return {"message": f'Backup {backup["name"]} created.', "data": backup}
+
+
+@router.post("/backups/{name}/restore", response_model=BackupResponse)
+def restore_backup(name: str):
+    try:
+        backup = backup_service.restore_backup(name)
+    except ValueError as exc:
+        status = 404 if str(exc) == "Backup not found" else 400
+        raise HTTPException(status_code=status, detail=str(exc)) from exc
+    return {"message": f'Database restored from {backup["name"]}.', "data": backup}
+
+
+@router.get("/audit", response_model=list[AuditEntryOut])
+def list_audit_entries(
+        response: Response,
+        entity: str | None = None,
+        entity_id: int | None = None,
+        actor: str | None = None,
+        page: int = PAGE,
+        limit: int = LIMIT,
+):
+    try:
+        entries = audit_service.list_entries(entity, entity_id, actor, page, limit)
+        response.headers["X-Total-Count"] = str(audit_service.count_entries(entity, entity_id, actor))
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return entries
+
+
+@router.get("/audit/{entity}/{entity_id}", response_model=list[AuditEntryOut])
+def entity_audit_history(entity: str, entity_id: int, response: Response, page: int = PAGE, limit: int = LIMIT):
+    return list_audit_entries(response, entity, entity_id, None, page, limit)
+
+
+@router.get("/metrics")
+def get_metrics():
+    return metrics.snapshot()
+
+
+@router.get("/events")
+async def stream_events(request: Request, last_event_id: str | None = Header(None)):
+    try:
+        resume_from = int(last_event_id) if last_event_id else None
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail="Invalid Last-Event-ID header.") from exc
+    return StreamingResponse(
+        event_stream(request.is_disconnected, resume_from, current_branch.get()),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
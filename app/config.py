@@ -0,0 +1,80 @@
+import os
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+DB_BACKEND = os.environ.get("EASYSTOCK_DB_BACKEND", "sqlite")
+DB_PATH = Path(os.environ.get("EASYSTOCK_DB_PATH", BASE_DIR / "data" / "easystock.db"))
+DATABASE_URL = os.environ.get("EASYSTOCK_DATABASE_URL", "")
+PG_POOL_MIN_SIZE = int(os.environ.get("EASYSTOCK_PG_POOL_MIN_SIZE", "2"))
+PG_POOL_MAX_SIZE = int(os.environ.get("EASYSTOCK_PG_POOL_MAX_SIZE", "20"))
+SEED = int(os.environ["EASYSTOCK_SEED"]) if os.environ.get("EASYSTOCK_SEED") else None
+FAST_START = os.environ.get("EASYSTOCK_FAST_START", "0") == "1"
+
+LOAN_PERIOD_DAYS = int(os.environ.get("EASYSTOCK_LOAN_PERIOD_DAYS", "14"))
+
+ARCHIVE_AFTER_DAYS = int(os.environ.get("EASYSTOCK_ARCHIVE_AFTER_DAYS", "365"))
+ARCHIVE_BATCH_SIZE = int(os.environ.get("EASYSTOCK_ARCHIVE_BATCH_SIZE", "1000"))
+
+REPORT_CHUNK_SIZE = int(os.environ.get("EASYSTOCK_REPORT_CHUNK_SIZE", "200000"))
+
+EVENT_HISTORY_SIZE = int(os.environ.get("EASYSTOCK_EVENT_HISTORY_SIZE", "256"))
+EVENT_QUEUE_SIZE = int(os.environ.get("EASYSTOCK_EVENT_QUEUE_SIZE", "100"))
+EVENT_HEARTBEAT_SECONDS = float(os.environ.get("EASYSTOCK_EVENT_HEARTBEAT_SECONDS", "15"))
+
+JOBS_ENABLED = os.environ.get("EASYSTOCK_JOBS_ENABLED", "1") == "1"
+JOB_POLL_SECONDS = float(os.environ.get("EASYSTOCK_JOB_POLL_SECONDS", "5"))
+JOB_RETRY_BASE_SECONDS = int(os.environ.get("EASYSTOCK_JOB_RETRY_BASE_SECONDS", "30"))
+JOB_LEASE_SECONDS = int(os.environ.get("EASYSTOCK_JOB_LEASE_SECONDS", "3600"))
+JOB_HISTORY_DAYS = int(os.environ.get("EASYSTOCK_JOB_HISTORY_DAYS", "30"))
+
+IDEMPOTENCY_TTL_SECONDS = int(os.environ.get("EASYSTOCK_IDEMPOTENCY_TTL_SECONDS", "86400"))
+
+
+def _route_limit(name: str, default: str) -> dict:
+    rate, burst, concurrency, queue = os.environ.get(f"EASYSTOCK_LIMIT_{name.upper()}", default).split(",")
+    return {
+        "rate": float(rate),
+        "burst": float(burst),
+        "concurrency": int(concurrency),
+        "queue": int(queue),
+    }
+
+
+ADMISSION_CONTROL_ENABLED = os.environ.get("EASYSTOCK_ADMISSION_CONTROL", "1") == "1"
+ROUTE_LIMITS = {
+    "cheap": _route_limit("cheap", "20,40,32,64"),
+    "heavy": _route_limit("heavy", "2,10,4,8"),
+    "writes": _route_limit("writes", "5,10,8,16"),
+}
+HEAVY_LIST_LIMIT = int(os.environ.get("EASYSTOCK_HEAVY_LIST_LIMIT", "100"))
+ADMISSION_QUEUE_TIMEOUT_SECONDS = float(os.environ.get("EASYSTOCK_ADMISSION_QUEUE_TIMEOUT_SECONDS", "2"))
+TRUST_FORWARDED_FOR = os.environ.get("EASYSTOCK_TRUST_FORWARDED_FOR", "0") == "1"
+
+READ_REPLICAS = [target.strip() for target in os.environ.get("EASYSTOCK_READ_REPLICAS", "").split(",") if target.strip()]
+READ_STICKINESS_SECONDS = float(os.environ.get("EASYSTOCK_READ_STICKINESS_SECONDS", "5"))
+REPLICA_REFRESH_SECONDS = int(os.environ.get("EASYSTOCK_REPLICA_REFRESH_SECONDS", "60"))
+
+BRANCH_DIR = Path(os.environ["EASYSTOCK_BRANCH_DIR"]) if os.environ.get("EASYSTOCK_BRANCH_DIR") else None
+FAN_OUT_WORKERS = int(os.environ.get("EASYSTOCK_FAN_OUT_WORKERS", "8"))
+LOOKUP_MAX_IDS = int(os.environ.get("EASYSTOCK_LOOKUP_MAX_IDS", "1000"))
+COALESCE_READS = os.environ.get("EASYSTOCK_COALESCE_READS", "1") == "1"
+GROUP_COMMIT_ENABLED = os.environ.get("EASYSTOCK_GROUP_COMMIT", "1") == "1"
+GROUP_COMMIT_WINDOW_MS = float(os.environ.get("EASYSTOCK_GROUP_COMMIT_WINDOW_MS", "2"))
+GROUP_COMMIT_MAX_BATCH = int(os.environ.get("EASYSTOCK_GROUP_COMMIT_MAX_BATCH", "64"))
+
+BACKUP_DIR = Path(os.environ.get("EASYSTOCK_BACKUP_DIR", BASE_DIR / "data" / "backups"))
+BACKUP_RETENTION = int(os.environ.get("EASYSTOCK_BACKUP_RETENTION", "7"))
+BACKUP_INTERVAL_SECONDS = int(os.environ.get("EASYSTOCK_BACKUP_INTERVAL_SECONDS", "86400"))
+BACKUP_PAGES_PER_STEP = int(os.environ.get("EASYSTOCK_BACKUP_PAGES_PER_STEP", "256"))
+BACKUP_STEP_SLEEP_MS = float(os.environ.get("EASYSTOCK_BACKUP_STEP_SLEEP_MS", "5"))
+BACKUP_MAX_RESTARTS = int(os.environ.get("EASYSTOCK_BACKUP_MAX_RESTARTS", "3"))
+
+AUDIT_ENABLED = os.environ.get("EASYSTOCK_AUDIT_ENABLED", "1") == "1"
+AUDIT_FLUSH_SECONDS = float(os.environ.get("EASYSTOCK_AUDIT_FLUSH_SECONDS", "1"))
+AUDIT_BUFFER_SIZE = int(os.environ.get("EASYSTOCK_AUDIT_BUFFER_SIZE", "10000"))
+
+LOG_LEVEL = os.environ.get("EASYSTOCK_LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.environ.get("EASYSTOCK_LOG_FORMAT", "json")
+LOG_SAMPLE_RATE = float(os.environ.get("EASYSTOCK_LOG_SAMPLE_RATE", "1"))
+LOG_QUEUE_SIZE = int(os.environ.get("EASYSTOCK_LOG_QUEUE_SIZE", "10000"))
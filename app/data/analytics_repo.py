@@ -0,0 +1,110 @@
+from app.data.archive_repo import list_archive_tables
+from app.data.dates import day_iso, day_number, now_epoch
+from app.data.db import get_connection, get_read_connection, table_empty
+from app.data.loan_repo import LOAN_PERIOD_SECONDS
+from app.data.rollups import rebuild_rollups
+
+
+def since_day(days: int) -> int:
+    return day_number(now_epoch()) - days + 1
+
+
+def rebuild() -> int:
+    with get_connection() as conn:
+        processed = rebuild_rollups(conn, ["loans"] + list_archive_tables(conn))
+        conn.commit()
+        return processed
+
+
+def ensure_rollups() -> int:
+    with get_connection() as conn:
+        if not table_empty(conn, "daily_book_loans"):
+            return 0
+    return rebuild()
+
+
+def top_books(days: int, limit: int) -> list[dict]:
+    with get_read_connection() as conn:
+        rows = conn.execute(
+            """
+            SELECT s.book_id, b.title, SUM(s.loans) AS loans
+            FROM daily_book_loans s
+            JOIN books b ON b.id = s.book_id
+            WHERE s.day >= ?
+            GROUP BY s.book_id, b.title
+            HAVING SUM(s.loans) > 0
+            ORDER BY loans DESC, b.title ASC, s.book_id ASC
+            LIMIT ?
+            """,
+            (since_day(days), limit),
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+
+def top_genres(days: int, limit: int) -> list[dict]:
+    with get_read_connection() as conn:
+        rows = conn.execute(
+            """
+            SELECT s.genre_id, g.name, SUM(s.loans) AS loans
+            FROM daily_genre_loans s
+            JOIN genres g ON g.id = s.genre_id
+            WHERE s.day >= ?
+            GROUP BY s.genre_id, g.name
+            HAVING SUM(s.loans) > 0
+            ORDER BY loans DESC, g.name ASC
+            LIMIT ?
+            """,
+            (since_day(days), limit),
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+
+def loan_duration(days: int, genre_id: int | None = None) -> dict:
+    query = """
+        SELECT COALESCE(SUM(returns), 0) AS returns,
+               COALESCE(SUM(loan_seconds), 0) AS loan_seconds
+    """
+    params: list = [since_day(days)]
+    if genre_id is None:
+        query += " FROM daily_book_loans WHERE day >= ?"
+    else:
+        query += " FROM daily_genre_loans WHERE day >= ? AND genre_id = ?"
+        params.append(genre_id)
+
+    with get_read_connection() as conn:
+        row = conn.execute(query, params).fetchone()
+
+    returns = int(row["returns"])
+    average = int(row["loan_seconds"]) / returns / 86400 if returns else 0.0
+    return {"days": days, "genre_id": genre_id, "returns": returns, "average_days": round(average, 2)}
+
+
+def daily_circulation(days: int) -> list[dict]:
+    with get_read_connection() as conn:
+        rows = conn.execute(
+            """
+            SELECT day, SUM(loans) AS loans, SUM(returns) AS returns
+            FROM daily_book_loans
+            WHERE day >= ?
+            GROUP BY day
+            ORDER BY day ASC
+            """,
+            (since_day(days),),
+        ).fetchall()
+        return [{**dict(row), "day": day_iso(row["day"])} for row in rows]
+
+
+def catalog_summary() -> dict:
+    with get_read_connection() as conn:
+        row = conn.execute(
+            """
+            SELECT (SELECT COUNT(*) FROM books) AS books,
+                   (SELECT COALESCE(SUM(total_copies), 0) FROM books) AS total_copies,
+                   (SELECT COALESCE(SUM(available_copies), 0) FROM books) AS available_copies,
+                   (SELECT COUNT(*) FROM members) AS members,
+                   (SELECT COUNT(*) FROM loans WHERE return_date IS NULL) AS active_loans,
+                   (SELECT COUNT(*) FROM loans WHERE return_date IS NULL AND loan_date < ?) AS overdue_loans
+            """,
+            (now_epoch() - LOAN_PERIOD_SECONDS,),
+        ).fetchone()
+        return {key: int(value) for key, value in dict(row).items()}
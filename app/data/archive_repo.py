@@ -0,0 +1,101 @@
+import json
+from datetime import datetime, timezone
+from app.data.backends import get_backend
+from app.data.dates import DAY_SECONDS, now_epoch
+from app.data.db import get_connection
+
+ARCHIVE_PREFIX = "loans_archive_"
+LOAN_COLUMNS = "id, book_id, member_id, loan_date, return_date"
+
+
+def archive_table(year: str) -> str:
+    if not year.isdigit() or len(year) != 4:
+        raise ValueError(f"Invalid archive year: {year}")
+    return f"{ARCHIVE_PREFIX}{year}"
+
+
+def archive_table_sql(table: str) -> str:
+    return f"""
+        CREATE TABLE IF NOT EXISTS {table} (
+            id INTEGER PRIMARY KEY,
+            book_id INTEGER NOT NULL REFERENCES books (id) ON DELETE CASCADE,
+            member_id INTEGER NOT NULL REFERENCES members (id) ON DELETE CASCADE,
+            loan_date INTEGER NOT NULL,
+            return_date INTEGER NOT NULL
+        )
+        """
+
+
+def ensure_archive_table(conn, year: str) -> str:
+    table = archive_table(year)
+    conn.execute(archive_table_sql(table))
+    conn.execute(
+        f"CREATE INDEX IF NOT EXISTS idx_{table}_member ON {table} (member_id, loan_date)"
+    )
+    conn.execute(
+        f"CREATE INDEX IF NOT EXISTS idx_{table}_book ON {table} (book_id)"
+    )
+    return table
+
+
+def list_archive_tables(conn) -> list[str]:
+    return get_backend().list_tables(conn, ARCHIVE_PREFIX)
+
+
+def loan_history_source(conn, where: str, params: tuple) -> tuple[str, list]:
+    tables = ["loans"] + list_archive_tables(conn)
+    query = " UNION ALL ".join(
+        f"SELECT {LOAN_COLUMNS} FROM {table} WHERE {where}" for table in tables
+    )
+    return query, list(params) * len(tables)
+
+
+def archive_returned_loans(older_than_days: int, batch_size: int) -> int:
+    cutoff = now_epoch() - older_than_days * DAY_SECONDS
+    id_list = get_backend().id_list_sql
+    archived = 0
+
+    while True:
+        with get_connection() as conn:
+            rows = conn.execute(
+                """
+                SELECT id, loan_date
+                FROM loans
+                WHERE return_date IS NOT NULL AND return_date < ?
+                ORDER BY id
+                LIMIT ?
+                """,
+                (cutoff, batch_size),
+            ).fetchall()
+            if not rows:
+                break
+
+            by_year: dict[str, list[int]] = {}
+            for row in rows:
+                year = str(datetime.fromtimestamp(row["loan_date"], timezone.utc).year)
+                by_year.setdefault(year, []).append(row["id"])
+
+            for year, ids in by_year.items():
+                table = ensure_archive_table(conn, year)
+                conn.execute(
+                    f"""
+                    INSERT INTO {table} ({LOAN_COLUMNS})
+                    SELECT {LOAN_COLUMNS}
+                    FROM loans
+                    WHERE id IN ({id_list})
+                    ON CONFLICT (id) DO NOTHING
+                    """,
+                    (json.dumps(ids),),
+                )
+
+            conn.execute(
+                f"DELETE FROM loans WHERE id IN ({id_list})",
+                (json.dumps([row["id"] for row in rows]),),
+            )
+            conn.commit()
+
+        archived += len(rows)
+        if len(rows) < batch_size:
+            break
+
+    return archived
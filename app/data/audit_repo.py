@@ -0,0 +1,69 @@
+import json
+
+from app.data.db import get_connection, get_read_connection
+from app.data.dates import with_iso_dates
+
+AUDIT_SELECT = """
+    SELECT id, entity, entity_id, action, before_data, after_data, actor, changed_at
+    FROM audit_log
+"""
+
+
+def insert_entries(entries: list[dict]) -> int:
+    with get_connection() as conn:
+        conn.executemany(
+            """
+            INSERT INTO audit_log (entity, entity_id, action, before_data, after_data, actor, changed_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            """,
+            [
+                (
+                    entry["entity"],
+                    entry["entity_id"],
+                    entry["action"],
+                    json.dumps(entry["before"]) if entry["before"] is not None else None,
+                    json.dumps(entry["after"]) if entry["after"] is not None else None,
+                    entry["actor"],
+                    entry["changed_at"],
+                )
+                for entry in entries
+            ],
+        )
+        conn.commit()
+    return len(entries)
+
+
+def row_to_entry(row) -> dict:
+    entry = with_iso_dates(row)
+    entry["before"] = json.loads(entry.pop("before_data")) if row["before_data"] else None
+    entry["after"] = json.loads(entry.pop("after_data")) if row["after_data"] else None
+    return entry
+
+
+def audit_filter(entity: str | None, entity_id: int | None, actor: str | None) -> tuple[str, list]:
+    clauses = []
+    params = []
+    for column, value in (("entity", entity), ("entity_id", entity_id), ("actor", actor)):
+        if value is not None:
+            clauses.append(f"{column} = ?")
+            params.append(value)
+    return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+
+def list_entries(
+    entity: str | None, entity_id: int | None, actor: str | None, limit: int, offset: int
+) -> list[dict]:
+    where, params = audit_filter(entity, entity_id, actor)
+    with get_read_connection() as conn:
+        rows = conn.execute(
+            AUDIT_SELECT + where + " ORDER BY id DESC LIMIT ? OFFSET ?",
+            (*params, limit, offset),
+        ).fetchall()
+    return [row_to_entry(row) for row in rows]
+
+
+def count_entries(entity: str | None, entity_id: int | None, actor: str | None) -> int:
+    where, params = audit_filter(entity, entity_id, actor)
+    with get_read_connection() as conn:
+        row = conn.execute("SELECT COUNT(*) AS count FROM audit_log" + where, params).fetchone()
+        return row["count"] if row else 0
@@ -1,64 +1,77 @@
-from app.data.db import get_connection
+from app.data.backends import get_backend
+from app.data.db import get_read_connection
+from app.data.errors import VersionConflictError
+from app.data.writer import write
 from app.models.author import Author
 
 
 def create_author(payload: Author) -> dict:
-    with get_connection() as conn:
+    def insert(conn) -> int:
         cursor = conn.execute(
             "INSERT INTO authors (name, birth_year) VALUES (?, ?)",
             (payload.name, payload.birth_year),
         )
-        conn.commit()
-        return get_author(cursor.lastrowid)
+        return cursor.lastrowid
+
+    return get_author(write(insert))
 
 
 def list_authors(limit: int, offset: int) -> list[dict]:
-    with get_connection() as conn:
+    with get_read_connection() as conn:
         rows = conn.execute(
-            "SELECT id, name, birth_year FROM authors ORDER BY name LIMIT ? OFFSET ?",
+            "SELECT id, name, birth_year, version FROM authors ORDER BY name LIMIT ? OFFSET ?",
             (limit, offset),
         ).fetchall()
         return [dict(row) for row in rows]
 
 def count_authors() -> int:
-    with get_connection() as conn:
+    with get_read_connection() as conn:
         row = conn.execute("SELECT COUNT(*) AS count FROM authors").fetchone()
         return row["count"] if row else 0
 
 
+def author_row(conn, author_id: int) -> dict | None:
+    row = conn.execute(
+        "SELECT id, name, birth_year, version FROM authors WHERE id = ?",
+        (author_id,),
+    ).fetchone()
+    return dict(row) if row else None
+
+
 def get_author(author_id: int) -> dict | None:
-    with get_connection() as conn:
-        row = conn.execute(
-            "SELECT id, name, birth_year FROM authors WHERE id = ?",
-            (author_id,),
-        ).fetchone()
-        return dict(row) if row else None
+    with get_read_connection() as conn:
+        return author_row(conn, author_id)
 
 
-def update_author(author_id: int, payload: Author) -> dict | None:
-    with get_connection() as conn:
-        cursor = conn.execute(
-            "UPDATE authors SET name = ?, birth_year = ? WHERE id = ?",
-            (payload.name, payload.birth_year, author_id),
-        )
-        conn.commit()
+def update_author(
+    author_id: int, payload: Author, expected_version: int | None = None
+) -> tuple[dict | None, dict | None]:
+    query = "UPDATE authors SET name = ?, birth_year = ?, version = version + 1 WHERE id = ?"
+    params = [payload.name, payload.birth_year, author_id]
+    if expected_version is not None:
+        query += " AND version = ?"
+        params.append(expected_version)
+
+    def update(conn) -> tuple[dict | None, dict | None]:
+        before = author_row(conn, author_id)
+        cursor = conn.execute(query, params)
         if cursor.rowcount == 0:
-            return None
-        return get_author(author_id)
+            if before:
+                raise VersionConflictError("Author was modified by another request.")
+            return None, None
+        return before, author_row(conn, author_id)
 
+    return write(update)
 
-def delete_author(author_id: int) -> bool:
-    with get_connection() as conn:
-        conn.execute("DELETE FROM book_authors WHERE author_id = ?", (author_id,))
-        cursor = conn.execute("DELETE FROM authors WHERE id = ?", (author_id,))
-        conn.commit()
-        return cursor.rowcount > 0
 
+def delete_author(author_id: int) -> dict | None:
+    def delete(conn) -> dict | None:
+        before = author_row(conn, author_id)
+        if before:
+            conn.execute("DELETE FROM authors WHERE id = ?", (author_id,))
+        return before
 
-def has_books(author_id: int) -> bool:
-    with get_connection() as conn:
-        row = conn.execute(
-            "SELECT 1 FROM book_authors WHERE author_id = ? LIMIT 1",
-            (author_id,),
-        ).fetchone()
-        return row is not None
+    try:
+        return write(delete)
+    except get_backend().integrity_error as exc:
+        raise ValueError("Cannot delete author with existing books") from exc
@@ -0,0 +1,113 @@
+import contextvars
+import itertools
+import re
+from pathlib import Path
+
+from app.config import (
+    BRANCH_DIR,
+    DATABASE_URL,
+    DB_BACKEND,
+    DB_PATH,
+    PG_POOL_MAX_SIZE,
+    PG_POOL_MIN_SIZE,
+    READ_REPLICAS,
+)
+from app.data.backends.sqlite import SQLiteBackend
+
+_backend = None
+_replicas = None
+_replica_turn = itertools.count()
+_shards = {}
+read_primary = contextvars.ContextVar("read_primary", default=False)
+current_branch = contextvars.ContextVar("current_branch", default=None)
+BRANCH_NAME = re.compile(r"^[a-z0-9][a-z0-9_-]{0,31}$")
+
+
+def create_backend(name: str, target=None, read_only: bool = False):
+    if name == "sqlite":
+        return SQLiteBackend(Path(target) if target else DB_PATH, read_only=read_only)
+    if name == "postgres":
+        from app.data.backends.postgres import PostgresBackend
+
+        url = target or DATABASE_URL
+        if not url:
+            raise RuntimeError("EASYSTOCK_DATABASE_URL is required for the postgres backend")
+        return PostgresBackend(url, PG_POOL_MIN_SIZE, PG_POOL_MAX_SIZE)
+    raise RuntimeError(f"Unknown database backend: {name}")
+
+
+def sharding_enabled() -> bool:
+    return BRANCH_DIR is not None
+
+
+def shard_path(branch: str) -> Path:
+    if not sharding_enabled():
+        raise RuntimeError("EASYSTOCK_BRANCH_DIR is required for branch shards")
+    if not BRANCH_NAME.match(branch):
+        raise ValueError(f"Invalid branch name: {branch}")
+    return BRANCH_DIR / f"{branch}.db"
+
+
+def list_branches() -> list[str]:
+    if not sharding_enabled() or not BRANCH_DIR.exists():
+        return []
+    return sorted(path.stem for path in BRANCH_DIR.glob("*.db") if BRANCH_NAME.match(path.stem))
+
+
+def branch_exists(branch: str) -> bool:
+    if not sharding_enabled() or not BRANCH_NAME.match(branch):
+        return False
+    return branch in _shards or shard_path(branch).exists()
+
+
+def get_shard(branch: str):
+    shard = _shards.get(branch)
+    if shard is None:
+        if DB_BACKEND != "sqlite":
+            raise RuntimeError("Branch shards are only supported on the sqlite backend")
+        shard = _shards.setdefault(branch, SQLiteBackend(shard_path(branch)))
+    return shard
+
+
+def get_backend():
+    global _backend
+    branch = current_branch.get()
+    if branch is not None:
+        return get_shard(branch)
+    if _backend is None:
+        _backend = create_backend(DB_BACKEND)
+    return _backend
+
+
+def get_replicas() -> list:
+    global _replicas
+    if _replicas is None:
+        _replicas = [create_backend(DB_BACKEND, target, read_only=True) for target in READ_REPLICAS]
+    return _replicas
+
+
+def get_read_backend():
+    if read_primary.get() or current_branch.get() is not None:
+        return get_backend()
+    replicas = [replica for replica in get_replicas() if replica.is_available()]
+    if not replicas:
+        return get_backend()
+    return replicas[next(_replica_turn) % len(replicas)]
+
+
+def replicas_fresh_since(timestamp: float) -> bool:
+    return all(replica.is_fresh(timestamp) for replica in get_replicas() if replica.is_available())
+
+
+def refresh_snapshots(missing_only: bool = False) -> int:
+    primary = get_backend()
+    if primary.name != "sqlite" or current_branch.get() is not None:
+        return 0
+
+    refreshed = 0
+    for replica in get_replicas():
+        if missing_only and replica.is_available():
+            continue
+        primary.snapshot_to(replica.path)
+        refreshed += 1
+    return refreshed
@@ -0,0 +1,438 @@
+import re
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS genres (
+    id BIGINT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+
+CREATE TABLE IF NOT EXISTS authors (
+    id BIGINT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    name TEXT NOT NULL,
+    birth_year INTEGER,
+    version INTEGER NOT NULL DEFAULT 1
+);
+
+CREATE TABLE IF NOT EXISTS books (
+    id BIGINT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    title TEXT NOT NULL,
+    isbn TEXT NOT NULL UNIQUE,
+    version INTEGER NOT NULL DEFAULT 1,
+    total_copies INTEGER NOT NULL DEFAULT 0,
+    available_copies INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS book_authors (
+    book_id BIGINT NOT NULL REFERENCES books (id) ON DELETE CASCADE,
+    author_id BIGINT NOT NULL REFERENCES authors (id) ON DELETE RESTRICT,
+    PRIMARY KEY (book_id, author_id)
+);
+
+CREATE TABLE IF NOT EXISTS book_genres (
+    book_id BIGINT NOT NULL REFERENCES books (id) ON DELETE CASCADE,
+    genre_id BIGINT NOT NULL REFERENCES genres (id) ON DELETE RESTRICT,
+    PRIMARY KEY (book_id, genre_id)
+);
+
+CREATE TABLE IF NOT EXISTS members (
+    id BIGINT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    name TEXT NOT NULL,
+    email TEXT NOT NULL UNIQUE,
+    registered_at BIGINT NOT NULL,
+    version INTEGER NOT NULL DEFAULT 1
+);
+
+CREATE TABLE IF NOT EXISTS copies (
+    id BIGINT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    book_id BIGINT NOT NULL REFERENCES books (id) ON DELETE CASCADE,
+    barcode TEXT NOT NULL UNIQUE,
+    branch TEXT NOT NULL DEFAULT 'main',
+    status TEXT NOT NULL DEFAULT 'available'
+);
+
+CREATE INDEX IF NOT EXISTS idx_copies_available
+    ON copies (book_id, id) WHERE status = 'available';
+
+CREATE TABLE IF NOT EXISTS loans (
+    id BIGINT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    book_id BIGINT NOT NULL REFERENCES books (id) ON DELETE CASCADE,
+    member_id BIGINT NOT NULL REFERENCES members (id) ON DELETE CASCADE,
+    loan_date BIGINT NOT NULL,
+    return_date BIGINT,
+    copy_id BIGINT REFERENCES copies (id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_loans_active_book
+    ON loans (book_id, member_id) WHERE return_date IS NULL;
+
+CREATE INDEX IF NOT EXISTS idx_loans_member_date
+    ON loans (member_id, loan_date);
+
+CREATE INDEX IF NOT EXISTS idx_loans_active_date
+    ON loans (loan_date) WHERE return_date IS NULL;
+
+CREATE TABLE IF NOT EXISTS holds (
+    id BIGINT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    book_id BIGINT NOT NULL REFERENCES books (id) ON DELETE CASCADE,
+    member_id BIGINT NOT NULL REFERENCES members (id) ON DELETE CASCADE,
+    status TEXT NOT NULL DEFAULT 'waiting',
+    placed_at BIGINT NOT NULL,
+    ready_at BIGINT
+);
+
+CREATE INDEX IF NOT EXISTS idx_holds_queue
+    ON holds (book_id, id) WHERE status = 'waiting';
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_holds_open_member
+    ON holds (book_id, member_id) WHERE status IN ('waiting', 'ready');
+
+CREATE OR REPLACE FUNCTION reject_active_loan_delete() RETURNS trigger AS $$
+BEGIN
+    IF TG_TABLE_NAME = 'books' AND EXISTS (
+        SELECT 1 FROM loans WHERE book_id = OLD.id AND return_date IS NULL
+    ) THEN
+        RAISE EXCEPTION 'Cannot delete book with active loans' USING ERRCODE = 'restrict_violation';
+    END IF;
+    IF TG_TABLE_NAME = 'members' AND EXISTS (
+        SELECT 1 FROM loans WHERE member_id = OLD.id AND return_date IS NULL
+    ) THEN
+        RAISE EXCEPTION 'Cannot delete member with active loans' USING ERRCODE = 'restrict_violation';
+    END IF;
+    RETURN OLD;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE TRIGGER trg_books_active_loans
+    BEFORE DELETE ON books
+    FOR EACH ROW EXECUTE FUNCTION reject_active_loan_delete();
+
+CREATE OR REPLACE TRIGGER trg_members_active_loans
+    BEFORE DELETE ON members
+    FOR EACH ROW EXECUTE FUNCTION reject_active_loan_delete();
+
+CREATE TABLE IF NOT EXISTS daily_book_loans (
+    day INTEGER NOT NULL,
+    book_id BIGINT NOT NULL,
+    loans INTEGER NOT NULL DEFAULT 0,
+    returns INTEGER NOT NULL DEFAULT 0,
+    loan_seconds BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, book_id)
+);
+
+CREATE TABLE IF NOT EXISTS daily_genre_loans (
+    day INTEGER NOT NULL,
+    genre_id BIGINT NOT NULL,
+    loans INTEGER NOT NULL DEFAULT 0,
+    returns INTEGER NOT NULL DEFAULT 0,
+    loan_seconds BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, genre_id)
+);
+
+CREATE TABLE IF NOT EXISTS daily_member_loans (
+    day INTEGER NOT NULL,
+    member_id BIGINT NOT NULL,
+    loans INTEGER NOT NULL DEFAULT 0,
+    returns INTEGER NOT NULL DEFAULT 0,
+    loan_seconds BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, member_id)
+);
+
+CREATE TABLE IF NOT EXISTS jobs (
+    name TEXT PRIMARY KEY,
+    interval_seconds INTEGER NOT NULL,
+    max_retries INTEGER NOT NULL DEFAULT 3,
+    enabled INTEGER NOT NULL DEFAULT 1,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_run_at TEXT NOT NULL,
+    last_run_at TEXT,
+    last_status TEXT
+);
+
+CREATE TABLE IF NOT EXISTS job_runs (
+    id BIGINT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    job_name TEXT NOT NULL REFERENCES jobs (name),
+    attempt INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    result TEXT,
+    error TEXT,
+    started_at TEXT NOT NULL,
+    finished_at TEXT
+);
+
+CREATE INDEX IF NOT EXISTS idx_job_runs_job
+    ON job_runs (job_name, id);
+
+CREATE TABLE IF NOT EXISTS idempotency_keys (
+    key TEXT PRIMARY KEY,
+    fingerprint TEXT NOT NULL,
+    status_code INTEGER,
+    headers TEXT,
+    body BYTEA,
+    created_at BIGINT NOT NULL,
+    expires_at BIGINT NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_idempotency_keys_expires
+    ON idempotency_keys (expires_at);
+
+CREATE TABLE IF NOT EXISTS audit_log (
+    id BIGINT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    entity TEXT NOT NULL,
+    entity_id BIGINT NOT NULL,
+    action TEXT NOT NULL,
+    before_data TEXT,
+    after_data TEXT,
+    actor TEXT,
+    changed_at BIGINT NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_audit_log_entity
+    ON audit_log (entity, entity_id, id);
+
+CREATE INDEX IF NOT EXISTS idx_audit_log_changed
+    ON audit_log (changed_at);
+
+CREATE TABLE IF NOT EXISTS schema_version (
+    version INTEGER NOT NULL
+);
+"""
+
+IDENTITY_TABLES = {"genres", "authors", "books", "members", "loans", "holds", "copies", "job_runs"}
+INSERT_TABLE = re.compile(r"^\s*INSERT\s+INTO\s+(\w+)", re.IGNORECASE)
+
+
+def to_pyformat(sql: str) -> str:
+    out = []
+    quoted = False
+    for char in sql:
+        if char == "'":
+            quoted = not quoted
+            out.append(char)
+        elif char == "?" and not quoted:
+            out.append("%s")
+        elif char == "%":
+            out.append("%%")
+        else:
+            out.append(char)
+    return "".join(out)
+
+
+class Row(dict):
+    def __getitem__(self, key):
+        if isinstance(key, int):
+            return list(self.values())[key]
+        return super().__getitem__(key)
+
+
+def row_factory(cursor):
+    names = [column.name for column in cursor.description or []]
+
+    def make_row(values):
+        return Row(zip(names, values))
+
+    return make_row
+
+
+class Cursor:
+    def __init__(self, cursor, lastrowid: int | None = None):
+        self._cursor = cursor
+        self.lastrowid = lastrowid
+
+    @property
+    def rowcount(self) -> int:
+        return self._cursor.rowcount
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    def fetchmany(self, size: int):
+        return self._cursor.fetchmany(size)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+
+class PostgresConnection:
+    def __init__(self, pool, conn):
+        self._pool = pool
+        self._conn = conn
+
+    def execute(self, sql: str, params=()) -> Cursor:
+        match = INSERT_TABLE.match(sql)
+        returning = (
+            match is not None
+            and match.group(1).lower() in IDENTITY_TABLES
+            and "RETURNING" not in sql.upper()
+        )
+        if returning:
+            sql = sql.rstrip().rstrip(";") + " RETURNING id"
+
+        cursor = self._conn.cursor()
+        cursor.execute(to_pyformat(sql), params)
+        lastrowid = None
+        if returning and cursor.rowcount > 0:
+            lastrowid = cursor.fetchone()["id"]
+        return Cursor(cursor, lastrowid)
+
+    def executemany(self, sql: str, rows) -> Cursor:
+        cursor = self._conn.cursor()
+        cursor.executemany(to_pyformat(sql), rows)
+        return Cursor(cursor)
+
+    def executescript(self, script: str) -> None:
+        self._conn.execute(script)
+
+    def commit(self) -> None:
+        self._conn.commit()
+
+    def rollback(self) -> None:
+        self._conn.rollback()
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._pool.putconn(self._conn)
+            self._conn = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if exc_type is None:
+                self._conn.commit()
+            else:
+                self._conn.rollback()
+        finally:
+            self.close()
+        return False
+
+
+class PostgresBackend:
+    name = "postgres"
+    id_list_sql = "SELECT jsonb_array_elements_text(?::jsonb)::bigint"
+
+    def __init__(self, url: str, min_size: int, max_size: int):
+        try:
+            from psycopg import IntegrityError
+            from psycopg_pool import ConnectionPool
+        except ImportError as exc:
+            raise RuntimeError(
+                'The postgres backend needs psycopg: pip install "psycopg[binary,pool]"'
+            ) from exc
+
+        self.url = url
+        self.integrity_error = IntegrityError
+        self.pool = ConnectionPool(
+            url,
+            min_size=min_size,
+            max_size=max_size,
+            kwargs={"row_factory": row_factory},
+            open=True,
+        )
+
+    def prepare(self) -> None:
+        self.pool.wait()
+
+    def is_available(self) -> bool:
+        return True
+
+    def is_fresh(self, since: float) -> bool:
+        return True
+
+    def connect(self) -> PostgresConnection:
+        return PostgresConnection(self.pool, self.pool.getconn())
+
+    def create_schema(self, conn: PostgresConnection) -> None:
+        conn.executescript(SCHEMA)
+
+    def list_tables(self, conn: PostgresConnection, prefix: str) -> list[str]:
+        rows = conn.execute(
+            """
+            SELECT table_name AS name
+            FROM information_schema.tables
+            WHERE table_schema = current_schema() AND table_name LIKE ?
+            ORDER BY table_name DESC
+            """,
+            (prefix + "%",),
+        ).fetchall()
+        return [row["name"] for row in rows]
+
+    def column_type(self, conn: PostgresConnection, table: str, column: str) -> str | None:
+        row = conn.execute(
+            """
+            SELECT data_type
+            FROM information_schema.columns
+            WHERE table_schema = current_schema() AND table_name = ? AND column_name = ?
+            """,
+            (table, column),
+        ).fetchone()
+        return row["data_type"] if row else None
+
+    def convert_to_epoch(self, conn: PostgresConnection, table: str, column: str, not_null: bool) -> None:
+        conn.execute(
+            f"""
+            ALTER TABLE {table} ALTER COLUMN {column} TYPE BIGINT
+            USING EXTRACT(EPOCH FROM {column}::timestamp)::bigint
+            """
+        )
+
+    def delete_rules(self, conn: PostgresConnection, table: str) -> dict[str, str]:
+        rows = conn.execute(
+            """
+            SELECT k.column_name, r.delete_rule
+            FROM information_schema.referential_constraints r
+            JOIN information_schema.key_column_usage k
+              ON k.constraint_name = r.constraint_name AND k.constraint_schema = r.constraint_schema
+            WHERE k.table_schema = current_schema() AND k.table_name = ?
+            """,
+            (table,),
+        ).fetchall()
+        return {row["column_name"]: row["delete_rule"] for row in rows}
+
+    def set_delete_rules(
+        self, conn: PostgresConnection, table: str, rules: dict[str, tuple[str, str]], create_sql: str | None = None
+    ) -> None:
+        for column, (parent, action) in rules.items():
+            name = f"{table}_{column}_fkey"
+            conn.execute(
+                f"""
+                ALTER TABLE {table}
+                DROP CONSTRAINT IF EXISTS {name},
+                ADD CONSTRAINT {name} FOREIGN KEY ({column}) REFERENCES {parent} (id) ON DELETE {action}
+                """
+            )
+        conn.commit()
+
+    def reset_sequences(self, conn: PostgresConnection, tables: list[str]) -> None:
+        for table in tables:
+            if table in IDENTITY_TABLES:
+                conn.execute(
+                    f"""
+                    SELECT setval(pg_get_serial_sequence('{table}', 'id'),
+                                  COALESCE(MAX(id), 0) + 1, false)
+                    FROM {table}
+                    """
+                )
+
+    def optimize(self) -> None:
+        with self.connect() as conn:
+            conn.execute("ANALYZE")
+
+    def vacuum(self) -> None:
+        conn = self.pool.getconn()
+        try:
+            conn.autocommit = True
+            conn.execute("VACUUM")
+        finally:
+            conn.autocommit = False
+            self.pool.putconn(conn)
+
+    def database_size(self) -> int:
+        with self.connect() as conn:
+            return conn.execute("SELECT pg_database_size(current_database())").fetchone()[0]
+
+    def close(self) -> None:
+        self.pool.close()
@@ -0,0 +1,404 @@
+import logging
+import os
+import re
+import sqlite3
+import time
+from pathlib import Path
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS genres (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL UNIQUE
+);
+
+CREATE TABLE IF NOT EXISTS authors (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    birth_year INTEGER,
+    version INTEGER NOT NULL DEFAULT 1
+);
+
+CREATE TABLE IF NOT EXISTS books (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    title TEXT NOT NULL,
+    isbn TEXT NOT NULL UNIQUE,
+    version INTEGER NOT NULL DEFAULT 1,
+    total_copies INTEGER NOT NULL DEFAULT 0,
+    available_copies INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS book_authors (
+    book_id INTEGER NOT NULL,
+    author_id INTEGER NOT NULL,
+    PRIMARY KEY (book_id, author_id),
+    FOREIGN KEY (book_id) REFERENCES books (id) ON DELETE CASCADE,
+    FOREIGN KEY (author_id) REFERENCES authors (id) ON DELETE RESTRICT
+);
+
+CREATE TABLE IF NOT EXISTS book_genres (
+    book_id INTEGER NOT NULL,
+    genre_id INTEGER NOT NULL,
+    PRIMARY KEY (book_id, genre_id),
+    FOREIGN KEY (book_id) REFERENCES books (id) ON DELETE CASCADE,
+    FOREIGN KEY (genre_id) REFERENCES genres (id) ON DELETE RESTRICT
+);
+
+CREATE TABLE IF NOT EXISTS members (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    email TEXT NOT NULL UNIQUE,
+    registered_at INTEGER NOT NULL,
+    version INTEGER NOT NULL DEFAULT 1
+);
+
+CREATE TABLE IF NOT EXISTS copies (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    book_id INTEGER NOT NULL,
+    barcode TEXT NOT NULL UNIQUE,
+    branch TEXT NOT NULL DEFAULT 'main',
+    status TEXT NOT NULL DEFAULT 'available',
+    FOREIGN KEY (book_id) REFERENCES books (id) ON DELETE CASCADE
+);
+
+CREATE INDEX IF NOT EXISTS idx_copies_available
+    ON copies (book_id, id) WHERE status = 'available';
+
+CREATE TABLE IF NOT EXISTS loans (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    book_id INTEGER NOT NULL,
+    member_id INTEGER NOT NULL,
+    loan_date INTEGER NOT NULL,
+    return_date INTEGER,
+    copy_id INTEGER,
+    FOREIGN KEY (book_id) REFERENCES books (id) ON DELETE CASCADE,
+    FOREIGN KEY (member_id) REFERENCES members (id) ON DELETE CASCADE,
+    FOREIGN KEY (copy_id) REFERENCES copies (id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_loans_active_book
+    ON loans (book_id, member_id) WHERE return_date IS NULL;
+
+CREATE INDEX IF NOT EXISTS idx_loans_member_date
+    ON loans (member_id, loan_date);
+
+CREATE INDEX IF NOT EXISTS idx_loans_active_date
+    ON loans (loan_date) WHERE return_date IS NULL;
+
+CREATE TABLE IF NOT EXISTS holds (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    book_id INTEGER NOT NULL,
+    member_id INTEGER NOT NULL,
+    status TEXT NOT NULL DEFAULT 'waiting',
+    placed_at INTEGER NOT NULL,
+    ready_at INTEGER,
+    FOREIGN KEY (book_id) REFERENCES books (id) ON DELETE CASCADE,
+    FOREIGN KEY (member_id) REFERENCES members (id) ON DELETE CASCADE
+);
+
+CREATE INDEX IF NOT EXISTS idx_holds_queue
+    ON holds (book_id, id) WHERE status = 'waiting';
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_holds_open_member
+    ON holds (book_id, member_id) WHERE status IN ('waiting', 'ready');
+
+CREATE TRIGGER IF NOT EXISTS trg_books_active_loans
+BEFORE DELETE ON books
+WHEN EXISTS (SELECT 1 FROM loans WHERE book_id = OLD.id AND return_date IS NULL)
+BEGIN
+    SELECT RAISE(ABORT, 'Cannot delete book with active loans');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_members_active_loans
+BEFORE DELETE ON members
+WHEN EXISTS (SELECT 1 FROM loans WHERE member_id = OLD.id AND return_date IS NULL)
+BEGIN
+    SELECT RAISE(ABORT, 'Cannot delete member with active loans');
+END;
+
+CREATE TABLE IF NOT EXISTS daily_book_loans (
+    day INTEGER NOT NULL,
+    book_id INTEGER NOT NULL,
+    loans INTEGER NOT NULL DEFAULT 0,
+    returns INTEGER NOT NULL DEFAULT 0,
+    loan_seconds INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, book_id)
+);
+
+CREATE TABLE IF NOT EXISTS daily_genre_loans (
+    day INTEGER NOT NULL,
+    genre_id INTEGER NOT NULL,
+    loans INTEGER NOT NULL DEFAULT 0,
+    returns INTEGER NOT NULL DEFAULT 0,
+    loan_seconds INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, genre_id)
+);
+
+CREATE TABLE IF NOT EXISTS daily_member_loans (
+    day INTEGER NOT NULL,
+    member_id INTEGER NOT NULL,
+    loans INTEGER NOT NULL DEFAULT 0,
+    returns INTEGER NOT NULL DEFAULT 0,
+    loan_seconds INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, member_id)
+);
+
+CREATE TABLE IF NOT EXISTS jobs (
+    name TEXT PRIMARY KEY,
+    interval_seconds INTEGER NOT NULL,
+    max_retries INTEGER NOT NULL DEFAULT 3,
+    enabled INTEGER NOT NULL DEFAULT 1,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_run_at TEXT NOT NULL,
+    last_run_at TEXT,
+    last_status TEXT
+);
+
+CREATE TABLE IF NOT EXISTS job_runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_name TEXT NOT NULL,
+    attempt INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    result TEXT,
+    error TEXT,
+    started_at TEXT NOT NULL,
+    finished_at TEXT,
+    FOREIGN KEY (job_name) REFERENCES jobs (name)
+);
+
+CREATE INDEX IF NOT EXISTS idx_job_runs_job
+    ON job_runs (job_name, id);
+
+CREATE TABLE IF NOT EXISTS idempotency_keys (
+    key TEXT PRIMARY KEY,
+    fingerprint TEXT NOT NULL,
+    status_code INTEGER,
+    headers TEXT,
+    body BLOB,
+    created_at INTEGER NOT NULL,
+    expires_at INTEGER NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_idempotency_keys_expires
+    ON idempotency_keys (expires_at);
+
+CREATE TABLE IF NOT EXISTS audit_log (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    entity TEXT NOT NULL,
+    entity_id INTEGER NOT NULL,
+    action TEXT NOT NULL,
+    before_data TEXT,
+    after_data TEXT,
+    actor TEXT,
+    changed_at INTEGER NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_audit_log_entity
+    ON audit_log (entity, entity_id, id);
+
+CREATE INDEX IF NOT EXISTS idx_audit_log_changed
+    ON audit_log (changed_at);
+
+CREATE TABLE IF NOT EXISTS schema_version (
+    version INTEGER NOT NULL
+);
+"""
+
+
+logger = logging.getLogger(__name__)
+
+
+class BackupRestarted(Exception):
+    pass
+
+
+def table_sql(table: str) -> str:
+    match = re.search(rf"CREATE TABLE IF NOT EXISTS {table} \(.*?\n\);", SCHEMA, re.DOTALL)
+    if match is None:
+        raise ValueError(f"No schema for table {table}")
+    return match.group(0)
+
+
+class SQLiteBackend:
+    name = "sqlite"
+    id_list_sql = "SELECT value FROM json_each(?)"
+    integrity_error = sqlite3.IntegrityError
+
+    def __init__(self, path: Path, read_only: bool = False):
+        self.path = Path(path)
+        self.read_only = read_only
+
+    def prepare(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+    def connect(self) -> sqlite3.Connection:
+        if self.read_only:
+            conn = sqlite3.connect(f"{self.path.resolve().as_uri()}?mode=ro", uri=True)
+        else:
+            conn = sqlite3.connect(self.path)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA foreign_keys = ON")
+        return conn
+
+    def is_available(self) -> bool:
+        return self.path.exists()
+
+    def is_fresh(self, since: float) -> bool:
+        # snapshot_to stamps a snapshot with the time its copy started, so it holds every write committed before that.
+        try:
+            return self.path.stat().st_mtime >= since
+        except FileNotFoundError:
+            return False
+
+    def snapshot_to(self, target: Path, pages: int = 1024, step_sleep: float = 0.0, max_restarts: int = 3) -> int:
+        target = Path(target)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp = target.with_name(target.name + ".tmp")
+        started = time.time()
+        source = self.connect()
+        destination = sqlite3.connect(tmp)
+        restarts = 0
+        remaining_pages = None
+
+        def pause(status, remaining, total):
+            nonlocal restarts, remaining_pages
+            # A write from another connection restarts the copy from page one.
+            if remaining_pages is not None and remaining > remaining_pages:
+                restarts += 1
+                if restarts > max_restarts:
+                    raise BackupRestarted
+            remaining_pages = remaining
+            # Between steps the source is unlocked, so waiting writers can commit.
+            if remaining and step_sleep:
+                time.sleep(step_sleep)
+
+        try:
+            try:
+                source.backup(destination, pages=pages, progress=pause)
+            except BackupRestarted:
+                source.backup(destination, pages=-1)
+        finally:
+            destination.close()
+            source.close()
+        os.utime(tmp, (started, started))
+        os.replace(tmp, target)
+        return restarts
+
+    def restore_from(self, source: Path) -> None:
+        backup = sqlite3.connect(f"{Path(source).resolve().as_uri()}?mode=ro", uri=True)
+        live = self.connect()
+        try:
+            if backup.execute("PRAGMA quick_check").fetchone()[0] != "ok":
+                raise ValueError(f"Backup {Path(source).name} failed the integrity check.")
+            backup.backup(live)
+        finally:
+            live.close()
+            backup.close()
+
+    def create_schema(self, conn: sqlite3.Connection) -> None:
+        conn.executescript(SCHEMA)
+
+    def list_tables(self, conn: sqlite3.Connection, prefix: str) -> list[str]:
+        rows = conn.execute(
+            """
+            SELECT name
+            FROM sqlite_master
+            WHERE type = 'table' AND name LIKE ?
+            ORDER BY name DESC
+            """,
+            (prefix + "%",),
+        ).fetchall()
+        return [row["name"] for row in rows]
+
+    def column_type(self, conn: sqlite3.Connection, table: str, column: str) -> str | None:
+        for row in conn.execute(f"PRAGMA table_info({table})").fetchall():
+            if row["name"] == column:
+                return row["type"].lower()
+        return None
+
+    def convert_to_epoch(self, conn: sqlite3.Connection, table: str, column: str, not_null: bool) -> None:
+        dependents = conn.execute(
+            """
+            SELECT type, name, sql
+            FROM sqlite_master
+            WHERE type IN ('index', 'trigger') AND sql LIKE ?
+            """,
+            (f"%{column}%",),
+        ).fetchall()
+        for dependent in dependents:
+            conn.execute(f"DROP {dependent['type'].upper()} {dependent['name']}")
+
+        constraint = " NOT NULL DEFAULT 0" if not_null else ""
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN {column}_epoch INTEGER{constraint}")
+        conn.execute(f"UPDATE {table} SET {column}_epoch = CAST(strftime('%s', {column}) AS INTEGER)")
+        conn.execute(f"ALTER TABLE {table} DROP COLUMN {column}")
+        conn.execute(f"ALTER TABLE {table} RENAME COLUMN {column}_epoch TO {column}")
+
+        for dependent in dependents:
+            conn.execute(dependent["sql"])
+
+    def delete_rules(self, conn: sqlite3.Connection, table: str) -> dict[str, str]:
+        rows = conn.execute(f"PRAGMA foreign_key_list({table})").fetchall()
+        return {row["from"]: row["on_delete"].upper() for row in rows}
+
+    def set_delete_rules(
+        self, conn: sqlite3.Connection, table: str, rules: dict[str, tuple[str, str]], create_sql: str | None = None
+    ) -> None:
+        # SQLite cannot alter a foreign key, so the table is copied into one created from the current schema
+        # and its indexes and triggers are replayed on the copy.
+        rebuilt = f"{table}_rebuild"
+        create_sql = (create_sql or table_sql(table)).replace(f" {table} (", f" {rebuilt} (", 1)
+        conn.commit()
+        conn.execute("PRAGMA foreign_keys = OFF")
+        conn.execute("PRAGMA legacy_alter_table = ON")
+        try:
+            dependents = conn.execute(
+                """
+                SELECT sql
+                FROM sqlite_master
+                WHERE tbl_name = ? AND type IN ('index', 'trigger') AND sql IS NOT NULL
+                """,
+                (table,),
+            ).fetchall()
+            conn.execute(create_sql)
+            columns = ", ".join(row["name"] for row in conn.execute(f"PRAGMA table_info({rebuilt})").fetchall())
+            conn.execute(f"INSERT INTO {rebuilt} ({columns}) SELECT {columns} FROM {table}")
+            conn.execute(f"DROP TABLE {table}")
+            conn.execute(f"ALTER TABLE {rebuilt} RENAME TO {table}")
+            for row in dependents:
+                conn.execute(row["sql"])
+            orphans = conn.execute(f"PRAGMA foreign_key_check({table})").fetchall()
+            if orphans:
+                logger.warning("%s rows in %s reference missing records", len(orphans), table)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.execute("PRAGMA legacy_alter_table = OFF")
+            conn.execute("PRAGMA foreign_keys = ON")
+
+    def reset_sequences(self, conn: sqlite3.Connection, tables: list[str]) -> None:
+        pass
+
+    def optimize(self) -> None:
+        with self.connect() as conn:
+            conn.execute("ANALYZE")
+            conn.execute("PRAGMA optimize")
+            conn.commit()
+
+    def vacuum(self) -> None:
+        conn = self.connect()
+        try:
+            conn.isolation_level = None
+            conn.execute("VACUUM")
+        finally:
+            conn.close()
+
+    def database_size(self) -> int:
+        with self.connect() as conn:
+            page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+            page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+            return page_count * page_size
+
+    def close(self) -> None:
+        pass
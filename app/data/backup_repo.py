@@ -0,0 +1,72 @@
+import re
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from app import metrics
+from app.config import BACKUP_DIR, BACKUP_MAX_RESTARTS, BACKUP_PAGES_PER_STEP, BACKUP_STEP_SLEEP_MS
+from app.data.backends import current_branch, get_backend, refresh_snapshots
+from app.data.dates import to_iso
+from app.data.db import init_db
+
+BACKUP_NAME = re.compile(r"^easystock-\d{8}T\d{9}Z\.db$")
+
+
+def backup_dir() -> Path:
+    branch = current_branch.get()
+    return BACKUP_DIR / branch if branch else BACKUP_DIR
+
+
+def backup_path(name: str) -> Path | None:
+    if not BACKUP_NAME.match(name):
+        return None
+    path = backup_dir() / name
+    return path if path.exists() else None
+
+
+def describe_backup(path: Path) -> dict:
+    stat = path.stat()
+    return {"name": path.name, "size_bytes": stat.st_size, "created_at": to_iso(int(stat.st_mtime))}
+
+
+def list_backups() -> list[dict]:
+    directory = backup_dir()
+    if not directory.exists():
+        return []
+    paths = sorted((path for path in directory.iterdir() if BACKUP_NAME.match(path.name)), reverse=True)
+    return [describe_backup(path) for path in paths]
+
+
+def create_backup() -> dict:
+    now = datetime.now(timezone.utc)
+    name = f"easystock-{now:%Y%m%dT%H%M%S}{now.microsecond // 1000:03d}Z.db"
+    target = backup_dir() / name
+
+    started = time.perf_counter()
+    restarts = get_backend().snapshot_to(
+        target, BACKUP_PAGES_PER_STEP, BACKUP_STEP_SLEEP_MS / 1000, BACKUP_MAX_RESTARTS
+    )
+    elapsed = time.perf_counter() - started
+
+    metrics.observe("backup_seconds", elapsed)
+    metrics.increment("backup_restarts", restarts)
+    metrics.set_gauge("backup_bytes", target.stat().st_size)
+    return {**describe_backup(target), "elapsed_seconds": round(elapsed, 3)}
+
+
+def prune_backups(keep: int) -> int:
+    removed = 0
+    for backup in list_backups()[keep:]:
+        (backup_dir() / backup["name"]).unlink(missing_ok=True)
+        removed += 1
+    return removed
+
+
+def restore_backup(path: Path) -> dict:
+    started = time.perf_counter()
+    get_backend().restore_from(path)
+    init_db(seed=False)
+    refresh_snapshots()
+    elapsed = time.perf_counter() - started
+    metrics.observe("restore_seconds", elapsed)
+    return {**describe_backup(path), "elapsed_seconds": round(elapsed, 3)}
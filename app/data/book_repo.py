@@ -1,42 +1,63 @@
-from app.data.db import get_connection
+import json
+from app.data.backends import get_backend
+from app.data.db import get_read_connection
+from app.data.copy_repo import insert_copies
+from app.data.errors import VersionConflictError
+from app.data.writer import write
 from app.models.book import BookCreate, BookUpdate
 
-BOOK_SELECT = """
-              SELECT b.id,
-                     b.title,
-                     b.isbn,
-                     g.id AS genre_id,
-                     g.name AS genre,
-                     a.id AS author_id,
-                     a.name AS author,
-                     CASE
-                         WHEN EXISTS (
-                             SELECT 1
-                             FROM loans l
-                             WHERE l.book_id = b.id
-                               AND l.return_date IS NULL
-                         ) THEN 1
-                         ELSE 0
-                     END AS is_borrowed
-              FROM books b
-                       LEFT JOIN book_genres bg ON bg.book_id = b.id
-                       LEFT JOIN genres g ON g.id = bg.genre_id
-                       LEFT JOIN book_authors ba ON ba.book_id = b.id
-                       LEFT JOIN authors a ON a.id = ba.author_id
-              """
+BOOK_COLUMNS = {
+    "id": ("b.id", ()),
+    "title": ("b.title", ()),
+    "isbn": ("b.isbn", ()),
+    "version": ("b.version", ()),
+    "total_copies": ("b.total_copies", ()),
+    "available_copies": ("b.available_copies", ()),
+    "genre_id": ("bg.genre_id", ("bg",)),
+    "genre": ("g.name AS genre", ("bg", "g")),
+    "author_id": ("ba.author_id", ("ba",)),
+    "author": ("a.name AS author", ("ba", "a")),
+}
+BOOK_JOINS = {
+    "bg": "LEFT JOIN book_genres bg ON bg.book_id = b.id",
+    "g": "LEFT JOIN genres g ON g.id = bg.genre_id",
+    "ba": "LEFT JOIN book_authors ba ON ba.book_id = b.id",
+    "a": "LEFT JOIN authors a ON a.id = ba.author_id",
+}
+GENRE_FILTER_JOINS = ("bg", "g")
+
+
+def book_select(fields: tuple[str, ...] | None = None, joins: tuple[str, ...] = ()) -> str:
+    if fields is None:
+        columns = list(BOOK_COLUMNS)
+    else:
+        needed = {"id", "version", *fields}
+        if "is_borrowed" in needed:
+            needed.update(("total_copies", "available_copies"))
+        columns = [column for column in BOOK_COLUMNS if column in needed]
+
+    needed_joins = set(joins)
+    for column in columns:
+        needed_joins.update(BOOK_COLUMNS[column][1])
+    return "SELECT {} FROM books b {}".format(
+        ", ".join(BOOK_COLUMNS[column][0] for column in columns),
+        " ".join(join for alias, join in BOOK_JOINS.items() if alias in needed_joins),
+    )
+
+
+BOOK_SELECT = book_select()
 
 
 def row_to_book(row) -> dict:
-    return {
-        "id": row["id"],
-        "title": row["title"],
-        "isbn": row["isbn"],
-        "genre_id": row["genre_id"],
-        "genre": row["genre"],
-        "author_id": row["author_id"],
-        "author": row["author"],
-        "is_borrowed": bool(row["is_borrowed"]),
-    }
+    book = dict(row)
+    if "total_copies" in book and "available_copies" in book:
+        book["is_borrowed"] = book["total_copies"] > 0 and book["available_copies"] == 0
+    return book
+
+
+def book_row(conn, book_id: int) -> dict | None:
+    row = conn.execute(BOOK_SELECT + " WHERE b.id = ?", (book_id,)).fetchone()
+    return row_to_book(row) if row else None
 
 
 def replace_book_author(conn, book_id: int, author_id: int) -> None:
@@ -55,7 +76,7 @@ def replace_book_genre(conn, book_id: int, genre_id: int) -> None:
 
 
 def create_book(payload: BookCreate) -> dict:
-    with get_connection() as conn:
+    def insert(conn) -> int:
         cursor = conn.execute(
             """
             INSERT INTO books (title, isbn)
@@ -70,23 +91,37 @@ def create_book(payload: BookCreate) -> dict:
         book_id = cursor.lastrowid
         replace_book_author(conn, book_id, payload.author_id)
         replace_book_genre(conn, book_id, payload.genre_id)
-        conn.commit()
+        insert_copies(conn, book_id, payload.copies, payload.branch)
+        return book_id
 
-    return get_book(book_id)
+    return get_book(write(insert))
 
 
-def get_book(book_id: int) -> dict | None:
-    with get_connection() as conn:
+def get_book(book_id: int, fields: tuple[str, ...] | None = None) -> dict | None:
+    with get_read_connection() as conn:
         row = conn.execute(
-            BOOK_SELECT + " WHERE b.id = ?",
+            book_select(fields) + " WHERE b.id = ?",
             (book_id,),
         ).fetchone()
 
     return row_to_book(row) if row else None
 
 
-def list_books(limit: int, offset: int, genre: str | None = None) -> list[dict]:
-    query = BOOK_SELECT
+def get_books(book_ids: list[int], fields: tuple[str, ...] | None = None) -> list[dict]:
+    with get_read_connection() as conn:
+        rows = conn.execute(
+            book_select(fields) + f" WHERE b.id IN ({get_backend().id_list_sql})",
+            (json.dumps(book_ids),),
+        ).fetchall()
+
+    books = {row["id"]: row_to_book(row) for row in rows}
+    return [books[book_id] for book_id in book_ids if book_id in books]
+
+
+def list_books(
+    limit: int, offset: int, genre: str | None = None, fields: tuple[str, ...] | None = None
+) -> list[dict]:
+    query = book_select(fields, GENRE_FILTER_JOINS if genre else ())
     params = []
 
     if genre:
@@ -96,7 +131,7 @@ def list_books(limit: int, offset: int, genre: str | None = None) -> list[dict]:
     query += " ORDER BY b.title LIMIT ? OFFSET ?"
     params.extend([limit, offset])
 
-    with get_connection() as conn:
+    with get_read_connection() as conn:
         rows = conn.execute(query, params).fetchall()
 
     return [row_to_book(r) for r in rows]
@@ -114,13 +149,13 @@ def count_books(genre: str | None = None) -> int:
         query += " WHERE g.name = ?"
         params.append(genre)
 
-    with get_connection() as conn:
+    with get_read_connection() as conn:
         row = conn.execute(query, params).fetchone()
         return row["count"] if row else 0
 
 
 def list_books_all() -> list[dict]:
-    with get_connection() as conn:
+    with get_read_connection() as conn:
         rows = conn.execute(
             BOOK_SELECT + " ORDER BY b.title"
         ).fetchall()
@@ -128,57 +163,57 @@ def list_books_all() -> list[dict]:
     return [row_to_book(r) for r in rows]
 
 
-def update_book(book_id: int, payload: BookUpdate) -> dict | None:
-    existing = get_book(book_id)
-    if not existing:
-        return None
+def search_books(query: str, limit: int) -> list[dict]:
+    with get_read_connection() as conn:
+        rows = conn.execute(
+            BOOK_SELECT + " WHERE LOWER(b.title) LIKE ? OR b.isbn = ? ORDER BY b.title, b.id LIMIT ?",
+            (f"%{query.lower()}%", query, limit),
+        ).fetchall()
+
+    return [row_to_book(r) for r in rows]
 
-    with get_connection() as conn:
-        conn.execute(
-            """
+
+def update_book(
+    book_id: int, payload: BookUpdate, expected_version: int | None = None
+) -> tuple[dict | None, dict | None]:
+    query = """
             UPDATE books
-            SET title        = ?,
-                isbn         = ?
+            SET title        = COALESCE(NULLIF(?, ''), title),
+                isbn         = COALESCE(NULLIF(?, ''), isbn),
+                version      = version + 1
             WHERE id = ?
-            """,
-            (
-                payload.title or existing["title"],
-                payload.isbn or existing["isbn"],
-                book_id,
-            ),
-        )
+            """
+    params = [payload.title, payload.isbn, book_id]
+    if expected_version is not None:
+        query += " AND version = ?"
+        params.append(expected_version)
+
+    def update(conn) -> tuple[dict | None, dict | None]:
+        before = book_row(conn, book_id)
+        cursor = conn.execute(query, params)
+        if cursor.rowcount == 0:
+            if before:
+                raise VersionConflictError("Book was modified by another request.")
+            return None, None
 
         if payload.author_id is not None:
             replace_book_author(conn, book_id, payload.author_id)
 
         if payload.genre_id is not None:
             replace_book_genre(conn, book_id, payload.genre_id)
+        return before, book_row(conn, book_id)
 
-        conn.commit()
-
-    return get_book(book_id)
-
-
-def delete_book(book_id: int) -> bool:
-    with get_connection() as conn:
-        conn.execute("DELETE FROM book_authors WHERE book_id = ?", (book_id,))
-        conn.execute("DELETE FROM book_genres WHERE book_id = ?", (book_id,))
-        conn.execute("DELETE FROM loans WHERE book_id = ?", (book_id,))
-        cursor = conn.execute("DELETE FROM books WHERE id = ?", (book_id,))
-        conn.commit()
-
-    return cursor.rowcount > 0
-
-
-def get_active_loans_count(book_id: int) -> int:
-    with get_connection() as conn:
-        row = conn.execute(
-            "SELECT COUNT(*) AS count FROM loans WHERE book_id = ? AND return_date IS NULL",
-            (book_id,),
-        ).fetchone()
+    return write(update)
 
-    return row["count"] if row else 0
 
+def delete_book(book_id: int) -> dict | None:
+    def delete(conn) -> dict | None:
+        before = book_row(conn, book_id)
+        if before:
+            conn.execute("DELETE FROM books WHERE id = ?", (book_id,))
+        return before
 
-def has_active_loans(book_id: int) -> bool:
-    return get_active_loans_count(book_id) > 0
+    try:
+        return write(delete)
+    except get_backend().integrity_error as exc:
+        raise ValueError("Cannot delete book with active loans") from exc
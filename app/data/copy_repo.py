@@ -0,0 +1,150 @@
+from app.data.db import get_connection, get_read_connection
+from app.data.hold_repo import assign_next_hold
+from app.data.writer import write
+
+CLAIM_ATTEMPTS = 3
+
+
+def copy_barcode(book_id: int, number: int) -> str:
+    return f"BK{book_id}-{number}"
+
+
+def insert_copies(conn, book_id: int, count: int, branch: str) -> None:
+    row = conn.execute("SELECT COUNT(*) AS count FROM copies WHERE book_id = ?", (book_id,)).fetchone()
+    start = row["count"] + 1
+    conn.executemany(
+        "INSERT INTO copies (book_id, barcode, branch, status) VALUES (?, ?, ?, 'available')",
+        [(book_id, copy_barcode(book_id, number), branch) for number in range(start, start + count)],
+    )
+    conn.execute(
+        """
+        UPDATE books
+        SET total_copies     = total_copies + ?,
+            available_copies = available_copies + ?
+        WHERE id = ?
+        """,
+        (count, count, book_id),
+    )
+
+
+def add_copy(book_id: int, barcode: str | None, branch: str) -> tuple[dict, dict | None]:
+    def insert(conn) -> tuple[int, dict | None]:
+        code = barcode
+        if code is None:
+            row = conn.execute("SELECT COUNT(*) AS count FROM copies WHERE book_id = ?", (book_id,)).fetchone()
+            code = copy_barcode(book_id, row["count"] + 1)
+        cursor = conn.execute(
+            "INSERT INTO copies (book_id, barcode, branch, status) VALUES (?, ?, ?, 'available')",
+            (book_id, code, branch),
+        )
+        conn.execute(
+            """
+            UPDATE books
+            SET total_copies     = total_copies + 1,
+                available_copies = available_copies + 1
+            WHERE id = ?
+            """,
+            (book_id,),
+        )
+        return cursor.lastrowid, assign_next_hold(conn, book_id)
+
+    copy_id, hold = write(insert)
+    return get_copy(copy_id), hold
+
+
+def get_copy(copy_id: int) -> dict | None:
+    with get_read_connection() as conn:
+        row = conn.execute(
+            "SELECT id, book_id, barcode, branch, status FROM copies WHERE id = ?",
+            (copy_id,),
+        ).fetchone()
+        return dict(row) if row else None
+
+
+def list_copies(book_id: int) -> list[dict]:
+    with get_read_connection() as conn:
+        rows = conn.execute(
+            """
+            SELECT id, book_id, barcode, branch, status
+            FROM copies
+            WHERE book_id = ? AND status <> 'withdrawn'
+            ORDER BY id
+            """,
+            (book_id,),
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+
+def barcode_exists(barcode: str) -> bool:
+    with get_connection() as conn:
+        row = conn.execute("SELECT 1 FROM copies WHERE barcode = ?", (barcode,)).fetchone()
+        return row is not None
+
+
+def withdraw_copy(copy_id: int) -> dict | None:
+    def withdraw(conn) -> bool:
+        row = conn.execute(
+            """
+            UPDATE copies
+            SET status = 'withdrawn'
+            WHERE id = ? AND status = 'available'
+            RETURNING book_id
+            """,
+            (copy_id,),
+        ).fetchone()
+        if not row:
+            return False
+        conn.execute(
+            """
+            UPDATE books
+            SET total_copies     = total_copies - 1,
+                available_copies = available_copies - 1
+            WHERE id = ?
+            """,
+            (row["book_id"],),
+        )
+        return True
+
+    return get_copy(copy_id) if write(withdraw) else None
+
+
+def claim_copy(conn, book_id: int) -> int | None:
+    for _ in range(CLAIM_ATTEMPTS):
+        row = conn.execute(
+            """
+            SELECT id
+            FROM copies
+            WHERE book_id = ? AND status = 'available'
+            ORDER BY id
+            LIMIT 1
+            """,
+            (book_id,),
+        ).fetchone()
+        if not row:
+            return None
+
+        cursor = conn.execute(
+            "UPDATE copies SET status = 'on_loan' WHERE id = ? AND status = 'available'",
+            (row["id"],),
+        )
+        if cursor.rowcount:
+            conn.execute(
+                "UPDATE books SET available_copies = available_copies - 1 WHERE id = ?",
+                (book_id,),
+            )
+            return row["id"]
+    return None
+
+
+def release_copy(conn, copy_id: int | None, book_id: int) -> None:
+    if copy_id is None:
+        return
+    cursor = conn.execute(
+        "UPDATE copies SET status = 'available' WHERE id = ? AND status = 'on_loan'",
+        (copy_id,),
+    )
+    if cursor.rowcount:
+        conn.execute(
+            "UPDATE books SET available_copies = available_copies + 1 WHERE id = ?",
+            (book_id,),
+        )
@@ -0,0 +1,36 @@
+import time
+from datetime import date, datetime, timedelta, timezone
+
+DAY_SECONDS = 86400
+EPOCH_DAY = date(1970, 1, 1)
+DATE_FIELDS = ("loan_date", "return_date", "registered_at", "due_date", "placed_at", "ready_at", "changed_at")
+
+
+def now_epoch() -> int:
+    return int(time.time())
+
+
+def to_epoch(value: datetime) -> int:
+    return int(value.replace(tzinfo=timezone.utc).timestamp())
+
+
+def to_iso(epoch: int | None) -> str | None:
+    if epoch is None:
+        return None
+    return datetime.fromtimestamp(epoch, timezone.utc).replace(tzinfo=None).isoformat(timespec="seconds")
+
+
+def day_number(epoch: int) -> int:
+    return epoch // DAY_SECONDS
+
+
+def day_iso(day: int) -> str:
+    return (EPOCH_DAY + timedelta(days=day)).isoformat()
+
+
+def with_iso_dates(row) -> dict:
+    record = dict(row)
+    for field in DATE_FIELDS:
+        if field in record:
+            record[field] = to_iso(record[field])
+    return record
@@ -1,86 +1,166 @@
+import argparse
+import logging
 import sqlite3
-from pathlib import Path
-from datetime import datetime, timedelta
-import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from app import metrics
+from app.config import FAN_OUT_WORKERS, SEED
+from app.data.backends import (
+    branch_exists,
+    current_branch,
+    get_backend,
+    get_read_backend,
+    list_branches,
+    read_primary,
+    refresh_snapshots,
+    shard_path,
+)
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_VERSION = 6
+EPOCH_COLUMNS = {
+    "members": [("registered_at", True)],
+    "loans": [("loan_date", True), ("return_date", False)],
+}
+ROLLUP_TABLES = ["daily_book_loans", "daily_genre_loans", "daily_member_loans"]
+VERSIONED_TABLES = ["books", "members", "authors"]
+DELETE_RULES = {
+    "book_authors": {"book_id": ("books", "CASCADE"), "author_id": ("authors", "RESTRICT")},
+    "book_genres": {"book_id": ("books", "CASCADE"), "genre_id": ("genres", "RESTRICT")},
+    "copies": {"book_id": ("books", "CASCADE")},
+    "loans": {"book_id": ("books", "CASCADE"), "member_id": ("members", "CASCADE")},
+    "holds": {"book_id": ("books", "CASCADE"), "member_id": ("members", "CASCADE")},
+}
+ARCHIVE_DELETE_RULES = {"book_id": ("books", "CASCADE"), "member_id": ("members", "CASCADE")}
+CASCADE_INDEXES = {
+    "idx_loans_book": "loans (book_id)",
+    "idx_loans_copy": "loans (copy_id)",
+}
+
+
+def get_connection():
+    return get_backend().connect()
+
+
+def get_read_connection():
+    backend = get_read_backend()
+    primary = get_backend()
+    if backend is primary:
+        metrics.increment("db_reads", target="primary")
+        return primary.connect()
+
+    try:
+        conn = backend.connect()
+    except Exception:
+        metrics.increment("db_read_fallbacks")
+        return primary.connect()
+    metrics.increment("db_reads", target="replica")
+    return conn
 
-DB_PATH = Path(__file__).resolve().parent.parent.parent / "data" / "easystock.db"
 
+@contextmanager
+def read_from_primary():
+    token = read_primary.set(True)
+    try:
+        yield
+    finally:
+        read_primary.reset(token)
 
-def get_connection() -> sqlite3.Connection:
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    conn.execute("PRAGMA foreign_keys = ON")
-    return conn
 
+@contextmanager
+def use_branch(branch: str | None):
+    token = current_branch.set(branch)
+    try:
+        yield
+    finally:
+        current_branch.reset(token)
+
+
+def fan_out(fn, branches: list[str] | None = None) -> dict:
+    branches = list_branches() if branches is None else branches
+    if not branches:
+        return {}
+
+    def run(branch: str):
+        with use_branch(branch):
+            return fn()
 
-def init_db() -> None:
-    DB_PATH.parent.mkdir(parents=True, exist_ok=True)
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=min(len(branches), FAN_OUT_WORKERS)) as pool:
+        results = dict(zip(branches, pool.map(run, branches)))
+    metrics.observe("fan_out_seconds", time.perf_counter() - started)
+    return results
+
+
+def init_db(seed: bool = True) -> None:
+    backend = get_backend()
+    backend.prepare()
 
     with get_connection() as conn:
-        create_tables(conn)
-        migrate_book_genres(conn)
-        seed_if_empty(conn)
+        migrated = stored_schema_version(conn) != SCHEMA_VERSION
+        if migrated:
+            started = time.perf_counter()
+            migrate_schema(conn)
+            logger.info(
+                "Schema migrated to version %s in %.1f ms",
+                SCHEMA_VERSION,
+                (time.perf_counter() - started) * 1000,
+            )
+        seeded = seed and seed_if_empty(conn)
         conn.commit()
 
+    # Replica snapshots taken before a migration or seeding still have the old schema or data.
+    refresh_snapshots(missing_only=not (migrated or seeded))
+
+
+def init_branches(seed: bool = True) -> list[str]:
+    branches = list_branches()
+    for branch in branches:
+        with use_branch(branch):
+            init_db(seed=seed)
+    return branches
+
+
+def provision_branch(branch: str, seed: bool = False) -> bool:
+    path = shard_path(branch)
+    created = not path.exists()
+    with use_branch(branch):
+        init_db(seed=seed)
+    logger.info("Provisioned branch %s at %s", branch, path)
+    return created
+
+
+def stored_schema_version(conn: sqlite3.Connection) -> int | None:
+    if not get_backend().list_tables(conn, "schema_version"):
+        return None
+    row = conn.execute("SELECT MAX(version) AS version FROM schema_version").fetchone()
+    return row["version"]
+
+
+def migrate_schema(conn: sqlite3.Connection) -> None:
+    create_tables(conn)
+    if get_backend().name == "sqlite":
+        migrate_book_genres(conn)
+    migrate_epoch_dates(conn)
+    migrate_versions(conn)
+    migrate_copies(conn)
+    migrate_delete_rules(conn)
+    if get_backend().name == "postgres":
+        migrate_idempotency_epochs(conn)
+    conn.execute("DELETE FROM schema_version")
+    conn.execute("INSERT INTO schema_version (version) VALUES (?)", (SCHEMA_VERSION,))
+    conn.commit()
+
 
 def create_tables(conn: sqlite3.Connection) -> None:
-    conn.executescript(
-        """
-        CREATE TABLE IF NOT EXISTS genres (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL UNIQUE
-        );
-
-        CREATE TABLE IF NOT EXISTS authors (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
-            birth_year INTEGER
-        );
-
-        CREATE TABLE IF NOT EXISTS books (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            title TEXT NOT NULL,
-            isbn TEXT NOT NULL UNIQUE
-        );
-
-        CREATE TABLE IF NOT EXISTS book_authors (
-            book_id INTEGER NOT NULL,
-            author_id INTEGER NOT NULL,
-            PRIMARY KEY (book_id, author_id),
-            FOREIGN KEY (book_id) REFERENCES books (id),
-            FOREIGN KEY (author_id) REFERENCES authors (id)
-        );
-
-        CREATE TABLE IF NOT EXISTS book_genres (
-            book_id INTEGER NOT NULL,
-            genre_id INTEGER NOT NULL,
-            PRIMARY KEY (book_id, genre_id),
-            FOREIGN KEY (book_id) REFERENCES books (id),
-            FOREIGN KEY (genre_id) REFERENCES genres (id)
-        );
-
-        CREATE TABLE IF NOT EXISTS members (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
-            email TEXT NOT NULL UNIQUE,
-            registered_at TEXT NOT NULL
-        );
-
-        CREATE TABLE IF NOT EXISTS loans (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            book_id INTEGER NOT NULL,
-            member_id INTEGER NOT NULL,
-            loan_date TEXT NOT NULL,
-            return_date TEXT,
-            FOREIGN KEY (book_id) REFERENCES books (id),
-            FOREIGN KEY (member_id) REFERENCES members (id)
-        );
-        """
-    )
+    get_backend().create_schema(conn)
 
 
 def table_empty(conn: sqlite3.Connection, table: str) -> bool:
-    return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0] == 0
+    return conn.execute(f"SELECT 1 FROM {table} LIMIT 1").fetchone() is None
 
 
 def table_has_column(conn: sqlite3.Connection, table: str, column: str) -> bool:
@@ -106,195 +186,211 @@ def migrate_book_genres(conn: sqlite3.Connection) -> None:
     )
 
 
-def seed_if_empty(conn: sqlite3.Connection) -> None:
-    if table_empty(conn, "genres"):
-        seed_genres(conn)
-
-    if table_empty(conn, "authors"):
-        seed_authors(conn)
-
-    if table_empty(conn, "books"):
-        seed_books(conn)
-        seed_book_authors(conn)
-        seed_book_genres(conn)
-
-    if table_empty(conn, "members"):
-        seed_members(conn)
+def migrate_epoch_dates(conn: sqlite3.Connection) -> None:
+    backend = get_backend()
+    tables = [("members", EPOCH_COLUMNS["members"])]
+    tables += [(table, EPOCH_COLUMNS["loans"]) for table in backend.list_tables(conn, "loans")]
 
-    if table_empty(conn, "loans"):
-        seed_loans(conn)
-
-
-def seed_genres(conn: sqlite3.Connection) -> None:
-    genres = [
-        ("Sci-Fi",),
-        ("Fantasy",),
-        ("Dystopian",),
-        ("Classic",),
-        ("Horror",),
-        ("Mystery",),
-    ]
-    conn.executemany("INSERT INTO genres (name) VALUES (?)", genres)
-
-
-def seed_authors(conn: sqlite3.Connection) -> None:
-    authors = [
-        ("Frank Herbert", 1920),
-        ("J.R.R. Tolkien", 1892),
-        ("George Orwell", 1903),
-        ("Jane Austen", 1775),
-        ("Andy Weir", 1972),
-        ("Harper Lee", 1926),
-        ("Aldous Huxley", 1894),
-        ("Ursula K. Le Guin", 1929),
-        ("Isaac Asimov", 1920),
-        ("Philip K. Dick", 1928),
-        ("Stephen King", 1947),
-        ("Neil Gaiman", 1960),
-        ("Brandon Sanderson", 1975),
-        ("Agatha Christie", 1890),
+    pending = [
+        (table, column, not_null)
+        for table, columns in tables
+        for column, not_null in columns
+        if backend.column_type(conn, table, column) == "text"
     ]
+    rollups_text = backend.column_type(conn, ROLLUP_TABLES[0], "day") == "text"
+    if not pending and not rollups_text:
+        return
 
-    conn.executemany(
-        "INSERT INTO authors (name, birth_year) VALUES (?, ?)",
-        authors,
-    )
+    for table, column, not_null in pending:
+        backend.convert_to_epoch(conn, table, column, not_null)
+    if rollups_text:
+        for table in ROLLUP_TABLES:
+            conn.execute(f"DROP TABLE {table}")
+    create_tables(conn)
+    conn.commit()
 
 
-def seed_books(conn: sqlite3.Connection) -> None:
-    books = [
-        ("Dune", "9780441172719", "Sci-Fi"),
-        ("The Hobbit", "9780345339683", "Fantasy"),
-        ("1984", "9780451524935", "Dystopian"),
-        ("Pride and Prejudice", "9780141439518", "Classic"),
-        ("The Martian", "9780553418026", "Sci-Fi"),
-        ("To Kill a Mockingbird", "9780061120084", "Classic"),
-        ("Brave New World", "9780060850524", "Dystopian"),
-        ("Foundation", "9780553293357", "Sci-Fi"),
-        ("The Shining", "9780307743657", "Horror"),
-        ("Mistborn", "9780765350381", "Fantasy"),
-        ("Murder on the Orient Express", "9780062693662", "Mystery"),
-    ]
+def migrate_idempotency_epochs(conn: sqlite3.Connection) -> None:
+    backend = get_backend()
+    for column in ("created_at", "expires_at"):
+        if backend.column_type(conn, "idempotency_keys", column) == "integer":
+            conn.execute(f"ALTER TABLE idempotency_keys ALTER COLUMN {column} TYPE BIGINT")
+    conn.commit()
 
-    rows = [(title, isbn) for title, isbn, _genre in books]
-    conn.executemany("INSERT INTO books (title, isbn) VALUES (?, ?)", rows)
-
-
-def seed_book_genres(conn: sqlite3.Connection) -> None:
-    books = [
-        ("Dune", "Sci-Fi"),
-        ("The Hobbit", "Fantasy"),
-        ("1984", "Dystopian"),
-        ("Pride and Prejudice", "Classic"),
-        ("The Martian", "Sci-Fi"),
-        ("To Kill a Mockingbird", "Classic"),
-        ("Brave New World", "Dystopian"),
-        ("Foundation", "Sci-Fi"),
-        ("The Shining", "Horror"),
-        ("Mistborn", "Fantasy"),
-        ("Murder on the Orient Express", "Mystery"),
-    ]
 
-    genre_map = {
-        row["name"]: row["id"]
-        for row in conn.execute("SELECT id, name FROM genres")
-    }
-    book_map = {
-        row["title"]: row["id"]
-        for row in conn.execute("SELECT id, title FROM books")
-    }
+def migrate_versions(conn: sqlite3.Connection) -> None:
+    backend = get_backend()
+    for table in VERSIONED_TABLES:
+        if backend.column_type(conn, table, "version") is None:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN version INTEGER NOT NULL DEFAULT 1")
+    conn.commit()
 
-    conn.executemany(
-        "INSERT INTO book_genres (book_id, genre_id) VALUES (?, ?)",
-        [(book_map[title], genre_map[genre]) for title, genre in books],
-    )
 
+def migrate_copies(conn: sqlite3.Connection) -> None:
+    backend = get_backend()
+    if backend.column_type(conn, "loans", "copy_id") is None:
+        conn.execute("ALTER TABLE loans ADD COLUMN copy_id INTEGER REFERENCES copies (id)")
+    if backend.column_type(conn, "books", "total_copies") is not None:
+        conn.commit()
+        return
 
-def seed_book_authors(conn: sqlite3.Connection) -> None:
-    authors = {r["name"]: r["id"] for r in conn.execute("SELECT * FROM authors")}
-    books = {r["title"]: r["id"] for r in conn.execute("SELECT * FROM books")}
-
-    relations = [
-        ("Dune", "Frank Herbert"),
-        ("The Hobbit", "J.R.R. Tolkien"),
-        ("1984", "George Orwell"),
-        ("Pride and Prejudice", "Jane Austen"),
-        ("The Martian", "Andy Weir"),
-        ("To Kill a Mockingbird", "Harper Lee"),
-        ("Brave New World", "Aldous Huxley"),
-        ("Foundation", "Isaac Asimov"),
-        ("The Shining", "Stephen King"),
-        ("Mistborn", "Brandon Sanderson"),
-        ("Murder on the Orient Express", "Agatha Christie"),
-    ]
-
+    conn.execute("ALTER TABLE books ADD COLUMN total_copies INTEGER NOT NULL DEFAULT 0")
+    conn.execute("ALTER TABLE books ADD COLUMN available_copies INTEGER NOT NULL DEFAULT 0")
+    conn.execute(
+        """
+        INSERT INTO copies (book_id, barcode, branch, status)
+        SELECT b.id, 'BK' || b.id || '-1', 'main', 'available'
+        FROM books b
+        WHERE NOT EXISTS (SELECT 1 FROM copies c WHERE c.book_id = b.id)
+        """
+    )
+    # A book lent out several times at once needs a copy for each active loan.
+    extra = conn.execute(
+        """
+        SELECT l.book_id, COUNT(*) AS loans,
+               (SELECT COUNT(*) FROM copies c WHERE c.book_id = l.book_id) AS copies
+        FROM loans l
+        WHERE l.return_date IS NULL AND l.copy_id IS NULL
+        GROUP BY l.book_id
+        HAVING COUNT(*) > (SELECT COUNT(*) FROM copies c WHERE c.book_id = l.book_id)
+        """
+    ).fetchall()
     conn.executemany(
-        "INSERT INTO book_authors (book_id, author_id) VALUES (?, ?)",
-        [(books[b], authors[a]) for b, a in relations],
+        "INSERT INTO copies (book_id, barcode, branch, status) VALUES (?, ?, 'main', 'available')",
+        [
+            (row["book_id"], f"BK{row['book_id']}-{number}")
+            for row in extra
+            for number in range(row["copies"] + 1, row["loans"] + 1)
+        ],
     )
 
-
-def seed_members(conn: sqlite3.Connection) -> None:
-    base_date = datetime.utcnow() - timedelta(days=90)
-
-    members = [
-        ("Alex Morgan", "alex@example.com"),
-        ("Priya Patel", "priya@example.com"),
-        ("Diego Ramirez", "diego@example.com"),
-        ("Elena Popescu", "elena@example.com"),
-        ("Andrei Ionescu", "andrei@example.com"),
-    ]
-
-    rows = []
-    for name, email in members:
-        registered_at = base_date + timedelta(days=random.randint(0, 60))
-        rows.append((name, email, registered_at.isoformat(timespec="seconds")))
-
+    copies: dict[int, list[int]] = {}
+    for row in conn.execute(
+        """
+        SELECT id, book_id
+        FROM copies
+        WHERE book_id IN (SELECT book_id FROM loans WHERE return_date IS NULL AND copy_id IS NULL)
+        ORDER BY book_id, id
+        """
+    ):
+        copies.setdefault(row["book_id"], []).append(row["id"])
+    active = conn.execute(
+        "SELECT id, book_id FROM loans WHERE return_date IS NULL AND copy_id IS NULL ORDER BY book_id, id"
+    ).fetchall()
     conn.executemany(
-        "INSERT INTO members (name, email, registered_at) VALUES (?, ?, ?)",
-        rows,
+        "UPDATE loans SET copy_id = ? WHERE id = ?",
+        [(copies[row["book_id"]].pop(0), row["id"]) for row in active],
     )
+    conn.execute(
+        """
+        UPDATE copies
+        SET status = 'on_loan'
+        WHERE id IN (SELECT copy_id FROM loans WHERE return_date IS NULL)
+        """
+    )
+    conn.execute(
+        """
+        UPDATE books
+        SET total_copies     = (SELECT COUNT(*) FROM copies c WHERE c.book_id = books.id),
+            available_copies = (SELECT COUNT(*) FROM copies c WHERE c.book_id = books.id AND c.status = 'available')
+        """
+    )
+    conn.commit()
 
 
-def seed_loans(conn: sqlite3.Connection) -> None:
-    members = conn.execute("SELECT * FROM members").fetchall()
-    books = conn.execute("SELECT * FROM books").fetchall()
-    loans = []
-
-    for book in books:
-        member = random.choice(members)
-        registered_at = datetime.fromisoformat(member["registered_at"])
-        history_count = random.randint(1, 3)
-
-        last_loan_date = registered_at
-
-        for i in range(history_count):
-            loan_date = last_loan_date + timedelta(days=random.randint(10, 40))
-            is_active = i == history_count - 1 and random.choice([True, False])
-            is_overdue = is_active and random.choice([True, False])
-
-            if is_active:
-                if is_overdue:
-                    loan_date = datetime.utcnow() - timedelta(days=random.randint(15, 40))
-                return_date = None
-            else:
-                return_date = loan_date + timedelta(days=random.randint(7, 30))
-
-            loans.append(
-                (
-                    book["id"],
-                    member["id"],
-                    loan_date.isoformat(timespec="seconds"),
-                    return_date.isoformat(timespec="seconds") if return_date else None,
-                )
-            )
-
-            last_loan_date = loan_date
+def migrate_delete_rules(conn: sqlite3.Connection) -> None:
+    from app.data.archive_repo import ARCHIVE_PREFIX, archive_table_sql, ensure_archive_table
 
-    conn.executemany(
-        """
-        INSERT INTO loans (book_id, member_id, loan_date, return_date)
-        VALUES (?, ?, ?, ?)
-        """,
-        loans,
-    )
+    backend = get_backend()
+    tables = [(table, rules, None) for table, rules in DELETE_RULES.items()]
+    tables += [
+        (table, ARCHIVE_DELETE_RULES, archive_table_sql(table))
+        for table in backend.list_tables(conn, ARCHIVE_PREFIX)
+    ]
+    for table, rules, create_sql in tables:
+        current = backend.delete_rules(conn, table)
+        if any(current.get(column) != action for column, (_, action) in rules.items()):
+            backend.set_delete_rules(conn, table, rules, create_sql)
+            if table.startswith(ARCHIVE_PREFIX):
+                ensure_archive_table(conn, table.removeprefix(ARCHIVE_PREFIX))
+            logger.info("Added delete rules to %s", table)
+    for name, target in CASCADE_INDEXES.items():
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {target}")
+    conn.commit()
+
+
+def seed_if_empty(conn: sqlite3.Connection) -> bool:
+    from app.data.generator import DEFAULT_SIZES, GENERATED_TABLES, generate
+
+    if not all(table_empty(conn, table) for table in GENERATED_TABLES):
+        return False
+    generate(conn, **DEFAULT_SIZES, seed=SEED)
+    get_backend().reset_sequences(conn, GENERATED_TABLES)
+    return True
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Prepare the EasyStock database and branch shards.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    migrate = commands.add_parser("migrate", help="create/upgrade the schema of the main database and every branch")
+    migrate.add_argument("--branch", default=None, help="only migrate this branch shard")
+    seed = commands.add_parser("seed", help="migrate, then fill an empty database with sample data")
+    seed.add_argument("--branch", default=None, help="seed this branch shard instead of the main database")
+    provision = commands.add_parser("provision", help="create and migrate a branch shard")
+    provision.add_argument("branch")
+    provision.add_argument("--seed", action="store_true", help="also fill the new shard with sample data")
+    commands.add_parser("branches", help="list the provisioned branch shards")
+    backup = commands.add_parser("backup", help="take an online backup of the database")
+    backup.add_argument("--branch", default=None, help="back up this branch shard instead of the main database")
+    backups = commands.add_parser("backups", help="list the stored backups")
+    backups.add_argument("--branch", default=None)
+    restore = commands.add_parser("restore", help="replace the database contents with a stored backup")
+    restore.add_argument("name")
+    restore.add_argument("--branch", default=None)
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == "branches":
+            for branch in list_branches():
+                print(f"{branch}\t{shard_path(branch)}")
+            return
+
+        if args.command == "provision":
+            created = provision_branch(args.branch, seed=args.seed)
+            print(f"{'Created' if created else 'Migrated'} branch {args.branch} at {shard_path(args.branch)}.")
+            return
+
+        if args.branch is not None and not branch_exists(args.branch):
+            parser.exit(1, f"error: unknown branch {args.branch}\n")
+
+        if args.command in ("backup", "backups", "restore"):
+            from app.service.backup_service import BackupService
+
+            with use_branch(args.branch):
+                if args.command == "backups":
+                    for backup in BackupService().list_backups():
+                        print(f"{backup['name']}\t{backup['size_bytes']}\t{backup['created_at']}")
+                elif args.command == "backup":
+                    backup = BackupService().create_backup()
+                    print(f"Backed up to {backup['name']} ({backup['size_bytes']} bytes) in {backup['elapsed_seconds']}s.")
+                else:
+                    backup = BackupService().restore_backup(args.name)
+                    print(f"Restored from {backup['name']} in {backup['elapsed_seconds']}s.")
+            return
+
+        with use_branch(args.branch):
+            init_db(seed=False)
+            if args.command == "seed":
+                with get_connection() as conn:
+                    seeded = seed_if_empty(conn)
+                    conn.commit()
+                print("Seeded the database." if seeded else "Database already has data; nothing to seed.")
+        if args.command == "migrate" and args.branch is None:
+            init_branches(seed=False)
+    except (RuntimeError, ValueError) as exc:
+        parser.exit(1, f"error: {exc}\n")
+    print(f"Schema version {SCHEMA_VERSION}.")
+
+
+if __name__ == "__main__":
+    main()
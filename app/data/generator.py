@@ -0,0 +1,272 @@
+import argparse
+import random
+import sqlite3
+import time
+from datetime import datetime
+from itertools import accumulate, islice
+from pathlib import Path
+
+from app.data.backends import get_backend
+from app.data.backends.sqlite import SQLiteBackend
+from app.data.copy_repo import copy_barcode
+from app.data.dates import to_epoch
+from app.data.rollups import rebuild_rollups
+
+GENRES = [
+    "Sci-Fi", "Fantasy", "Dystopian", "Classic", "Horror", "Mystery",
+    "Romance", "Thriller", "History", "Biography", "Poetry", "Travel",
+]
+
+FIRST_NAMES = [
+    "Alex", "Priya", "Diego", "Elena", "Andrei", "Maya", "Liam", "Sofia", "Noah", "Amara",
+    "Ioana", "Kenji", "Fatima", "Lucas", "Chloe", "Mateo", "Aisha", "Jonas", "Zara", "Omar",
+    "Hannah", "Ravi", "Clara", "Tomas", "Yuki", "Leila", "Felix", "Nina", "Samuel", "Ana",
+]
+
+LAST_NAMES = [
+    "Morgan", "Patel", "Ramirez", "Popescu", "Ionescu", "Nguyen", "Schmidt", "Rossi", "Kowalski", "Okafor",
+    "Tanaka", "Haddad", "Silva", "Dubois", "Novak", "Johansson", "Costa", "Murphy", "Kim", "Garcia",
+    "Moreau", "Fischer", "Ahmed", "Larsen", "Petrov", "Santos", "Weber", "Cohen", "Mendes", "Radu",
+]
+
+TITLE_ADJECTIVES = [
+    "Silent", "Hidden", "Broken", "Golden", "Last", "Forgotten", "Crimson", "Distant", "Hollow", "Winter",
+    "Burning", "Endless", "Quiet", "Shattered", "Wandering", "Secret", "Iron", "Glass", "Midnight", "Lost",
+]
+
+TITLE_NOUNS = [
+    "Harbor", "Kingdom", "Garden", "Empire", "Signal", "River", "Orchard", "Station", "Library", "Crown",
+    "Voyage", "Archive", "Island", "Machine", "Forest", "Tower", "Letter", "Storm", "Frontier", "Mirror",
+]
+
+DEFAULT_SIZES = {"authors": 14, "books": 40, "members": 12, "loans": 150}
+GENERATED_TABLES = ["genres", "authors", "books", "copies", "book_authors", "book_genres", "members", "loans"]
+
+
+def zipf_cum_weights(count: int, exponent: float) -> list[float]:
+    return list(accumulate(1 / (rank + 1) ** exponent for rank in range(count)))
+
+
+def isbn13(sequence: int) -> str:
+    body = f"978{sequence:09d}"
+    total = sum(int(d) * (1 if i % 2 == 0 else 3) for i, d in enumerate(body))
+    return body + str((10 - total % 10) % 10)
+
+
+def insert_batches(conn, sql: str, rows, batch_size: int) -> int:
+    inserted = 0
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            return inserted
+        conn.executemany(sql, batch)
+        conn.commit()
+        inserted += len(batch)
+
+
+def generate(
+    conn: sqlite3.Connection,
+    authors: int,
+    books: int,
+    members: int,
+    loans: int,
+    seed: int | None = None,
+    now: datetime | None = None,
+    active_fraction: float = 0.05,
+    overdue_fraction: float = 0.3,
+    history_days: int = 3 * 365,
+    batch_size: int = 50_000,
+) -> dict[str, int]:
+    for table in GENERATED_TABLES:
+        if conn.execute(f"SELECT 1 FROM {table} LIMIT 1").fetchone():
+            raise ValueError(f"Table {table} is not empty.")
+    if books and not authors:
+        raise ValueError("Books need at least one author.")
+    if loans and not (books and members):
+        raise ValueError("Loans need at least one book and one member.")
+
+    rng = random.Random(seed)
+    now = to_epoch(now or datetime.utcnow())
+    history_start = now - history_days * 86400
+    counts = {}
+
+    counts["genres"] = insert_batches(
+        conn,
+        "INSERT INTO genres (id, name) VALUES (?, ?)",
+        ((i + 1, name) for i, name in enumerate(GENRES)),
+        batch_size,
+    )
+
+    counts["authors"] = insert_batches(
+        conn,
+        "INSERT INTO authors (id, name, birth_year) VALUES (?, ?, ?)",
+        (
+            (i, f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}", rng.randint(1850, 1995))
+            for i in range(1, authors + 1)
+        ),
+        batch_size,
+    )
+
+    counts["books"] = insert_batches(
+        conn,
+        "INSERT INTO books (id, title, isbn, total_copies, available_copies) VALUES (?, ?, ?, 1, 1)",
+        (
+            (i, f"The {rng.choice(TITLE_ADJECTIVES)} {rng.choice(TITLE_NOUNS)}", isbn13(i))
+            for i in range(1, books + 1)
+        ),
+        batch_size,
+    )
+
+    counts["copies"] = insert_batches(
+        conn,
+        "INSERT INTO copies (id, book_id, barcode, branch, status) VALUES (?, ?, ?, 'main', 'available')",
+        ((i, i, copy_barcode(i, 1)) for i in range(1, books + 1)),
+        batch_size,
+    )
+
+    author_ids = range(1, authors + 1)
+    author_weights = zipf_cum_weights(authors, 0.9)
+    counts["book_authors"] = insert_batches(
+        conn,
+        "INSERT INTO book_authors (book_id, author_id) VALUES (?, ?)",
+        ((i, rng.choices(author_ids, cum_weights=author_weights)[0]) for i in range(1, books + 1)),
+        batch_size,
+    )
+
+    genre_ids = range(1, len(GENRES) + 1)
+    genre_weights = zipf_cum_weights(len(GENRES), 0.7)
+    counts["book_genres"] = insert_batches(
+        conn,
+        "INSERT INTO book_genres (book_id, genre_id) VALUES (?, ?)",
+        ((i, rng.choices(genre_ids, cum_weights=genre_weights)[0]) for i in range(1, books + 1)),
+        batch_size,
+    )
+
+    def member_rows():
+        for i in range(1, members + 1):
+            first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+            yield (
+                i,
+                f"{first} {last}",
+                f"{first.lower()}.{last.lower()}{i}@example.com",
+                history_start - rng.randint(0, 365 * 86400),
+            )
+
+    counts["members"] = insert_batches(
+        conn,
+        "INSERT INTO members (id, name, email, registered_at) VALUES (?, ?, ?, ?)",
+        member_rows(),
+        batch_size,
+    )
+
+    popular_books = list(range(1, books + 1))
+    rng.shuffle(popular_books)
+    book_weights = zipf_cum_weights(books, 1.1)
+    active_members = list(range(1, members + 1))
+    rng.shuffle(active_members)
+    member_weights = zipf_cum_weights(members, 0.8)
+
+    active_count = min(int(loans * active_fraction), books)
+    returned_count = loans - active_count
+    history_seconds = max(history_days - 45, 1) * 86400
+
+    def returned_rows():
+        step = history_seconds / max(returned_count, 1)
+        for start in range(0, returned_count, batch_size):
+            size = min(batch_size, returned_count - start)
+            book_ids = rng.choices(popular_books, cum_weights=book_weights, k=size)
+            member_ids = rng.choices(active_members, cum_weights=member_weights, k=size)
+            for offset in range(size):
+                loan_date = history_start + int((start + offset + rng.random()) * step)
+                yield (
+                    book_ids[offset],
+                    member_ids[offset],
+                    loan_date,
+                    loan_date + int(rng.triangular(3, 30, 14) * 86400),
+                    book_ids[offset],
+                )
+
+    def active_rows():
+        for book_id in sorted(rng.sample(popular_books, active_count)):
+            days_out = rng.uniform(15, 90) if rng.random() < overdue_fraction else rng.uniform(0, 14)
+            yield (
+                book_id,
+                rng.choices(active_members, cum_weights=member_weights)[0],
+                now - int(days_out * 86400),
+                None,
+                book_id,
+            )
+
+    loan_sql = "INSERT INTO loans (book_id, member_id, loan_date, return_date, copy_id) VALUES (?, ?, ?, ?, ?)"
+    counts["loans"] = insert_batches(conn, loan_sql, returned_rows(), batch_size)
+    counts["loans"] += insert_batches(conn, loan_sql, active_rows(), batch_size)
+    conn.execute(
+        "UPDATE copies SET status = 'on_loan' WHERE id IN (SELECT copy_id FROM loans WHERE return_date IS NULL)"
+    )
+    conn.execute(
+        "UPDATE books SET available_copies = 0 WHERE id IN (SELECT book_id FROM loans WHERE return_date IS NULL)"
+    )
+    rebuild_rollups(conn, ["loans"])
+    conn.commit()
+
+    return counts
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Generate a synthetic EasyStock dataset.")
+    parser.add_argument("--db", default=None,
+                        help="SQLite file to fill (default: the configured EASYSTOCK_DB_BACKEND database)")
+    parser.add_argument("--authors", type=int, default=DEFAULT_SIZES["authors"])
+    parser.add_argument("--books", type=int, default=DEFAULT_SIZES["books"])
+    parser.add_argument("--members", type=int, default=DEFAULT_SIZES["members"])
+    parser.add_argument("--loans", type=int, default=DEFAULT_SIZES["loans"])
+    parser.add_argument("--seed", type=int, default=None, help="random seed for a reproducible dataset")
+    parser.add_argument("--now", type=datetime.fromisoformat, default=None,
+                        help="reference time (ISO); fix it together with --seed for identical output")
+    parser.add_argument("--active-fraction", type=float, default=0.05)
+    parser.add_argument("--overdue-fraction", type=float, default=0.3)
+    parser.add_argument("--history-days", type=int, default=3 * 365)
+    parser.add_argument("--batch-size", type=int, default=50_000)
+    args = parser.parse_args(argv)
+
+    backend = SQLiteBackend(Path(args.db)) if args.db else get_backend()
+    backend.prepare()
+    conn = backend.connect()
+    if backend.name == "sqlite":
+        conn.execute("PRAGMA synchronous = OFF")
+        conn.execute("PRAGMA journal_mode = MEMORY")
+        conn.execute("PRAGMA cache_size = -200000")
+
+    started = time.perf_counter()
+    try:
+        backend.create_schema(conn)
+        counts = generate(
+            conn,
+            authors=args.authors,
+            books=args.books,
+            members=args.members,
+            loans=args.loans,
+            seed=args.seed,
+            now=args.now,
+            active_fraction=args.active_fraction,
+            overdue_fraction=args.overdue_fraction,
+            history_days=args.history_days,
+            batch_size=args.batch_size,
+        )
+        backend.reset_sequences(conn, GENERATED_TABLES)
+        conn.commit()
+    except ValueError as exc:
+        parser.exit(1, f"error: {exc}\n")
+    finally:
+        conn.close()
+
+    elapsed = time.perf_counter() - started
+    total = sum(counts.values())
+    for table, count in counts.items():
+        print(f"{table}: {count}")
+    print(f"Inserted {total} rows in {elapsed:.1f}s ({total / max(elapsed, 1e-9):,.0f} rows/s)")
+
+
+if __name__ == "__main__":
+    main()
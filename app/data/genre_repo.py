@@ -1,18 +1,21 @@
-from app.data.db import get_connection
+from app.data.backends import get_backend
+from app.data.db import get_read_connection
+from app.data.writer import write
 
 
 def create_genre(name: str) -> dict:
-    with get_connection() as conn:
+    def insert(conn) -> int:
         cursor = conn.execute(
             "INSERT INTO genres (name) VALUES (?)",
             (name,),
         )
-        conn.commit()
-        return get_genre(cursor.lastrowid)
+        return cursor.lastrowid
+
+    return get_genre(write(insert))
 
 
 def list_genres(limit: int, offset: int) -> list[dict]:
-    with get_connection() as conn:
+    with get_read_connection() as conn:
         rows = conn.execute(
             "SELECT id, name FROM genres ORDER BY name LIMIT ? OFFSET ?",
             (limit, offset),
@@ -21,44 +24,46 @@ def list_genres(limit: int, offset: int) -> list[dict]:
 
 
 def count_genres() -> int:
-    with get_connection() as conn:
+    with get_read_connection() as conn:
         row = conn.execute("SELECT COUNT(*) AS count FROM genres").fetchone()
         return row["count"] if row else 0
 
 
+def genre_row(conn, genre_id: int) -> dict | None:
+    row = conn.execute(
+        "SELECT id, name FROM genres WHERE id = ?",
+        (genre_id,),
+    ).fetchone()
+    return dict(row) if row else None
+
+
 def get_genre(genre_id: int) -> dict | None:
-    with get_connection() as conn:
-        row = conn.execute(
-            "SELECT id, name FROM genres WHERE id = ?",
-            (genre_id,),
-        ).fetchone()
-        return dict(row) if row else None
+    with get_read_connection() as conn:
+        return genre_row(conn, genre_id)
 
 
-def update_genre(genre_id: int, name: str) -> dict | None:
-    with get_connection() as conn:
-        cursor = conn.execute(
+def update_genre(genre_id: int, name: str) -> tuple[dict | None, dict | None]:
+    def update(conn) -> tuple[dict | None, dict | None]:
+        before = genre_row(conn, genre_id)
+        if not before:
+            return None, None
+        conn.execute(
             "UPDATE genres SET name = ? WHERE id = ?",
             (name, genre_id),
         )
-        conn.commit()
-        if cursor.rowcount == 0:
-            return None
-        return get_genre(genre_id)
-
-
-def delete_genre(genre_id: int) -> bool:
-    with get_connection() as conn:
-        conn.execute("DELETE FROM book_genres WHERE genre_id = ?", (genre_id,))
-        cursor = conn.execute("DELETE FROM genres WHERE id = ?", (genre_id,))
-        conn.commit()
-        return cursor.rowcount > 0
-
-
-def has_books(genre_id: int) -> bool:
-    with get_connection() as conn:
-        row = conn.execute(
-            "SELECT 1 FROM book_genres WHERE genre_id = ? LIMIT 1",
-            (genre_id,),
-        ).fetchone()
-        return row is not None
+        return before, genre_row(conn, genre_id)
+
+    return write(update)
+
+
+def delete_genre(genre_id: int) -> dict | None:
+    def delete(conn) -> dict | None:
+        before = genre_row(conn, genre_id)
+        if before:
+            conn.execute("DELETE FROM genres WHERE id = ?", (genre_id,))
+        return before
+
+    try:
+        return write(delete)
+    except get_backend().integrity_error as exc:
+        raise ValueError("Cannot delete genre with existing books") from exc
@@ -0,0 +1,134 @@
+from app.data.db import get_connection, get_read_connection
+from app.data.dates import now_epoch, with_iso_dates
+from app.data.writer import write
+
+HOLD_SELECT = """
+    SELECT h.id, h.book_id, h.member_id, h.status, h.placed_at, h.ready_at,
+           b.title AS book_title,
+           m.name AS member_name,
+           m.email AS member_email
+    FROM holds h
+    JOIN books b ON b.id = h.book_id
+    JOIN members m ON m.id = h.member_id
+"""
+
+
+def create_hold(book_id: int, member_id: int) -> dict:
+    def insert(conn) -> int:
+        cursor = conn.execute(
+            "INSERT INTO holds (book_id, member_id, status, placed_at) VALUES (?, ?, 'waiting', ?)",
+            (book_id, member_id, now_epoch()),
+        )
+        return cursor.lastrowid
+
+    return get_hold(write(insert))
+
+
+def get_hold(hold_id: int) -> dict | None:
+    with get_read_connection() as conn:
+        row = conn.execute(HOLD_SELECT + " WHERE h.id = ?", (hold_id,)).fetchone()
+        return with_iso_dates(row) if row else None
+
+
+def fetch_hold(conn, hold_id: int) -> dict:
+    return with_iso_dates(conn.execute(HOLD_SELECT + " WHERE h.id = ?", (hold_id,)).fetchone())
+
+
+def list_book_holds(book_id: int) -> list[dict]:
+    with get_read_connection() as conn:
+        rows = conn.execute(
+            HOLD_SELECT
+            + """
+            WHERE h.book_id = ? AND h.status IN ('waiting', 'ready')
+            ORDER BY CASE h.status WHEN 'ready' THEN 0 ELSE 1 END, h.id
+            """,
+            (book_id,),
+        ).fetchall()
+
+    holds = [with_iso_dates(row) for row in rows]
+    position = 0
+    for hold in holds:
+        if hold["status"] == "waiting":
+            position += 1
+            hold["position"] = position
+        else:
+            hold["position"] = None
+    return holds
+
+
+def has_open_hold(book_id: int, member_id: int) -> bool:
+    with get_connection() as conn:
+        row = conn.execute(
+            """
+            SELECT 1
+            FROM holds
+            WHERE book_id = ? AND member_id = ? AND status IN ('waiting', 'ready')
+            LIMIT 1
+            """,
+            (book_id, member_id),
+        ).fetchone()
+        return row is not None
+
+
+def reserved_copies(book_id: int, member_id: int) -> tuple[int, int]:
+    with get_connection() as conn:
+        row = conn.execute(
+            """
+            SELECT b.available_copies,
+                   (SELECT COUNT(*)
+                    FROM holds h
+                    WHERE h.book_id = b.id AND h.member_id != ? AND h.status = 'ready') AS reserved
+            FROM books b
+            WHERE b.id = ?
+            """,
+            (member_id, book_id),
+        ).fetchone()
+        return (row["available_copies"], row["reserved"]) if row else (0, 0)
+
+
+def assign_next_hold(conn, book_id: int) -> dict | None:
+    row = conn.execute(
+        """
+        SELECT id
+        FROM holds
+        WHERE book_id = ? AND status = 'waiting'
+        ORDER BY id
+        LIMIT 1
+        """,
+        (book_id,),
+    ).fetchone()
+    if not row:
+        return None
+
+    conn.execute(
+        "UPDATE holds SET status = 'ready', ready_at = ? WHERE id = ?",
+        (now_epoch(), row["id"]),
+    )
+    return fetch_hold(conn, row["id"])
+
+
+def fulfil_hold(conn, book_id: int, member_id: int) -> None:
+    conn.execute(
+        """
+        UPDATE holds
+        SET status = 'fulfilled'
+        WHERE book_id = ? AND member_id = ? AND status IN ('waiting', 'ready')
+        """,
+        (book_id, member_id),
+    )
+
+
+def cancel_hold(hold_id: int) -> tuple[dict | None, dict | None]:
+    def cancel(conn) -> tuple[dict | None, dict | None]:
+        row = conn.execute(
+            "SELECT book_id, status FROM holds WHERE id = ? AND status IN ('waiting', 'ready')",
+            (hold_id,),
+        ).fetchone()
+        if not row:
+            return None, None
+
+        conn.execute("UPDATE holds SET status = 'cancelled' WHERE id = ?", (hold_id,))
+        promoted = assign_next_hold(conn, row["book_id"]) if row["status"] == "ready" else None
+        return fetch_hold(conn, hold_id), promoted
+
+    return write(cancel)
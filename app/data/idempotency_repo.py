@@ -0,0 +1,76 @@
+import json
+import zlib
+from app.data.db import get_connection
+from app.data.dates import now_epoch
+
+PENDING_TIMEOUT_SECONDS = 60
+
+
+def claim_key(key: str, fingerprint: str, ttl_seconds: int) -> dict | None:
+    now = now_epoch()
+    with get_connection() as conn:
+        conn.execute(
+            """
+            DELETE FROM idempotency_keys
+            WHERE key = ?
+              AND (expires_at < ? OR (status_code IS NULL AND created_at < ?))
+            """,
+            (key, now, now - PENDING_TIMEOUT_SECONDS),
+        )
+        cursor = conn.execute(
+            """
+            INSERT INTO idempotency_keys (key, fingerprint, created_at, expires_at)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT (key) DO NOTHING
+            """,
+            (key, fingerprint, now, now + ttl_seconds),
+        )
+        if cursor.rowcount == 1:
+            conn.commit()
+            return None
+
+        row = conn.execute(
+            "SELECT fingerprint, status_code, headers, body FROM idempotency_keys WHERE key = ?",
+            (key,),
+        ).fetchone()
+        conn.commit()
+
+    if not row:
+        return {"fingerprint": fingerprint, "status_code": None}
+    stored = dict(row)
+    if stored["status_code"] is not None:
+        stored["headers"] = json.loads(stored["headers"])
+        stored["body"] = zlib.decompress(bytes(stored["body"]))
+    return stored
+
+
+def save_response(key: str, status_code: int, headers: list[list[str]], body: bytes) -> None:
+    with get_connection() as conn:
+        conn.execute(
+            """
+            UPDATE idempotency_keys
+            SET status_code = ?, headers = ?, body = ?
+            WHERE key = ?
+            """,
+            (status_code, json.dumps(headers), zlib.compress(body), key),
+        )
+        conn.commit()
+
+
+def release_key(key: str) -> None:
+    with get_connection() as conn:
+        conn.execute(
+            "DELETE FROM idempotency_keys WHERE key = ? AND status_code IS NULL",
+            (key,),
+        )
+        conn.commit()
+
+
+def prune_expired() -> int:
+    with get_connection() as conn:
+        cursor = conn.execute(
+            "DELETE FROM idempotency_keys WHERE expires_at < ?",
+            (now_epoch(),),
+        )
+        conn.commit()
+        return cursor.rowcount
@@ -0,0 +1,157 @@
+from datetime import datetime
+from app.data.db import get_connection
+
+
+def register_job(name: str, interval_seconds: int, max_retries: int, next_run_at: str) -> None:
+    with get_connection() as conn:
+        conn.execute(
+            """
+            INSERT INTO jobs (name, interval_seconds, max_retries, next_run_at)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT (name) DO UPDATE
+                SET interval_seconds = excluded.interval_seconds,
+                    max_retries      = excluded.max_retries
+            """,
+            (name, interval_seconds, max_retries, next_run_at),
+        )
+        conn.commit()
+
+
+def get_job(name: str) -> dict | None:
+    with get_connection() as conn:
+        row = conn.execute(
+            """
+            SELECT name, interval_seconds, max_retries, enabled, attempts,
+                   next_run_at, last_run_at, last_status
+            FROM jobs
+            WHERE name = ?
+            """,
+            (name,),
+        ).fetchone()
+        return dict(row) if row else None
+
+
+def list_jobs() -> list[dict]:
+    with get_connection() as conn:
+        rows = conn.execute(
+            """
+            SELECT name, interval_seconds, max_retries, enabled, attempts,
+                   next_run_at, last_run_at, last_status
+            FROM jobs
+            ORDER BY name
+            """
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+
+def due_jobs(now: str) -> list[dict]:
+    with get_connection() as conn:
+        rows = conn.execute(
+            """
+            SELECT name, interval_seconds, max_retries, attempts, next_run_at
+            FROM jobs
+            WHERE enabled = 1 AND next_run_at <= ?
+            ORDER BY next_run_at
+            """,
+            (now,),
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+
+def claim_job(name: str, expected_next_run_at: str, lease_until: str) -> bool:
+    with get_connection() as conn:
+        cursor = conn.execute(
+            "UPDATE jobs SET next_run_at = ? WHERE name = ? AND next_run_at = ?",
+            (lease_until, name, expected_next_run_at),
+        )
+        conn.commit()
+        return cursor.rowcount == 1
+
+
+def reschedule_job(name: str, next_run_at: str, attempts: int, status: str) -> None:
+    with get_connection() as conn:
+        conn.execute(
+            """
+            UPDATE jobs
+            SET next_run_at = ?,
+                attempts    = ?,
+                last_status = ?,
+                last_run_at = ?
+            WHERE name = ?
+            """,
+            (next_run_at, attempts, status, datetime.utcnow().isoformat(timespec="seconds"), name),
+        )
+        conn.commit()
+
+
+def trigger_job(name: str) -> bool:
+    with get_connection() as conn:
+        cursor = conn.execute(
+            "UPDATE jobs SET next_run_at = ? WHERE name = ?",
+            (datetime.utcnow().isoformat(timespec="seconds"), name),
+        )
+        conn.commit()
+        return cursor.rowcount > 0
+
+
+def start_run(name: str, attempt: int) -> int:
+    with get_connection() as conn:
+        cursor = conn.execute(
+            """
+            INSERT INTO job_runs (job_name, attempt, status, started_at)
+            VALUES (?, ?, 'running', ?)
+            """,
+            (name, attempt, datetime.utcnow().isoformat(timespec="seconds")),
+        )
+        conn.commit()
+        return cursor.lastrowid
+
+
+def finish_run(run_id: int, status: str, result: str | None, error: str | None) -> None:
+    with get_connection() as conn:
+        conn.execute(
+            """
+            UPDATE job_runs
+            SET status      = ?,
+                result      = ?,
+                error       = ?,
+                finished_at = ?
+            WHERE id = ?
+            """,
+            (status, result, error, datetime.utcnow().isoformat(timespec="seconds"), run_id),
+        )
+        conn.commit()
+
+
+def list_job_runs(name: str, limit: int, offset: int) -> list[dict]:
+    with get_connection() as conn:
+        rows = conn.execute(
+            """
+            SELECT id, job_name, attempt, status, result, error, started_at, finished_at
+            FROM job_runs
+            WHERE job_name = ?
+            ORDER BY id DESC
+            LIMIT ? OFFSET ?
+            """,
+            (name, limit, offset),
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+
+def count_job_runs(name: str) -> int:
+    with get_connection() as conn:
+        row = conn.execute(
+            "SELECT COUNT(*) AS count FROM job_runs WHERE job_name = ?",
+            (name,),
+        ).fetchone()
+        return row["count"] if row else 0
+
+
+def prune_job_runs(before: str) -> int:
+    with get_connection() as conn:
+        cursor = conn.execute(
+            "DELETE FROM job_runs WHERE started_at < ? AND status != 'running'",
+            (before,),
+        )
+        conn.commit()
+        return cursor.rowcount
@@ -1,19 +1,35 @@
-from datetime import datetime
-from app.data.db import get_connection
+from app.config import LOAN_PERIOD_DAYS
+from app.data.db import get_connection, get_read_connection
+from app.data.archive_repo import loan_history_source
+from app.data.dates import DAY_SECONDS, now_epoch, to_iso, with_iso_dates
+from app.data.copy_repo import claim_copy, release_copy
+from app.data.hold_repo import assign_next_hold, fulfil_hold
+from app.data.rollups import record_loan, record_return
+from app.data.writer import write
 
+LOAN_PERIOD_SECONDS = LOAN_PERIOD_DAYS * DAY_SECONDS
 
-def create_loan(book_id: int, member_id: int) -> dict:
-    loan_date = datetime.utcnow().isoformat(timespec="seconds")
-    with get_connection() as conn:
+
+def create_loan(book_id: int, member_id: int) -> dict | None:
+    loan_date = now_epoch()
+
+    def insert(conn) -> int | None:
+        copy_id = claim_copy(conn, book_id)
+        if copy_id is None:
+            return None
         cursor = conn.execute(
             """
-            INSERT INTO loans (book_id, member_id, loan_date, return_date)
-            VALUES (?, ?, ?, NULL)
+            INSERT INTO loans (book_id, member_id, loan_date, return_date, copy_id)
+            VALUES (?, ?, ?, NULL, ?)
             """,
-            (book_id, member_id, loan_date),
+            (book_id, member_id, loan_date, copy_id),
         )
-        conn.commit()
-        return get_loan(cursor.lastrowid)
+        record_loan(conn, book_id, member_id, loan_date)
+        fulfil_hold(conn, book_id, member_id)
+        return cursor.lastrowid
+
+    loan_id = write(insert)
+    return get_loan(loan_id) if loan_id is not None else None
 
 
 def has_active_loan(book_id: int, member_id: int) -> bool:
@@ -30,9 +46,10 @@ def has_active_loan(book_id: int, member_id: int) -> bool:
         return row is not None
 
 
-def return_loan(loan_id: int) -> dict | None:
-    return_date = datetime.utcnow().isoformat(timespec="seconds")
-    with get_connection() as conn:
+def return_loan(loan_id: int) -> tuple[dict | None, dict | None]:
+    return_date = now_epoch()
+
+    def close(conn) -> tuple[bool, dict | None]:
         cursor = conn.execute(
             """
             UPDATE loans
@@ -41,94 +58,188 @@ def return_loan(loan_id: int) -> dict | None:
             """,
             (return_date, loan_id),
         )
-        conn.commit()
         if cursor.rowcount == 0:
-            return None
-    return get_loan(loan_id)
+            return False, None
+        row = conn.execute(
+            "SELECT book_id, member_id, loan_date, copy_id FROM loans WHERE id = ?",
+            (loan_id,),
+        ).fetchone()
+        record_return(conn, row["book_id"], row["member_id"], row["loan_date"], return_date)
+        release_copy(conn, row["copy_id"], row["book_id"])
+        return True, assign_next_hold(conn, row["book_id"])
+
+    returned, hold = write(close)
+    if not returned:
+        return None, None
+    return get_loan(loan_id), hold
 
 
 def get_loan(loan_id: int) -> dict | None:
-    with get_connection() as conn:
+    with get_read_connection() as conn:
         row = conn.execute(
             """
-            SELECT l.id, l.book_id, l.member_id, l.loan_date, l.return_date,
+            SELECT l.id, l.book_id, l.member_id, l.loan_date, l.return_date, l.copy_id,
                    b.title AS book_title,
-                   m.name AS member_name
+                   m.name AS member_name,
+                   c.barcode
             FROM loans l
             JOIN books b ON b.id = l.book_id
             JOIN members m ON m.id = l.member_id
+            LEFT JOIN copies c ON c.id = l.copy_id
             WHERE l.id = ?
             """,
             (loan_id,),
         ).fetchone()
-        return dict(row) if row else None
+        return with_iso_dates(row) if row else None
 
 
 def list_loans(active_only: bool = False, limit: int = 10, offset: int = 0) -> list[dict]:
     query = """
-        SELECT l.id, l.book_id, l.member_id, l.loan_date, l.return_date,
+        SELECT l.id, l.book_id, l.member_id, l.loan_date, l.return_date, l.copy_id,
                b.title AS book_title,
-               m.name AS member_name
+               m.name AS member_name,
+               c.barcode
         FROM loans l
         JOIN books b ON b.id = l.book_id
         JOIN members m ON m.id = l.member_id
+        LEFT JOIN copies c ON c.id = l.copy_id
     """
     if active_only:
         query += " WHERE l.return_date IS NULL"
     query += " ORDER BY l.loan_date DESC LIMIT ? OFFSET ?"
 
-    with get_connection() as conn:
+    with get_read_connection() as conn:
         rows = conn.execute(query, (limit, offset)).fetchall()
-        return [dict(row) for row in rows]
+        return [with_iso_dates(row) for row in rows]
 
 def count_active_loans() -> int:
-    with get_connection() as conn:
+    with get_read_connection() as conn:
         row = conn.execute(
             "SELECT COUNT(*) AS count FROM loans WHERE return_date IS NULL"
         ).fetchone()
         return row["count"] if row else 0
 
 def count_member_history(member_id: int) -> int:
-    with get_connection() as conn:
+    with get_read_connection() as conn:
+        source, params = loan_history_source(conn, "member_id = ?", (member_id,))
         row = conn.execute(
-            "SELECT COUNT(*) AS count FROM loans WHERE member_id = ?",
-            (member_id,),
+            f"SELECT COUNT(*) AS count FROM ({source}) AS h",
+            params,
         ).fetchone()
         return row["count"] if row else 0
 
 
 def member_history(member_id: int, limit: int, offset: int) -> list[dict]:
-    with get_connection() as conn:
+    with get_read_connection() as conn:
+        source, params = loan_history_source(conn, "member_id = ?", (member_id,))
         rows = conn.execute(
-            """
+            f"""
             SELECT l.id AS loan_id, l.book_id, l.loan_date, l.return_date,
                    b.title AS book_title
-            FROM loans l
+            FROM ({source}) l
             JOIN books b ON b.id = l.book_id
-            WHERE l.member_id = ?
             ORDER BY l.loan_date DESC
             LIMIT ? OFFSET ?
             """,
-            (member_id, limit, offset),
+            (*params, limit, offset),
         ).fetchall()
-        return [dict(row) for row in rows]
+        return [with_iso_dates(row) for row in rows]
 
 
 def overdue_loans() -> list[dict]:
-    with get_connection() as conn:
+    now = now_epoch()
+    with get_read_connection() as conn:
         rows = conn.execute(
             """
             SELECT l.id AS loan_id,
                    b.title AS book_title,
                    m.name AS member_name,
-                   l.loan_date,
-                   CAST((julianday('now') - julianday(l.loan_date)) - 14 AS INTEGER) AS days_overdue
+                   l.loan_date
             FROM loans l
             JOIN books b ON b.id = l.book_id
             JOIN members m ON m.id = l.member_id
             WHERE l.return_date IS NULL
-              AND l.loan_date < datetime('now', '-14 days')
-            ORDER BY days_overdue DESC, l.loan_date ASC
-            """
+              AND l.loan_date < ?
+            ORDER BY l.loan_date ASC
+            """,
+            (now - LOAN_PERIOD_SECONDS,),
         ).fetchall()
-        return [dict(row) for row in rows]
+
+    return [
+        {
+            **with_iso_dates(row),
+            "days_overdue": (now - row["loan_date"]) // DAY_SECONDS - LOAN_PERIOD_DAYS,
+        }
+        for row in rows
+    ]
+
+
+def active_loans_for_member(conn, member_id: int) -> list[dict]:
+    now = now_epoch()
+    rows = conn.execute(
+        """
+        SELECT l.id AS loan_id, l.book_id, l.loan_date,
+               b.title AS book_title
+        FROM loans l
+        JOIN books b ON b.id = l.book_id
+        WHERE l.member_id = ? AND l.return_date IS NULL
+        ORDER BY l.loan_date ASC
+        """,
+        (member_id,),
+    ).fetchall()
+
+    loans = []
+    for row in rows:
+        due_date = row["loan_date"] + LOAN_PERIOD_SECONDS
+        loans.append(
+            {
+                **with_iso_dates(row),
+                "due_date": to_iso(due_date),
+                "is_overdue": now > due_date,
+                "days_overdue": max((now - due_date) // DAY_SECONDS, 0),
+            }
+        )
+    return loans
+
+
+def get_active_loans_by_member(member_id: int) -> list[dict]:
+    with get_read_connection() as conn:
+        return active_loans_for_member(conn, member_id)
+
+
+def member_history_page(conn, member_id: int, limit: int, offset: int) -> tuple[list[dict], int]:
+    source, params = loan_history_source(conn, "member_id = ?", (member_id,))
+    rows = conn.execute(
+        f"""
+        SELECT l.id AS loan_id, l.book_id, l.loan_date, l.return_date,
+               b.title AS book_title,
+               COUNT(*) OVER () AS total
+        FROM ({source}) l
+        JOIN books b ON b.id = l.book_id
+        ORDER BY l.loan_date DESC
+        LIMIT ? OFFSET ?
+        """,
+        (*params, limit, offset),
+    ).fetchall()
+
+    total = rows[0]["total"] if rows else 0
+    records = []
+    for row in rows:
+        record = with_iso_dates(row)
+        del record["total"]
+        records.append(record)
+    return records, total
+
+
+def iter_loan_history(chunk_size: int):
+    with get_read_connection() as conn:
+        source, params = loan_history_source(conn, "1 = 1", ())
+        cursor = conn.execute(
+            f"SELECT id, member_id, loan_date, return_date FROM ({source}) l",
+            params,
+        )
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                return
+            yield rows
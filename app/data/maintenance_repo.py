@@ -0,0 +1,13 @@
+from app.data.backends import get_backend
+
+
+def optimize_database() -> None:
+    get_backend().optimize()
+
+
+def vacuum_database() -> None:
+    get_backend().vacuum()
+
+
+def database_size() -> int:
+    return get_backend().database_size()
@@ -1,83 +1,136 @@
-from datetime import datetime
-from app.data.db import get_connection
+import json
+from app.data.backends import get_backend
+from app.data.db import get_read_connection
+from app.data.dates import now_epoch, with_iso_dates
+from app.data.errors import VersionConflictError
+from app.data.loan_repo import active_loans_for_member, member_history_page
+from app.data.writer import write
 from app.models.member import Member
 
+MEMBER_COLUMNS = ["id", "name", "email", "registered_at", "version"]
+
+
+def member_columns(fields: tuple[str, ...] | None = None) -> str:
+    if fields is None:
+        return ", ".join(MEMBER_COLUMNS)
+    needed = {"id", "version", *fields}
+    return ", ".join(column for column in MEMBER_COLUMNS if column in needed)
+
 
 def create_member(payload: Member) -> dict:
-    registered_at = datetime.utcnow().isoformat(timespec="seconds")
-    with get_connection() as conn:
+    registered_at = now_epoch()
+
+    def insert(conn) -> int:
         cursor = conn.execute(
             "INSERT INTO members (name, email, registered_at) VALUES (?, ?, ?)",
             (payload.name, payload.email, registered_at),
         )
-        conn.commit()
-        return get_member(cursor.lastrowid)
+        return cursor.lastrowid
+
+    return get_member(write(insert))
+
+
+def member_row(conn, member_id: int) -> dict | None:
+    row = conn.execute(
+        "SELECT id, name, email, registered_at, version FROM members WHERE id = ?",
+        (member_id,),
+    ).fetchone()
+    return with_iso_dates(row) if row else None
 
 
 def get_member(member_id: int) -> dict | None:
-    with get_connection() as conn:
-        row = conn.execute(
-            "SELECT id, name, email, registered_at FROM members WHERE id = ?",
-            (member_id,),
-        ).fetchone()
-        return dict(row) if row else None
+    with get_read_connection() as conn:
+        return member_row(conn, member_id)
 
 
-def update_member(member_id: int, payload: Member) -> dict | None:
-    with get_connection() as conn:
-        cursor = conn.execute(
-            "UPDATE members SET name = ?, email = ? WHERE id = ?",
-            (payload.name, payload.email, member_id),
-        )
-        conn.commit()
-        if cursor.rowcount == 0:
+def get_members(member_ids: list[int], fields: tuple[str, ...] | None = None) -> list[dict]:
+    with get_read_connection() as conn:
+        rows = conn.execute(
+            f"""
+            SELECT {member_columns(fields)}
+            FROM members
+            WHERE id IN ({get_backend().id_list_sql})
+            """,
+            (json.dumps(member_ids),),
+        ).fetchall()
+
+    members = {row["id"]: with_iso_dates(row) for row in rows}
+    return [members[member_id] for member_id in member_ids if member_id in members]
+
+
+def member_dashboard(member_id: int, history_limit: int) -> dict | None:
+    with get_read_connection() as conn:
+        member = member_row(conn, member_id)
+        if not member:
             return None
-        return get_member(member_id)
+
+        active_loans = active_loans_for_member(conn, member_id)
+        history, history_total = member_history_page(conn, member_id, history_limit, 0)
+
+    return {
+        "member": member,
+        "active_loans": active_loans,
+        "overdue_count": sum(1 for loan in active_loans if loan["is_overdue"]),
+        "history": history,
+        "history_total": history_total,
+    }
+
+
+def update_member(
+    member_id: int, payload: Member, expected_version: int | None = None
+) -> tuple[dict | None, dict | None]:
+    query = "UPDATE members SET name = ?, email = ?, version = version + 1 WHERE id = ?"
+    params = [payload.name, payload.email, member_id]
+    if expected_version is not None:
+        query += " AND version = ?"
+        params.append(expected_version)
+
+    def update(conn) -> tuple[dict | None, dict | None]:
+        before = member_row(conn, member_id)
+        cursor = conn.execute(query, params)
+        if cursor.rowcount == 0:
+            if before:
+                raise VersionConflictError("Member was modified by another request.")
+            return None, None
+        return before, member_row(conn, member_id)
+
+    return write(update)
 
 
-def list_members(limit: int, offset: int) -> list[dict]:
-    with get_connection() as conn:
+def list_members(limit: int, offset: int, fields: tuple[str, ...] | None = None) -> list[dict]:
+    with get_read_connection() as conn:
         rows = conn.execute(
-            """
-            SELECT id, name, email, registered_at
+            f"""
+            SELECT {member_columns(fields)}
             FROM members
             ORDER BY name ASC
             LIMIT ? OFFSET ?
             """,
             (limit, offset),
         ).fetchall()
-        return [dict(row) for row in rows]
+        return [with_iso_dates(row) for row in rows]
 
 def count_members() -> int:
-    with get_connection() as conn:
+    with get_read_connection() as conn:
         row = conn.execute("SELECT COUNT(*) AS count FROM members").fetchone()
         return row["count"] if row else 0
 
 
-def delete_member(member_id: int) -> bool:
-    with get_connection() as conn:
-        conn.execute("DELETE FROM loans WHERE member_id = ?", (member_id,))
-        cursor = conn.execute("DELETE FROM members WHERE id = ?", (member_id,))
-        conn.commit()
-        return cursor.rowcount > 0
+def delete_member(member_id: int) -> dict | None:
+    def delete(conn) -> dict | None:
+        before = member_row(conn, member_id)
+        if before:
+            conn.execute("DELETE FROM members WHERE id = ?", (member_id,))
+        return before
 
-
-def has_active_loans(member_id: int) -> bool:
-    with get_connection() as conn:
-        row = conn.execute(
-            """
-            SELECT 1
-            FROM loans
-            WHERE member_id = ? AND return_date IS NULL
-            LIMIT 1
-            """,
-            (member_id,),
-        ).fetchone()
-        return row is not None
+    try:
+        return write(delete)
+    except get_backend().integrity_error as exc:
+        raise ValueError("Cannot delete member with active loans") from exc
 
 
 def members_with_active_loans() -> list[dict]:
-    with get_connection() as conn:
+    with get_read_connection() as conn:
         rows = conn.execute(
             """
             SELECT m.id AS member_id, m.name, m.email, COUNT(l.id) AS active_loans
@@ -0,0 +1,96 @@
+from app.data.dates import DAY_SECONDS, day_number
+
+ROLLUP_TABLES = {
+    "book_id": "daily_book_loans",
+    "genre_id": "daily_genre_loans",
+    "member_id": "daily_member_loans",
+}
+
+
+def upsert_rollups(conn, column: str, rows: list[tuple]) -> None:
+    table = ROLLUP_TABLES[column]
+    conn.executemany(
+        f"""
+        INSERT INTO {table} (day, {column}, loans, returns, loan_seconds)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT (day, {column}) DO UPDATE SET
+            loans = {table}.loans + excluded.loans,
+            returns = {table}.returns + excluded.returns,
+            loan_seconds = {table}.loan_seconds + excluded.loan_seconds
+        """,
+        rows,
+    )
+
+
+def book_genre_ids(conn, book_id: int) -> list[int]:
+    rows = conn.execute(
+        "SELECT genre_id FROM book_genres WHERE book_id = ?",
+        (book_id,),
+    ).fetchall()
+    return [row["genre_id"] for row in rows]
+
+
+def _record(conn, day: int, book_id: int, member_id: int, counts: tuple) -> None:
+    upsert_rollups(conn, "book_id", [(day, book_id, *counts)])
+    upsert_rollups(conn, "member_id", [(day, member_id, *counts)])
+    genre_rows = [(day, genre_id, *counts) for genre_id in book_genre_ids(conn, book_id)]
+    if genre_rows:
+        upsert_rollups(conn, "genre_id", genre_rows)
+
+
+def record_loan(conn, book_id: int, member_id: int, loan_date: int) -> None:
+    _record(conn, day_number(loan_date), book_id, member_id, (1, 0, 0))
+
+
+def record_return(conn, book_id: int, member_id: int, loan_date: int, return_date: int) -> None:
+    counts = (0, 1, return_date - loan_date)
+    _record(conn, day_number(return_date), book_id, member_id, counts)
+
+
+def rebuild_rollups(conn, loan_tables: list[str]) -> int:
+    for table in ROLLUP_TABLES.values():
+        conn.execute(f"DELETE FROM {table}")
+
+    source = " UNION ALL ".join(
+        f"SELECT book_id, member_id, loan_date, return_date FROM {table}" for table in loan_tables
+    )
+    events = f"""
+        WITH source AS ({source}),
+        events AS (
+            SELECT loan_date / {DAY_SECONDS} AS day, book_id, member_id,
+                   1 AS loans, 0 AS returns, 0 AS loan_seconds
+            FROM source
+            UNION ALL
+            SELECT return_date / {DAY_SECONDS}, book_id, member_id,
+                   0, 1, return_date - loan_date
+            FROM source
+            WHERE return_date IS NOT NULL
+        )
+    """
+    totals = "SUM(e.loans), SUM(e.returns), SUM(e.loan_seconds)"
+    conn.execute(
+        f"""
+        {events}
+        INSERT INTO daily_book_loans (day, book_id, loans, returns, loan_seconds)
+        SELECT e.day, e.book_id, {totals} FROM events e GROUP BY e.day, e.book_id
+        """
+    )
+    conn.execute(
+        f"""
+        {events}
+        INSERT INTO daily_member_loans (day, member_id, loans, returns, loan_seconds)
+        SELECT e.day, e.member_id, {totals} FROM events e GROUP BY e.day, e.member_id
+        """
+    )
+    conn.execute(
+        f"""
+        {events}
+        INSERT INTO daily_genre_loans (day, genre_id, loans, returns, loan_seconds)
+        SELECT e.day, bg.genre_id, {totals}
+        FROM events e
+        JOIN book_genres bg ON bg.book_id = e.book_id
+        GROUP BY e.day, bg.genre_id
+        """
+    )
+    row = conn.execute(f"SELECT COUNT(*) AS count FROM ({source}) l").fetchone()
+    return row["count"]
@@ -0,0 +1,130 @@
+import contextvars
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from app import metrics
+from app.config import GROUP_COMMIT_ENABLED, GROUP_COMMIT_MAX_BATCH, GROUP_COMMIT_WINDOW_MS
+from app.data.backends import get_backend
+from app.data.db import get_connection
+
+logger = logging.getLogger(__name__)
+
+
+class WriteJob:
+    def __init__(self, backend, fn):
+        self.backend = backend
+        self.fn = fn
+        self.context = contextvars.copy_context()
+        self.future: Future = Future()
+
+
+class GroupCommitWriter:
+    def __init__(self, window_seconds: float = GROUP_COMMIT_WINDOW_MS / 1000, max_batch: int = GROUP_COMMIT_MAX_BATCH):
+        self.window_seconds = window_seconds
+        self.max_batch = max_batch
+        self._queue: queue.Queue[WriteJob | None] = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+
+    def submit(self, fn) -> Future:
+        job = WriteJob(get_backend(), fn)
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._loop, name="easystock-writer", daemon=True)
+                self._thread.start()
+            self._queue.put(job)
+        metrics.set_gauge("write_queue_depth", self._queue.qsize())
+        return job.future
+
+    def stop(self, timeout: float = 30) -> None:
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+            if thread is None:
+                return
+            self._queue.put(None)
+        thread.join(timeout)
+
+    def _loop(self) -> None:
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            batch = [job]
+            deadline = time.monotonic() + self.window_seconds
+            stopping = False
+            while len(batch) < self.max_batch:
+                try:
+                    job = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    break
+                if job is None:
+                    stopping = True
+                    break
+                batch.append(job)
+
+            metrics.set_gauge("write_queue_depth", self._queue.qsize())
+            groups: dict[int, list[WriteJob]] = {}
+            for job in batch:
+                groups.setdefault(id(job.backend), []).append(job)
+            for jobs in groups.values():
+                self._commit(jobs)
+            if stopping:
+                return
+
+    def _commit(self, jobs: list[WriteJob]) -> None:
+        started = time.perf_counter()
+        results = []
+        try:
+            conn = jobs[0].backend.connect()
+        except Exception as exc:
+            for job in jobs:
+                job.future.set_exception(exc)
+            return
+
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for number, job in enumerate(jobs):
+                conn.execute(f"SAVEPOINT write_{number}")
+                try:
+                    results.append((job, job.context.run(job.fn, conn), None))
+                except Exception as exc:
+                    conn.execute(f"ROLLBACK TO SAVEPOINT write_{number}")
+                    results.append((job, None, exc))
+                conn.execute(f"RELEASE SAVEPOINT write_{number}")
+            conn.commit()
+        except Exception as exc:
+            logger.exception("Group commit of %s writes failed", len(jobs))
+            try:
+                conn.rollback()
+            except Exception:
+                pass
+            for job in jobs:
+                job.future.set_exception(exc)
+            return
+        finally:
+            conn.close()
+
+        metrics.increment("write_batches")
+        metrics.observe("write_batch_size", len(jobs))
+        metrics.observe("write_commit_seconds", time.perf_counter() - started)
+        for job, result, error in results:
+            if error is None:
+                job.future.set_result(result)
+            else:
+                job.future.set_exception(error)
+
+
+writer = GroupCommitWriter()
+
+
+def write(fn):
+    if not GROUP_COMMIT_ENABLED or get_backend().name != "sqlite":
+        with get_connection() as conn:
+            result = fn(conn)
+            conn.commit()
+            return result
+    return writer.submit(fn).result()
@@ -1,32 +1,94 @@
+import time
+
+IMPORT_STARTED = time.perf_counter()
+
 from fastapi import FastAPI
 from fastapi.responses import FileResponse
 from fastapi.staticfiles import StaticFiles
 from pathlib import Path
+from app.api.actor import ActorMiddleware
+from app.api.branch_routing import BranchRoutingMiddleware
+from app.api.idempotency import IdempotencyMiddleware
+from app.api.read_routing import ReadYourWritesMiddleware
+from app.api.request_id import RequestIdMiddleware
 from app.api.routes import router as api_router
-from app.data.db import init_db
+from app import metrics
+from app.config import ADMISSION_CONTROL_ENABLED, FAST_START, JOBS_ENABLED
+from app.data.db import init_branches, init_db, use_branch
+from app.data.writer import writer
+from app.logs import configure_logging, stop_logging
 import logging
 
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s %(levelname)s %(name)s - %(message)s",
-)
+configure_logging()
 
-app = FastAPI(title="EasyStock Library API")
 UI_DIR = Path(__file__).resolve().parent / "ui"
 
-@app.on_event("startup")
-def startup_event() -> None:
-    init_db()
-    logging.getLogger(__name__).info("Database initialized")
 
-@app.get("/")
-def ui() -> FileResponse:
-    return FileResponse(UI_DIR / "index.html")
+def create_app() -> FastAPI:
+    app = FastAPI(title="EasyStock Library API")
+
+    @app.on_event("startup")
+    def startup_event() -> None:
+        configure_logging()
+        logger = logging.getLogger(__name__)
+        started = time.perf_counter()
+        init_db(seed=not FAST_START)
+        branches = init_branches(seed=not FAST_START)
+        logger.info("Database initialized with %s branch shards", len(branches))
+        if not FAST_START:
+            from app.service.analytics_service import AnalyticsService
+
+            AnalyticsService().ensure_rollups()
+            for branch in branches:
+                with use_branch(branch):
+                    AnalyticsService().ensure_rollups()
+        if JOBS_ENABLED:
+            from app.service.job_service import job_runner
+
+            job_runner.start()
+
+        startup_ms = (time.perf_counter() - started) * 1000
+        metrics.set_gauge("startup_ms", IMPORT_MS, phase="import")
+        metrics.set_gauge("startup_ms", startup_ms, phase="startup")
+        logger.info("Imported app in %.1f ms, started in %.1f ms", IMPORT_MS, startup_ms)
+
+    @app.on_event("shutdown")
+    def shutdown_event() -> None:
+        from app.service.audit_service import audit_buffer
+
+        if JOBS_ENABLED:
+            from app.service.job_service import job_runner
+
+            job_runner.stop()
+        audit_buffer.stop()
+        writer.stop()
+        stop_logging()
+
+    @app.get("/")
+    def ui() -> FileResponse:
+        return FileResponse(UI_DIR / "index.html")
+
+    @app.get("/operations")
+    def operations_ui() -> FileResponse:
+        return FileResponse(UI_DIR / "operations.html")
+
+    app.include_router(api_router, prefix="/api")
+    app.mount("/static", StaticFiles(directory=UI_DIR), name="static")
+
+    app.add_middleware(ActorMiddleware)
+    app.add_middleware(IdempotencyMiddleware)
+    app.add_middleware(ReadYourWritesMiddleware)
+
+    if ADMISSION_CONTROL_ENABLED:
+        from app.api.admission import AdmissionControlMiddleware
+
+        app.add_middleware(AdmissionControlMiddleware)
+
+    app.add_middleware(BranchRoutingMiddleware)
+    app.add_middleware(RequestIdMiddleware)
+    return app
 
-@app.get("/operations")
-def operations_ui() -> FileResponse:
-    return FileResponse(UI_DIR / "operations.html")
 
-app.mount("/static", StaticFiles(directory=UI_DIR), name="static")
+app = create_app()
 
-app.include_router(api_router, prefix="/api")
+IMPORT_MS = (time.perf_counter() - IMPORT_STARTED) * 1000
@@ -0,0 +1,12 @@
+from pydantic import BaseModel
+
+
+class AuditEntryOut(BaseModel):
+    id: int
+    entity: str
+    entity_id: int
+    action: str
+    before: dict | None
+    after: dict | None
+    actor: str | None
+    changed_at: str
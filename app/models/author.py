@@ -4,3 +4,4 @@ class Author(BaseModel):
     id: int | None = None
     name: str
     birth_year: int | None
+    version: int | None = None
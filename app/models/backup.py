@@ -0,0 +1,8 @@
+from pydantic import BaseModel
+
+
+class BackupOut(BaseModel):
+    name: str
+    size_bytes: int
+    created_at: str
+    elapsed_seconds: float | None = None
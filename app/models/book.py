@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 class BookBase(BaseModel):
     title: str
@@ -7,6 +7,8 @@ class BookBase(BaseModel):
 class BookCreate(BookBase):
     author_id: int
     genre_id: int
+    copies: int = Field(1, ge=0, le=1000)
+    branch: str = "main"
 
 class BookUpdate(BaseModel):
     title: str | None
@@ -21,3 +23,20 @@ class BookOut(BookBase):
     genre_id: int | None
     genre: str | None
     is_borrowed: bool
+    total_copies: int = 0
+    available_copies: int = 0
+    version: int | None = None
+
+class BookSearchResult(BookOut):
+    branch: str | None = None
+
+class CopyCreate(BaseModel):
+    barcode: str | None = None
+    branch: str = "main"
+
+class CopyOut(BaseModel):
+    id: int
+    book_id: int
+    barcode: str
+    branch: str
+    status: str
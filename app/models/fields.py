@@ -0,0 +1,17 @@
+from functools import lru_cache
+
+from pydantic import BaseModel, TypeAdapter, create_model
+
+
+@lru_cache(maxsize=256)
+def partial_model(model: type[BaseModel], fields: tuple[str, ...]) -> type[BaseModel]:
+    return create_model(
+        f"{model.__name__}Fields",
+        **{name: (model.model_fields[name].annotation, model.model_fields[name]) for name in fields},
+    )
+
+
+@lru_cache(maxsize=256)
+def partial_adapter(model: type[BaseModel], fields: tuple[str, ...], many: bool) -> TypeAdapter:
+    partial = partial_model(model, fields)
+    return TypeAdapter(list[partial] if many else partial)
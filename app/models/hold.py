@@ -0,0 +1,15 @@
+from pydantic import BaseModel
+
+class HoldCreate(BaseModel):
+    member_id: int
+
+class HoldOut(BaseModel):
+    id: int
+    book_id: int
+    member_id: int
+    book_title: str
+    member_name: str
+    status: str
+    placed_at: str
+    ready_at: str | None
+    position: int | None = None
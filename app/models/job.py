@@ -0,0 +1,23 @@
+from pydantic import BaseModel
+
+
+class JobOut(BaseModel):
+    name: str
+    interval_seconds: int
+    max_retries: int
+    enabled: bool
+    attempts: int
+    next_run_at: str
+    last_run_at: str | None
+    last_status: str | None
+
+
+class JobRunOut(BaseModel):
+    id: int
+    job_name: str
+    attempt: int
+    status: str
+    result: str | None
+    error: str | None
+    started_at: str
+    finished_at: str | None
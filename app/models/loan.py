@@ -12,3 +12,5 @@ class LoanOut(BaseModel):
     member_name: str
     loan_date: str
     return_date: str | None
+    copy_id: int | None = None
+    barcode: str | None = None
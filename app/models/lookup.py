@@ -0,0 +1,4 @@
+from pydantic import BaseModel
+
+class IdLookup(BaseModel):
+    ids: list[int]
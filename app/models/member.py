@@ -9,3 +9,4 @@ class MemberOut(BaseModel):
     name: str
     email: str
     registered_at: str
+    version: int | None = None
@@ -1,5 +1,7 @@
 from pydantic import BaseModel
 
+from app.models.member import MemberOut
+
 class MemberActiveLoan(BaseModel):
     member_id: int
     name: str
@@ -19,3 +21,88 @@ class OverdueLoan(BaseModel):
     member_name: str
     loan_date: str
     days_overdue: int
+
+class MemberCurrentLoan(BaseModel):
+    loan_id: int
+    book_id: int
+    book_title: str
+    loan_date: str
+    due_date: str
+    is_overdue: bool
+    days_overdue: int
+
+class MemberDashboard(BaseModel):
+    member: MemberOut
+    active_loans: list[MemberCurrentLoan]
+    overdue_count: int
+    history: list[MemberBorrowRecord]
+    history_total: int
+
+class TopBook(BaseModel):
+    book_id: int
+    title: str
+    loans: int
+
+class TopGenre(BaseModel):
+    genre_id: int
+    name: str
+    loans: int
+
+class LoanDurationReport(BaseModel):
+    days: int
+    genre_id: int | None
+    returns: int
+    average_days: float
+
+class DailyCirculation(BaseModel):
+    day: str
+    loans: int
+    returns: int
+
+class LoanDayStats(BaseModel):
+    mean: float
+    p50: int
+    p90: int
+    p99: int
+    max: int
+
+class OverdueBucket(BaseModel):
+    label: str
+    count: int
+
+class OverdueStats(BaseModel):
+    count: int
+    buckets: list[OverdueBucket]
+
+class TopBorrower(BaseModel):
+    member_id: int
+    loans: int
+    active: int
+    average_days: float
+
+class BorrowerStats(BaseModel):
+    borrowers: int
+    mean_loans: float
+    p50_loans: int
+    p90_loans: int
+    max_loans: int
+    top: list[TopBorrower]
+
+class LoanStatistics(BaseModel):
+    generated_at: str
+    loans: int
+    active: int
+    returned: int
+    loan_days: LoanDayStats
+    overdue: OverdueStats
+    members: BorrowerStats
+    elapsed_seconds: float
+
+class BranchSummary(BaseModel):
+    branch: str | None
+    books: int
+    total_copies: int
+    available_copies: int
+    members: int
+    active_loans: int
+    overdue_loans: int
@@ -1,8 +1,11 @@
 from pydantic import BaseModel
 
 from app.models.author import Author
-from app.models.book import BookOut
+from app.models.backup import BackupOut
+from app.models.book import BookOut, CopyOut
 from app.models.genre import GenreOut
+from app.models.hold import HoldOut
+from app.models.job import JobOut
 from app.models.loan import LoanOut
 from app.models.member import MemberOut
 
@@ -16,6 +19,11 @@ class BookResponse(BaseModel):
     data: BookOut
 
 
+class CopyResponse(BaseModel):
+    message: str
+    data: CopyOut
+
+
 class AuthorResponse(BaseModel):
     message: str
     data: Author
@@ -31,6 +39,21 @@ class LoanResponse(BaseModel):
     data: LoanOut
 
 
+class HoldResponse(BaseModel):
+    message: str
+    data: HoldOut
+
+
 class GenreResponse(BaseModel):
     message: str
     data: GenreOut
+
+
+class JobResponse(BaseModel):
+    message: str
+    data: JobOut
+
+
+class BackupResponse(BaseModel):
+    message: str
+    data: BackupOut
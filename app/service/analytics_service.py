@@ -0,0 +1,30 @@
+import logging
+from app.data import analytics_repo, genre_repo
+
+logger = logging.getLogger(__name__)
+
+
+class AnalyticsService:
+    def top_books(self, days: int, limit: int) -> list[dict]:
+        return analytics_repo.top_books(days, limit)
+
+    def top_genres(self, days: int, limit: int) -> list[dict]:
+        return analytics_repo.top_genres(days, limit)
+
+    def loan_duration(self, days: int, genre_id: int | None = None) -> dict:
+        if genre_id is not None and not genre_repo.get_genre(genre_id):
+            raise ValueError("Genre not found")
+        return analytics_repo.loan_duration(days, genre_id)
+
+    def daily_circulation(self, days: int) -> list[dict]:
+        return analytics_repo.daily_circulation(days)
+
+    def rebuild_rollups(self) -> int:
+        processed = analytics_repo.rebuild()
+        logger.info("Rebuilt circulation rollups from %s loans", processed)
+        return processed
+
+    def ensure_rollups(self) -> None:
+        processed = analytics_repo.ensure_rollups()
+        if processed:
+            logger.info("Built circulation rollups from %s loans", processed)
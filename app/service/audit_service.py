@@ -0,0 +1,132 @@
+import contextvars
+import logging
+import threading
+
+from app import metrics
+from app.config import AUDIT_BUFFER_SIZE, AUDIT_ENABLED, AUDIT_FLUSH_SECONDS
+from app.data import audit_repo
+from app.data.backends import current_branch
+from app.data.dates import now_epoch
+from app.data.db import read_from_primary, use_branch
+
+logger = logging.getLogger(__name__)
+
+AUDITED_ENTITIES = {"author", "book", "copy", "genre", "member"}
+current_actor = contextvars.ContextVar("current_actor", default=None)
+
+
+class AuditBuffer:
+    def __init__(self, flush_seconds: float = AUDIT_FLUSH_SECONDS, max_size: int = AUDIT_BUFFER_SIZE):
+        self.flush_seconds = flush_seconds
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._entries: list[dict] = []
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def record(self, entity: str, action: str, entity_id: int, before: dict | None, after: dict | None) -> None:
+        entry = {
+            "entity": entity,
+            "entity_id": entity_id,
+            "action": action,
+            "before": before,
+            "after": after,
+            "actor": current_actor.get(),
+            "changed_at": now_epoch(),
+            "branch": current_branch.get(),
+        }
+        with self._lock:
+            self._entries.append(entry)
+            pending = len(self._entries)
+            if self._thread is None:
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._loop, name="easystock-audit", daemon=True)
+                self._thread.start()
+        metrics.set_gauge("audit_buffer_size", pending)
+        if pending >= self.max_size:
+            self.flush()
+
+    def flush(self) -> int:
+        with self._flush_lock:
+            with self._lock:
+                entries, self._entries = self._entries, []
+            if not entries:
+                return 0
+
+            by_branch: dict[str | None, list[dict]] = {}
+            for entry in entries:
+                by_branch.setdefault(entry["branch"], []).append(entry)
+
+            written = 0
+            for branch, batch in by_branch.items():
+                try:
+                    with use_branch(branch):
+                        written += audit_repo.insert_entries(batch)
+                except Exception:
+                    logger.exception("Failed to write %s audit entries", len(batch))
+                    self._requeue(batch)
+
+            metrics.increment("audit_entries_written", written)
+            metrics.observe("audit_flush_size", written)
+            metrics.set_gauge("audit_buffer_size", self.pending())
+            return written
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def stop(self, timeout: float = 30) -> None:
+        with self._lock:
+            thread, self._thread = self._thread, None
+        self._stop.set()
+        if thread:
+            thread.join(timeout)
+        self.flush()
+
+    def _requeue(self, batch: list[dict]) -> None:
+        with self._lock:
+            self._entries[:0] = batch
+            overflow = len(self._entries) - self.max_size
+            if overflow > 0:
+                del self._entries[:overflow]
+                metrics.increment("audit_entries_dropped", overflow)
+                logger.error("Audit buffer full, dropped %s oldest entries", overflow)
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.flush_seconds):
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Audit flush failed")
+
+
+audit_buffer = AuditBuffer()
+
+
+def record_change(entity: str, action: str, entity_id: int, before: dict | None = None, after: dict | None = None) -> None:
+    if AUDIT_ENABLED:
+        audit_buffer.record(entity, action, entity_id, before, after)
+
+
+class AuditService:
+    def list_entries(
+        self, entity: str | None, entity_id: int | None, actor: str | None, page: int, limit: int
+    ) -> list[dict]:
+        self._validate_entity(entity)
+        audit_buffer.flush()
+        offset = (page - 1) * limit
+        # The flush only reached the primary, so a replica could still miss the entries just written.
+        with read_from_primary():
+            return audit_repo.list_entries(entity, entity_id, actor, limit, offset)
+
+    def count_entries(self, entity: str | None, entity_id: int | None, actor: str | None) -> int:
+        self._validate_entity(entity)
+        audit_buffer.flush()
+        with read_from_primary():
+            return audit_repo.count_entries(entity, entity_id, actor)
+
+    @staticmethod
+    def _validate_entity(entity: str | None) -> None:
+        if entity is not None and entity not in AUDITED_ENTITIES:
+            raise ValueError(f"Unknown entity: {entity}")
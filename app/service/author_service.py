@@ -1,6 +1,8 @@
 import logging
 from app.data import author_repo
 from app.models.author import Author
+from app.service.events import publish_catalog_change
+from app.service.audit_service import record_change
 
 logger = logging.getLogger(__name__)
 
@@ -12,6 +14,8 @@ class AuthorService:
         self._validate_non_empty_string(payload.name, "Name")
         author = author_repo.create_author(payload)
         logger.info("Created author name=%s", payload.name)
+        publish_catalog_change("author", "created", author["id"], author)
+        record_change("author", "created", author["id"], after=author)
         return author
 
     def list_authors(self, page: int, limit: int) -> list[dict]:
@@ -22,20 +26,27 @@ class AuthorService:
         return author_repo.count_authors()
 
     def delete_author(self, author_id: int) -> bool:
-        self._author_with_books(author_id)
-        author = author_repo.delete_author(author_id)
+        before = author_repo.delete_author(author_id)
         logger.info("Deleted author successfully")
-        return author
+        if before:
+            publish_catalog_change("author", "deleted", author_id)
+            record_change("author", "deleted", author_id, before=before)
+        return before is not None
 
     def get_author(self, author_id: int) -> dict | None:
         return author_repo.get_author(author_id)
 
-    def update_author(self, author_id: int, payload: Author) -> dict | None:
+    def update_author(
+        self, author_id: int, payload: Author, expected_version: int | None = None
+    ) -> dict | None:
         self._author_name_exists(payload.name, payload.birth_year, author_id)
         self._validate_year(payload.birth_year)
         self._validate_non_empty_string(payload.name, "Name")
-        author = author_repo.update_author(author_id, payload)
+        before, author = author_repo.update_author(author_id, payload, expected_version)
         logger.info("Updated author name=%s", payload.name)
+        if author:
+            publish_catalog_change("author", "updated", author_id, author)
+            record_change("author", "updated", author_id, before, author)
         return author
 
     @staticmethod
@@ -46,11 +57,6 @@ class AuthorService:
                     author_id is None or author["id"] != author_id)):
                 raise ValueError("An author with the same name and birth year already exists.")
 
-    @staticmethod
-    def _author_with_books(author_id: int) -> None:
-        if author_repo.has_books(author_id):
-            raise ValueError("Cannot delete author with existing books")
-
     @staticmethod
     def _validate_year(birth_year: int | None) -> None:
         if not isinstance(birth_year, int):
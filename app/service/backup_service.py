@@ -0,0 +1,36 @@
+import logging
+
+from app.config import BACKUP_RETENTION
+from app.data import backup_repo
+from app.data.backends import get_backend
+
+logger = logging.getLogger(__name__)
+
+
+class BackupService:
+    def list_backups(self) -> list[dict]:
+        return backup_repo.list_backups()
+
+    def create_backup(self) -> dict:
+        self._ensure_sqlite()
+        backup = backup_repo.create_backup()
+        removed = backup_repo.prune_backups(BACKUP_RETENTION)
+        logger.info(
+            "Created backup %s (%s bytes) in %.2fs, pruned %s",
+            backup["name"], backup["size_bytes"], backup["elapsed_seconds"], removed,
+        )
+        return backup
+
+    def restore_backup(self, name: str) -> dict:
+        self._ensure_sqlite()
+        path = backup_repo.backup_path(name)
+        if path is None:
+            raise ValueError("Backup not found")
+        backup = backup_repo.restore_backup(path)
+        logger.warning("Restored database from backup %s", name)
+        return backup
+
+    @staticmethod
+    def _ensure_sqlite() -> None:
+        if get_backend().name != "sqlite":
+            raise ValueError("Online backups are only available on the sqlite backend; use pg_dump for PostgreSQL.")
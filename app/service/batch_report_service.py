@@ -0,0 +1,173 @@
+import argparse
+import json
+import logging
+import time
+from datetime import datetime
+
+from app.config import LOAN_PERIOD_DAYS, REPORT_CHUNK_SIZE
+from app.data import loan_repo
+from app.data.dates import DAY_SECONDS, to_epoch
+
+logger = logging.getLogger(__name__)
+
+OVERDUE_EDGES = [8, 15, 31, 61]
+OVERDUE_LABELS = ["0-7", "8-14", "15-30", "31-60", "61+"]
+TOP_MEMBERS = 10
+REPORTED_BAD_LOANS = 5
+
+
+def load_numpy():
+    try:
+        import numpy
+    except ImportError as exc:
+        raise RuntimeError("Batch reports need numpy: pip install numpy") from exc
+    return numpy
+
+
+def add_counts(total, counts):
+    if len(counts) > len(total):
+        total, counts = counts, total
+    total[: len(counts)] += counts
+    return total
+
+
+def percentile(np, counts, fraction: float) -> int:
+    cumulative = np.cumsum(counts)
+    if not len(cumulative) or not cumulative[-1]:
+        return 0
+    return int(np.searchsorted(cumulative, fraction * cumulative[-1]))
+
+
+class BatchReportService:
+    def __init__(self, chunk_size: int = REPORT_CHUNK_SIZE):
+        self._chunk_size = chunk_size
+
+    def loan_statistics(self, now: datetime | None = None) -> dict:
+        np = load_numpy()
+        started = time.perf_counter()
+        now = now or datetime.utcnow()
+        now_epoch = to_epoch(now)
+        missing = np.iinfo(np.int64).min
+
+        member_loans = np.zeros(0, np.int64)
+        member_active = np.zeros(0, np.int64)
+        member_returned = np.zeros(0, np.int64)
+        member_seconds = np.zeros(0, np.float64)
+        duration_days = np.zeros(0, np.int64)
+        overdue_buckets = np.zeros(len(OVERDUE_LABELS), np.int64)
+        total_loans = 0
+        total_seconds = 0
+
+        for rows in loan_repo.iter_loan_history(self._chunk_size):
+            member_ids = np.fromiter((row["member_id"] for row in rows), np.int64, len(rows))
+            loan_at = np.fromiter((row["loan_date"] for row in rows), np.int64, len(rows))
+            return_at = np.fromiter(
+                (missing if row["return_date"] is None else row["return_date"] for row in rows),
+                np.int64,
+                len(rows),
+            )
+
+            active = return_at == missing
+            returned = ~active
+            seconds = return_at[returned] - loan_at[returned]
+            if (seconds < 0).any():
+                bad = np.flatnonzero(returned)[seconds < 0][:REPORTED_BAD_LOANS]
+                raise ValueError(
+                    "Loans returned before they were borrowed: "
+                    + ", ".join(str(rows[index]["id"]) for index in bad)
+                )
+
+            member_loans = add_counts(member_loans, np.bincount(member_ids))
+            member_active = add_counts(member_active, np.bincount(member_ids[active]))
+            member_returned = add_counts(member_returned, np.bincount(member_ids[returned]))
+            member_seconds = add_counts(
+                member_seconds, np.bincount(member_ids[returned], weights=seconds)
+            )
+            duration_days = add_counts(duration_days, np.bincount(seconds // DAY_SECONDS))
+
+            days_out = (now_epoch - loan_at[active]) // DAY_SECONDS
+            days_overdue = days_out[days_out >= LOAN_PERIOD_DAYS] - LOAN_PERIOD_DAYS
+            overdue_buckets += np.bincount(
+                np.digitize(days_overdue, OVERDUE_EDGES), minlength=len(OVERDUE_LABELS)
+            )
+
+            total_loans += len(rows)
+            total_seconds += int(seconds.sum())
+
+        total_returned = int(duration_days.sum())
+        size = len(member_loans)
+        member_active, member_returned, member_seconds = (
+            np.pad(counts, (0, size - len(counts)))
+            for counts in (member_active, member_returned, member_seconds)
+        )
+        member_days = member_seconds / np.maximum(member_returned, 1) / DAY_SECONDS
+        borrowers = member_loans[member_loans > 0]
+        top = np.argsort(-member_loans, kind="stable")[: min(TOP_MEMBERS, len(borrowers))]
+
+        report = {
+            "generated_at": now.isoformat(timespec="seconds"),
+            "loans": total_loans,
+            "active": total_loans - total_returned,
+            "returned": total_returned,
+            "loan_days": {
+                "mean": round(total_seconds / total_returned / DAY_SECONDS, 2) if total_returned else 0.0,
+                "p50": percentile(np, duration_days, 0.5),
+                "p90": percentile(np, duration_days, 0.9),
+                "p99": percentile(np, duration_days, 0.99),
+                "max": max(len(duration_days) - 1, 0),
+            },
+            "overdue": {
+                "count": int(overdue_buckets.sum()),
+                "buckets": [
+                    {"label": label, "count": int(count)}
+                    for label, count in zip(OVERDUE_LABELS, overdue_buckets)
+                ],
+            },
+            "members": {
+                "borrowers": len(borrowers),
+                "mean_loans": round(float(borrowers.mean()), 2) if len(borrowers) else 0.0,
+                "p50_loans": int(np.percentile(borrowers, 50)) if len(borrowers) else 0,
+                "p90_loans": int(np.percentile(borrowers, 90)) if len(borrowers) else 0,
+                "max_loans": int(borrowers.max()) if len(borrowers) else 0,
+                "top": [
+                    {
+                        "member_id": int(member_id),
+                        "loans": int(member_loans[member_id]),
+                        "active": int(member_active[member_id]),
+                        "average_days": round(float(member_days[member_id]), 2),
+                    }
+                    for member_id in top
+                ],
+            },
+            "elapsed_seconds": round(time.perf_counter() - started, 3),
+        }
+        logger.info(
+            "Computed loan statistics over %s loans in %.2fs", total_loans, report["elapsed_seconds"]
+        )
+        return report
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Compute EasyStock loan statistics in batch.")
+    parser.add_argument("--chunk-size", type=int, default=REPORT_CHUNK_SIZE,
+                        help="loans read per chunk (default EASYSTOCK_REPORT_CHUNK_SIZE)")
+    parser.add_argument("--now", type=datetime.fromisoformat, default=None,
+                        help="reference time (ISO) for overdue calculations")
+    parser.add_argument("--output", default=None, help="write the JSON report to this file instead of stdout")
+    args = parser.parse_args(argv)
+
+    try:
+        report = BatchReportService(args.chunk_size).loan_statistics(args.now)
+    except (RuntimeError, ValueError) as exc:
+        parser.exit(1, f"error: {exc}\n")
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            handle.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
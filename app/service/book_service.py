@@ -1,6 +1,11 @@
 import logging
-from app.data import book_repo, author_repo, genre_repo
-from app.models.book import BookCreate, BookUpdate
+from app.config import LOOKUP_MAX_IDS
+from app.data import book_repo, author_repo, copy_repo, genre_repo
+from app.models.book import BookCreate, BookUpdate, CopyCreate
+from app.service.events import publish_catalog_change
+from app.service.audit_service import record_change
+from app.service.hold_service import notify_hold_ready
+from app.service.coalescing import coalesce
 
 logger = logging.getLogger(__name__)
 
@@ -14,38 +19,89 @@ class BookService:
         self._validate_non_empty_string(payload.title, "Title")
         book = book_repo.create_book(payload)
         logger.info("Created book title=%s", payload.title)
+        publish_catalog_change("book", "created", book["id"], book)
+        record_change("book", "created", book["id"], after=book)
         return book
 
-    def get_book(self, book_id: int) -> dict | None:
-        return book_repo.get_book(book_id)
+    def get_book(self, book_id: int, fields: tuple[str, ...] | None = None) -> dict | None:
+        return book_repo.get_book(book_id, fields)
+
+    def get_books(self, book_ids: list[int], fields: tuple[str, ...] | None = None) -> list[dict]:
+        return book_repo.get_books(self._validate_ids(book_ids), fields)
 
     def list_books(
         self,
         page: int,
         limit: int,
         genre: str | None = None,
+        fields: tuple[str, ...] | None = None,
     ) -> list[dict]:
         offset = (page - 1) * limit
-        return book_repo.list_books(limit, offset, genre)
+        return coalesce(book_repo.list_books, limit, offset, genre, fields)
 
     def count_books(self, genre: str | None = None) -> int:
-        return book_repo.count_books(genre)
+        return coalesce(book_repo.count_books, genre)
 
-    def update_book(self, book_id: int, payload: BookUpdate) -> dict | None:
+    def update_book(
+        self, book_id: int, payload: BookUpdate, expected_version: int | None = None
+    ) -> dict | None:
         self._ensure_isbn_unique_update(payload.isbn, book_id)
         self._ensure_author_exists(payload.author_id)
         self._ensure_genre_exists(payload.genre_id)
         self._validate_isbn(payload.isbn)
         self._validate_non_empty_string(payload.title, "Title")
-        book = book_repo.update_book(book_id, payload)
+        before, book = book_repo.update_book(book_id, payload, expected_version)
         logger.info("Updated book title=%s", payload.title)
+        if book:
+            publish_catalog_change("book", "updated", book_id, book)
+            record_change("book", "updated", book_id, before, book)
         return book
 
     def delete_book(self, book_id: int) -> bool:
-        self._validate_no_active_loans(book_id)
-        book = book_repo.delete_book(book_id)
+        before = book_repo.delete_book(book_id)
         logger.info("Deleted book successfully")
-        return book
+        if before:
+            publish_catalog_change("book", "deleted", book_id)
+            record_change("book", "deleted", book_id, before=before)
+        return before is not None
+
+    def add_copy(self, book_id: int, payload: CopyCreate) -> dict:
+        self._ensure_book_exists(book_id)
+        self._validate_non_empty_string(payload.branch, "Branch")
+        if payload.barcode is not None:
+            self._validate_non_empty_string(payload.barcode, "Barcode")
+            if copy_repo.barcode_exists(payload.barcode):
+                raise ValueError("Barcode already exists.")
+        copy, hold = copy_repo.add_copy(book_id, payload.barcode, payload.branch)
+        logger.info("Added copy barcode=%s for book id=%s", copy["barcode"], book_id)
+        publish_catalog_change("book", "updated", book_id, book_repo.get_book(book_id))
+        record_change("copy", "created", copy["id"], after=copy)
+        if hold:
+            notify_hold_ready(hold)
+        return copy
+
+    def list_copies(self, book_id: int) -> list[dict]:
+        self._ensure_book_exists(book_id)
+        return copy_repo.list_copies(book_id)
+
+    def withdraw_copy(self, copy_id: int) -> dict:
+        copy = copy_repo.get_copy(copy_id)
+        if not copy or copy["status"] == "withdrawn":
+            raise ValueError("Copy not found")
+        if copy["status"] != "available":
+            raise ValueError("Cannot withdraw a copy that is on loan")
+        withdrawn = copy_repo.withdraw_copy(copy_id)
+        if not withdrawn:
+            raise ValueError("Cannot withdraw a copy that is on loan")
+        logger.info("Withdrew copy barcode=%s", withdrawn["barcode"])
+        publish_catalog_change("book", "updated", copy["book_id"], book_repo.get_book(copy["book_id"]))
+        record_change("copy", "withdrawn", copy_id, copy, withdrawn)
+        return withdrawn
+
+    @staticmethod
+    def _ensure_book_exists(book_id: int) -> None:
+        if not book_repo.get_book(book_id, ("id",)):
+            raise ValueError("Book not found")
 
     @staticmethod
     def _ensure_author_exists(author_id: int | None) -> None:
@@ -61,6 +117,15 @@ class BookService:
         if not genre_repo.get_genre(genre_id):
             raise ValueError("Please select a valid genre.")
 
+    @staticmethod
+    def _validate_ids(ids: list[int]) -> list[int]:
+        ids = list(dict.fromkeys(ids))
+        if not ids:
+            raise ValueError("At least one id is required.")
+        if len(ids) > LOOKUP_MAX_IDS:
+            raise ValueError(f"At most {LOOKUP_MAX_IDS} ids can be requested at once.")
+        return ids
+
     @staticmethod
     def _validate_non_empty_string(value: str, field_name: str) -> None:
         if not value.strip():
@@ -73,19 +138,14 @@ class BookService:
 
     @staticmethod
     def _ensure_isbn_unique(isbn: str) -> None:
-        existing_books = book_repo.list_books(1000, 0)
+        existing_books = book_repo.list_books(1000, 0, fields=("id", "isbn"))
         for book in existing_books:
             if book["isbn"] == isbn:
                 raise ValueError("Book already exists.")
 
     @staticmethod
     def _ensure_isbn_unique_update(isbn: str, book_id: int) -> None:
-        existing_books = book_repo.list_books(1000, 0)
+        existing_books = book_repo.list_books(1000, 0, fields=("id", "isbn"))
         for book in existing_books:
             if book["isbn"] == isbn and book["id"] != book_id:
                 raise ValueError("Book already exists.")
-
-    @staticmethod
-    def _validate_no_active_loans(book_id: int) -> None:
-        if book_repo.has_active_loans(book_id):
-            raise ValueError("Cannot delete book with active loans")
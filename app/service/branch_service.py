@@ -0,0 +1,34 @@
+from app.data import analytics_repo, book_repo
+from app.data.backends import current_branch
+from app.data.db import fan_out, list_branches
+
+
+class BranchService:
+    def list_branches(self) -> list[str]:
+        return list_branches()
+
+    def search_books(self, query: str, limit: int) -> list[dict]:
+        query = query.strip()
+        if not query:
+            raise ValueError("Search query must not be empty.")
+
+        branch = current_branch.get()
+        if branch is not None or not list_branches():
+            return [{**book, "branch": branch} for book in book_repo.search_books(query, limit)]
+
+        results = fan_out(lambda: book_repo.search_books(query, limit))
+        books = [
+            {**book, "branch": branch}
+            for branch, branch_books in results.items()
+            for book in branch_books
+        ]
+        books.sort(key=lambda book: (book["title"].lower(), book["branch"], book["id"]))
+        return books[:limit]
+
+    def branch_report(self) -> list[dict]:
+        branch = current_branch.get()
+        if branch is not None or not list_branches():
+            return [{"branch": branch, **analytics_repo.catalog_summary()}]
+
+        results = fan_out(analytics_repo.catalog_summary)
+        return [{"branch": branch, **summary} for branch, summary in results.items()]
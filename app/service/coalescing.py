@@ -0,0 +1,62 @@
+import threading
+
+from app import metrics
+from app.config import COALESCE_READS
+from app.data.backends import current_branch, read_primary
+
+
+class Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: BaseException | None = None
+
+
+class SingleFlight:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights: dict[tuple, Flight] = {}
+
+    def do(self, key: tuple, fn, *args, **kwargs) -> tuple[object, bool]:
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = Flight()
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result, True
+
+        try:
+            flight.result = fn(*args, **kwargs)
+        except BaseException as exc:
+            flight.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+        return flight.result, False
+
+
+reads = SingleFlight()
+
+
+def coalesce(fn, *args, **kwargs):
+    # Reads that must see the caller's own writes never join a query started before them.
+    if not COALESCE_READS or read_primary.get():
+        return fn(*args, **kwargs)
+
+    query = f"{fn.__module__.rsplit('.', 1)[-1]}.{fn.__name__}"
+    key = (query, current_branch.get(), args, tuple(sorted(kwargs.items())))
+    result, shared = reads.do(key, fn, *args, **kwargs)
+
+    metrics.increment("coalesce_requests", query=query)
+    if shared:
+        metrics.increment("coalesce_shared", query=query)
+    requests = metrics.counter_value("coalesce_requests", query=query)
+    metrics.set_gauge("coalesce_ratio", metrics.counter_value("coalesce_shared", query=query) / requests, query=query)
+    return result
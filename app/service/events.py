@@ -0,0 +1,113 @@
+import asyncio
+import json
+import logging
+import threading
+from collections import deque
+
+from app.config import EVENT_HEARTBEAT_SECONDS, EVENT_HISTORY_SIZE, EVENT_QUEUE_SIZE
+from app.data.backends import current_branch
+
+logger = logging.getLogger(__name__)
+
+
+class Subscriber:
+    def __init__(self, loop: asyncio.AbstractEventLoop, queue_size: int, branch: str | None = None):
+        self.loop = loop
+        self.branch = branch
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+
+    def deliver(self, event: dict | None) -> None:
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Slow client: end the stream, it reconnects with Last-Event-ID.
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(None)
+
+
+class EventBus:
+    def __init__(self, history_size: int = EVENT_HISTORY_SIZE, queue_size: int = EVENT_QUEUE_SIZE):
+        self._lock = threading.Lock()
+        self._subscribers: set[Subscriber] = set()
+        self._history: deque[dict] = deque(maxlen=history_size)
+        self._last_id = 0
+        self._queue_size = queue_size
+
+    def publish(self, event_type: str, data: dict, branch: str | None = None) -> dict:
+        with self._lock:
+            self._last_id += 1
+            event = {"id": self._last_id, "type": event_type, "data": data, "branch": branch}
+            self._history.append(event)
+            subscribers = [subscriber for subscriber in self._subscribers if subscriber.branch == branch]
+
+        for subscriber in subscribers:
+            try:
+                subscriber.loop.call_soon_threadsafe(subscriber.deliver, event)
+            except RuntimeError:
+                self.unsubscribe(subscriber)
+        return event
+
+    def subscribe(
+        self, loop: asyncio.AbstractEventLoop, last_event_id: int | None = None, branch: str | None = None
+    ) -> tuple[Subscriber, list[dict]]:
+        subscriber = Subscriber(loop, self._queue_size, branch)
+        with self._lock:
+            self._subscribers.add(subscriber)
+            backlog = []
+            if last_event_id is not None:
+                backlog = [e for e in self._history if e["id"] > last_event_id and e["branch"] == branch]
+        return subscriber, backlog
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len(self._subscribers)
+
+
+def format_sse(event: dict) -> str:
+    return (
+        f"id: {event['id']}\n"
+        f"event: {event['type']}\n"
+        f"data: {json.dumps(event['data'], default=str)}\n\n"
+    )
+
+
+event_bus = EventBus()
+
+
+async def event_stream(is_disconnected, last_event_id: int | None = None, branch: str | None = None):
+    subscriber, backlog = event_bus.subscribe(asyncio.get_running_loop(), last_event_id, branch)
+    try:
+        yield "retry: 3000\n\n"
+        for event in backlog:
+            yield format_sse(event)
+
+        while not await is_disconnected():
+            try:
+                event = await asyncio.wait_for(subscriber.queue.get(), EVENT_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            if event is None:
+                break
+            yield format_sse(event)
+    finally:
+        event_bus.unsubscribe(subscriber)
+
+
+def publish(event_type: str, data: dict) -> None:
+    try:
+        event_bus.publish(event_type, data, current_branch.get())
+    except Exception:
+        logger.exception("Failed to publish event type=%s", event_type)
+
+
+def publish_catalog_change(entity: str, action: str, entity_id: int, data: dict | None = None) -> None:
+    publish(
+        "catalog.changed",
+        {"entity": entity, "action": action, "id": entity_id, "data": data},
+    )
@@ -1,6 +1,8 @@
 import logging
 from app.data import genre_repo
 from app.models.genre import Genre
+from app.service.events import publish_catalog_change
+from app.service.audit_service import record_change
 
 logger = logging.getLogger(__name__)
 
@@ -10,6 +12,8 @@ class GenreService:
         self._validate_non_empty_string(payload.name, "Name")
         genre = genre_repo.create_genre(payload.name)
         logger.info("Created genre name=%s", payload.name)
+        publish_catalog_change("genre", "created", genre["id"], genre)
+        record_change("genre", "created", genre["id"], after=genre)
         return genre
 
     def list_genres(self, page: int, limit: int) -> list[dict]:
@@ -25,15 +29,20 @@ class GenreService:
     def update_genre(self, genre_id: int, payload: Genre) -> dict | None:
         self._genre_name_exists(payload.name, genre_id)
         self._validate_non_empty_string(payload.name, "Name")
-        genre = genre_repo.update_genre(genre_id, payload.name)
+        before, genre = genre_repo.update_genre(genre_id, payload.name)
         logger.info("Updated genre name=%s", payload.name)
+        if genre:
+            publish_catalog_change("genre", "updated", genre_id, genre)
+            record_change("genre", "updated", genre_id, before, genre)
         return genre
 
     def delete_genre(self, genre_id: int) -> bool:
-        self._genre_with_books(genre_id)
-        genre = genre_repo.delete_genre(genre_id)
+        before = genre_repo.delete_genre(genre_id)
         logger.info("Deleted genre successfully")
-        return genre
+        if before:
+            publish_catalog_change("genre", "deleted", genre_id)
+            record_change("genre", "deleted", genre_id, before=before)
+        return before is not None
 
     @staticmethod
     def _genre_exists(name: str) -> None:
@@ -49,11 +58,6 @@ class GenreService:
             if genre["name"].lower() == name.lower() and genre["id"] != genre_id:
                 raise ValueError("Genre with this name already exists.")
 
-    @staticmethod
-    def _genre_with_books(genre_id: int) -> None:
-        if genre_repo.has_books(genre_id):
-            raise ValueError("Cannot delete genre with existing books")
-
     @staticmethod
     def _validate_non_empty_string(value: str, field_name: str) -> None:
         if not value.strip():
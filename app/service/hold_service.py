@@ -0,0 +1,55 @@
+import logging
+from app.data import book_repo, hold_repo, loan_repo, member_repo
+from app.service.events import publish
+
+logger = logging.getLogger(__name__)
+
+
+class HoldService:
+    def place_hold(self, book_id: int, member_id: int) -> dict:
+        self._ensure_book_exists(book_id)
+        self._ensure_member_exists(member_id)
+        self._validate_hold(book_id, member_id)
+        hold = hold_repo.create_hold(book_id, member_id)
+        logger.info("Placed hold for book '%s' by member '%s'", hold["book_title"], hold["member_name"])
+        publish("hold.placed", {"hold": hold})
+        return hold
+
+    def list_holds(self, book_id: int) -> list[dict]:
+        self._ensure_book_exists(book_id)
+        return hold_repo.list_book_holds(book_id)
+
+    def cancel_hold(self, hold_id: int) -> dict:
+        hold, promoted = hold_repo.cancel_hold(hold_id)
+        if not hold:
+            raise ValueError("Hold not found")
+        logger.info("Cancelled hold id=%s", hold_id)
+        publish("hold.cancelled", {"hold": hold})
+        if promoted:
+            notify_hold_ready(promoted)
+        return hold
+
+    @staticmethod
+    def _validate_hold(book_id: int, member_id: int) -> None:
+        if loan_repo.has_active_loan(book_id, member_id):
+            raise ValueError("Member already has this book")
+        if hold_repo.has_open_hold(book_id, member_id):
+            raise ValueError("Member already has a hold on this book")
+        available, reserved = hold_repo.reserved_copies(book_id, member_id)
+        if available - reserved > 0:
+            raise ValueError("Book is available; borrow it instead")
+
+    @staticmethod
+    def _ensure_book_exists(book_id: int) -> None:
+        if not book_repo.get_book(book_id):
+            raise ValueError("Book not found")
+
+    @staticmethod
+    def _ensure_member_exists(member_id: int) -> None:
+        if not member_repo.get_member(member_id):
+            raise ValueError("Please select a valid member.")
+
+
+def notify_hold_ready(hold: dict) -> None:
+    logger.info("Hold id=%s for member '%s' is ready", hold["id"], hold["member_name"])
+    publish("hold.ready", {"hold": hold})
@@ -0,0 +1,207 @@
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+
+from app.config import (
+    BACKUP_INTERVAL_SECONDS,
+    JOB_HISTORY_DAYS,
+    JOB_LEASE_SECONDS,
+    JOB_POLL_SECONDS,
+    JOB_RETRY_BASE_SECONDS,
+    REPLICA_REFRESH_SECONDS,
+)
+from app.data import idempotency_repo, job_repo, loan_repo, maintenance_repo
+from app.data.backends import get_backend, refresh_snapshots
+from app.data.db import fan_out, use_branch
+from app.service.backup_service import BackupService
+from app.service.events import publish
+from app.service.loan_service import LoanService
+
+logger = logging.getLogger(__name__)
+
+
+def _now() -> datetime:
+    return datetime.utcnow()
+
+
+def _iso(value: datetime) -> str:
+    return value.isoformat(timespec="seconds")
+
+
+def on_every_branch(run):
+    def run_everywhere() -> str:
+        results = [run()]
+        results += [f"{branch}: {result}" for branch, result in fan_out(run).items()]
+        return "; ".join(results)
+
+    return run_everywhere
+
+
+def optimize_database() -> str:
+    maintenance_repo.optimize_database()
+    return "ANALYZE and PRAGMA optimize completed"
+
+
+def vacuum_database() -> str:
+    before = maintenance_repo.database_size()
+    maintenance_repo.vacuum_database()
+    after = maintenance_repo.database_size()
+    return f"Database size {before} -> {after} bytes"
+
+
+def archive_loans() -> str:
+    archived = LoanService().archive_returned_loans()
+    return f"Archived {archived} returned loans"
+
+
+def sweep_overdue_loans() -> str:
+    loans = loan_repo.overdue_loans()
+    publish(
+        "loans.overdue",
+        {"count": len(loans), "loan_ids": [loan["loan_id"] for loan in loans]},
+    )
+    return f"{len(loans)} overdue loans"
+
+
+def refresh_read_replicas() -> str:
+    refreshed = refresh_snapshots()
+    return f"Refreshed {refreshed} snapshot replicas"
+
+
+def prune_job_history() -> str:
+    removed = job_repo.prune_job_runs(_iso(_now() - timedelta(days=JOB_HISTORY_DAYS)))
+    return f"Removed {removed} job runs"
+
+
+def backup_database() -> str:
+    if get_backend().name != "sqlite":
+        return "Skipped: online backups need the sqlite backend"
+    backup = BackupService().create_backup()
+    return f"Backed up {backup['size_bytes']} bytes to {backup['name']} in {backup['elapsed_seconds']}s"
+
+
+def prune_idempotency_keys() -> str:
+    removed = idempotency_repo.prune_expired()
+    return f"Removed {removed} expired idempotency keys"
+
+
+JOBS = {
+    "optimize_database": {"run": on_every_branch(optimize_database), "interval": 3600, "delay": 60, "max_retries": 3},
+    "vacuum_database": {"run": on_every_branch(vacuum_database), "interval": 7 * 86400, "delay": 86400, "max_retries": 3},
+    "archive_loans": {"run": on_every_branch(archive_loans), "interval": 86400, "delay": 3600, "max_retries": 3},
+    "overdue_sweep": {"run": on_every_branch(sweep_overdue_loans), "interval": 3600, "delay": 60, "max_retries": 3},
+    "refresh_read_replicas": {"run": refresh_read_replicas, "interval": REPLICA_REFRESH_SECONDS, "delay": 0, "max_retries": 3},
+    "prune_job_history": {"run": prune_job_history, "interval": 86400, "delay": 3600, "max_retries": 3},
+    "prune_idempotency_keys": {"run": on_every_branch(prune_idempotency_keys), "interval": 3600, "delay": 300, "max_retries": 3},
+    "backup_database": {"run": on_every_branch(backup_database), "interval": BACKUP_INTERVAL_SECONDS, "delay": 3600, "max_retries": 3},
+}
+
+
+class JobRunner:
+    def __init__(self, jobs: dict = JOBS, poll_seconds: float = JOB_POLL_SECONDS):
+        self._jobs = jobs
+        self._poll_seconds = poll_seconds
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def register_jobs(self) -> None:
+        now = _now()
+        for name, job in self._jobs.items():
+            job_repo.register_job(
+                name,
+                job["interval"],
+                job["max_retries"],
+                _iso(now + timedelta(seconds=job["delay"])),
+            )
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self.register_jobs()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="easystock-jobs", daemon=True)
+        self._thread.start()
+        logger.info("Job runner started with %s jobs", len(self._jobs))
+
+    def stop(self, timeout: float = 30) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+        logger.info("Job runner stopped")
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self._poll_seconds):
+            try:
+                self.run_due_jobs()
+            except Exception:
+                logger.exception("Job runner iteration failed")
+
+    def run_due_jobs(self) -> None:
+        now = _now()
+        for job in job_repo.due_jobs(_iso(now)):
+            if self._stop.is_set():
+                return
+            if job["name"] not in self._jobs:
+                continue
+            lease_until = _iso(now + timedelta(seconds=JOB_LEASE_SECONDS))
+            if not job_repo.claim_job(job["name"], job["next_run_at"], lease_until):
+                continue
+            self._run(job)
+
+    def _run(self, job: dict) -> None:
+        name = job["name"]
+        attempt = job["attempts"] + 1
+        run_id = job_repo.start_run(name, attempt)
+        started = time.perf_counter()
+
+        try:
+            result = self._jobs[name]["run"]()
+        except Exception as exc:
+            logger.exception("Job %s failed on attempt %s", name, attempt)
+            job_repo.finish_run(run_id, "failed", None, f"{type(exc).__name__}: {exc}")
+            if attempt <= job["max_retries"]:
+                delay = min(JOB_RETRY_BASE_SECONDS * 2 ** (attempt - 1), job["interval_seconds"])
+                job_repo.reschedule_job(name, _iso(_now() + timedelta(seconds=delay)), attempt, "retrying")
+            else:
+                next_run_at = _iso(_now() + timedelta(seconds=job["interval_seconds"]))
+                job_repo.reschedule_job(name, next_run_at, 0, "failed")
+            return
+
+        job_repo.finish_run(run_id, "succeeded", result, None)
+        next_run_at = _iso(_now() + timedelta(seconds=job["interval_seconds"]))
+        job_repo.reschedule_job(name, next_run_at, 0, "succeeded")
+        logger.info("Job %s finished in %.0f ms: %s", name, (time.perf_counter() - started) * 1000, result)
+
+
+class JobService:
+    def list_jobs(self) -> list[dict]:
+        with use_branch(None):
+            return job_repo.list_jobs()
+
+    def list_job_runs(self, name: str, page: int, limit: int) -> list[dict]:
+        with use_branch(None):
+            self._validate_job(name)
+            offset = (page - 1) * limit
+            return job_repo.list_job_runs(name, limit, offset)
+
+    def count_job_runs(self, name: str) -> int:
+        with use_branch(None):
+            self._validate_job(name)
+            return job_repo.count_job_runs(name)
+
+    def trigger_job(self, name: str) -> dict:
+        with use_branch(None):
+            self._validate_job(name)
+            job_repo.trigger_job(name)
+            logger.info("Triggered job name=%s", name)
+            return job_repo.get_job(name)
+
+    @staticmethod
+    def _validate_job(name: str) -> None:
+        if not job_repo.get_job(name):
+            raise ValueError("Job not found")
+
+
+job_runner = JobRunner()
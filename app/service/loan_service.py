@@ -1,5 +1,9 @@
 import logging
-from app.data import loan_repo, book_repo, member_repo
+from app.config import ARCHIVE_AFTER_DAYS, ARCHIVE_BATCH_SIZE
+from app.data import loan_repo, book_repo, member_repo, archive_repo, hold_repo
+from app.service.events import publish
+from app.service.hold_service import notify_hold_ready
+from app.service.coalescing import coalesce
 
 logger = logging.getLogger(__name__)
 
@@ -9,23 +13,29 @@ class LoanService:
         self._validate_borrow(book_id, member_id)
         self._ensure_member_or_book_exists(book_id, member_id)
         loan = loan_repo.create_loan(book_id, member_id)
+        if not loan:
+            raise ValueError("No copies of this book are available")
         book = book_repo.get_book(book_id)
         member = member_repo.get_member(member_id)
         logger.info("Created a loan for book '%s' to member '%s'", book["title"], member["name"])
+        publish("loan.borrowed", {"loan": loan, "book": book})
         return loan
 
     def return_book(self, loan_id: int) -> dict:
         self._validate_return(loan_id)
-        loan = loan_repo.return_loan(loan_id)
+        loan, hold = loan_repo.return_loan(loan_id)
         logger.info("Returned book successfully")
+        publish("loan.returned", {"loan": loan, "book": book_repo.get_book(loan["book_id"])})
+        if hold:
+            notify_hold_ready(hold)
         return loan
 
     def list_active_loans(self, page: int, limit: int) -> list[dict]:
         offset = (page - 1) * limit
-        return loan_repo.list_loans(active_only=True, limit=limit, offset=offset)
+        return coalesce(loan_repo.list_loans, active_only=True, limit=limit, offset=offset)
 
     def count_active_loans(self) -> int:
-        return loan_repo.count_active_loans()
+        return coalesce(loan_repo.count_active_loans)
 
     def member_history(self, member_id: int, page: int, limit: int) -> list[dict]:
         self._validate_member(member_id)
@@ -37,16 +47,27 @@ class LoanService:
         return loan_repo.count_member_history(member_id)
 
     def overdue_loans(self) -> list[dict]:
-        return loan_repo.overdue_loans()
+        return coalesce(loan_repo.overdue_loans)
 
     def get_active_loans(self, member_id: int) -> list[dict]:
         self._validate_member(member_id)
         return loan_repo.get_active_loans_by_member(member_id)
 
+    def archive_returned_loans(self, older_than_days: int | None = None) -> int:
+        days = ARCHIVE_AFTER_DAYS if older_than_days is None else older_than_days
+        if days < 0:
+            raise ValueError("Archive age cannot be negative.")
+        archived = archive_repo.archive_returned_loans(days, ARCHIVE_BATCH_SIZE)
+        logger.info("Archived %s returned loans older than %s days", archived, days)
+        return archived
+
     @staticmethod
     def _validate_borrow(book_id: int, member_id: int):
         if loan_repo.has_active_loan(book_id, member_id):
             raise ValueError("Member already has an active loan for this book")
+        available, reserved = hold_repo.reserved_copies(book_id, member_id)
+        if reserved and available - reserved <= 0:
+            raise ValueError("Book is reserved for members on the hold queue")
 
     @staticmethod
     def _validate_return(loan_id: int):
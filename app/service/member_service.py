@@ -1,6 +1,10 @@
 import logging
+from app.config import LOOKUP_MAX_IDS
 from app.data import member_repo
 from app.models.member import Member
+from app.service.events import publish_catalog_change
+from app.service.audit_service import record_change
+from app.service.coalescing import coalesce
 
 logger = logging.getLogger(__name__)
 
@@ -11,34 +15,52 @@ class MemberService:
         self._validate_non_empty_string(payload.name, "Name")
         member = member_repo.create_member(payload)
         logger.info("Registered member name=%s", payload.name)
+        publish_catalog_change("member", "created", member["id"], member)
+        record_change("member", "created", member["id"], after=member)
         return member
 
-    def list_members(self, page: int, limit: int) -> list[dict]:
+    def list_members(self, page: int, limit: int, fields: tuple[str, ...] | None = None) -> list[dict]:
         offset = (page - 1) * limit
-        return member_repo.list_members(limit, offset)
+        return coalesce(member_repo.list_members, limit, offset, fields)
 
     def count_members(self) -> int:
-        return member_repo.count_members()
+        return coalesce(member_repo.count_members)
 
     def delete_member(self, member_id: int) -> bool:
-        self._validate_no_active_loans(member_id)
-        deleted = member_repo.delete_member(member_id)
+        before = member_repo.delete_member(member_id)
         logger.info("Deleted member successfully")
-        return deleted
+        if before:
+            publish_catalog_change("member", "deleted", member_id)
+            record_change("member", "deleted", member_id, before=before)
+        return before is not None
 
     def get_member(self, member_id: int) -> dict | None:
         return member_repo.get_member(member_id)
 
-    def update_member(self, member_id: int, payload: Member) -> dict | None:
+    def get_members(self, member_ids: list[int], fields: tuple[str, ...] | None = None) -> list[dict]:
+        return member_repo.get_members(self._validate_ids(member_ids), fields)
+
+    def get_dashboard(self, member_id: int, history_limit: int) -> dict:
+        dashboard = member_repo.member_dashboard(member_id, history_limit)
+        if not dashboard:
+            raise ValueError("Member not found")
+        return dashboard
+
+    def update_member(
+        self, member_id: int, payload: Member, expected_version: int | None = None
+    ) -> dict | None:
         self._ensure_email_unique_update(payload.email, member_id)
         self._validate_email(payload.email)
         self._validate_non_empty_string(payload.name, "Name")
-        member = member_repo.update_member(member_id, payload)
+        before, member = member_repo.update_member(member_id, payload, expected_version)
         logger.info("Updated member name=%s", payload.name)
+        if member:
+            publish_catalog_change("member", "updated", member_id, member)
+            record_change("member", "updated", member_id, before, member)
         return member
 
     def members_with_active_loans(self) -> list[dict]:
-        return member_repo.members_with_active_loans()
+        return coalesce(member_repo.members_with_active_loans)
 
     @staticmethod
     def _validate_email(email: str) -> None:
@@ -61,9 +83,13 @@ class MemberService:
                 raise ValueError("Email already in use.")
 
     @staticmethod
-    def _validate_no_active_loans(member_id: int) -> None:
-        if member_repo.has_active_loans(member_id):
-            raise ValueError("Cannot delete member with active loans")
+    def _validate_ids(ids: list[int]) -> list[int]:
+        ids = list(dict.fromkeys(ids))
+        if not ids:
+            raise ValueError("At least one id is required.")
+        if len(ids) > LOOKUP_MAX_IDS:
+            raise ValueError(f"At most {LOOKUP_MAX_IDS} ids can be requested at once.")
+        return ids
 
     @staticmethod
     def _validate_non_empty_string(value: str, field_name: str) -> None:
@@ -5,6 +5,7 @@ import {
     formatErrorMessage,
     getTotalPages,
     updatePagination,
+    versionHeaders,
 } from "./common.js";
 
 const toast = document.getElementById("toast");
@@ -40,7 +41,7 @@ const renderBooks = (books) => {
     booksBody.innerHTML = "";
 
     if (!books.length) {
-        booksBody.innerHTML = `<tr><td colspan="5">No books found.</td></tr>`;
+        booksBody.innerHTML = `<tr><td colspan="6">No books found.</td></tr>`;
         return;
     }
 
@@ -54,6 +55,7 @@ const renderBooks = (books) => {
         <td>${b.title}</td>
         <td>${b.author}</td>
         <td>${b.genre}</td>
+        <td>${b.available_copies}/${b.total_copies}</td>
         <td>
           <button data-action="edit-book" data-id="${b.id}">Edit</button>
           <button
@@ -301,6 +303,7 @@ const resetForm = (id) => {
     form.reset();
     const idField = form.querySelector("input[name=id]");
     if (idField) idField.value = "";
+    delete form.dataset.version;
     if (id === "book-form" && authorSelect?.options.length) {
         authorSelect.selectedIndex = 0;
         genreSelect.selectedIndex = 0;
@@ -310,6 +313,7 @@ const resetForm = (id) => {
 const fillBookForm = (b) => {
     const f = document.getElementById("book-form");
     f.id.value = b.id;
+    f.dataset.version = b.version ?? "";
     f.title.value = b.title;
     f.isbn.value = b.isbn;
     if (b.genre_id) {
@@ -335,6 +339,7 @@ const fillGenreForm = (g) => {
 const fillAuthorForm = (a) => {
     const f = document.getElementById("author-form");
     f.id.value = a.id;
+    f.dataset.version = a.version ?? "";
     f.name.value = a.name;
     f.birth_year.value = a.birth_year ?? "";
 };
@@ -353,6 +358,7 @@ const saveBook = async (e) => {
     const id = f.id.value;
     const res = await api(id ? `/books/${id}` : "/books", {
         method: id ? "PUT" : "POST",
+        headers: versionHeaders(f),
         body: JSON.stringify(payload),
     });
 
@@ -407,6 +413,7 @@ const saveAuthor = async (e) => {
     const id = f.id.value;
     const res = await api(id ? `/authors/${id}` : "/authors", {
         method: id ? "PUT" : "POST",
+        headers: versionHeaders(f),
         body: JSON.stringify(payload),
     });
 
@@ -1,5 +1,9 @@
+const branchMatch = window.location.pathname.match(/^\/b\/([a-z0-9][a-z0-9_-]{0,31})\//i);
+
+export const API_BASE = branchMatch ? `/b/${branchMatch[1]}/api` : "/api";
+
 export const api = async (path, options = {}) => {
-    const res = await fetch(`/api${path}`, {
+    const res = await fetch(`${API_BASE}${path}`, {
         headers: {"Content-Type": "application/json"},
         ...options,
     });
@@ -37,6 +41,12 @@ export const createToast = (toastElement) => {
     return {showToast};
 };
 
+export const versionHeaders = (form) => {
+    const headers = {"Content-Type": "application/json"};
+    if (form.dataset.version) headers["If-Match"] = `"${form.dataset.version}"`;
+    return headers;
+};
+
 export const formatSuccessMessage = (res) => res?.data?.message ?? "";
 
 export const formatErrorMessage = (detail, label = "item") => {
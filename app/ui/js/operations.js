@@ -1,10 +1,12 @@
 import {
+    API_BASE,
     api,
     createToast,
     formatSuccessMessage,
     formatErrorMessage,
     getTotalPages,
     updatePagination,
+    versionHeaders,
 } from "./common.js";
 
 const toast = document.getElementById("toast");
@@ -22,6 +24,7 @@ const historyMemberSelect = document.getElementById("history-member");
 const borrowSubmitButton = document.querySelector(
     "#borrow-form button[type=submit]"
 );
+const placeHoldButton = document.getElementById("place-hold");
 
 const membersPagination = document.getElementById("members-pagination");
 const loansPagination = document.getElementById("loans-pagination");
@@ -38,10 +41,18 @@ let overduePage = 1;
 let currentHistoryMemberId = null;
 
 let overdueLoansData = [];
+let loansPageData = [];
+let loansTotal = 0;
+let historyPageData = [];
+let historyTotal = 0;
+let membersPageData = [];
+let membersTotal = 0;
+let memberOptions = [];
 
 const membersById = new Map();
 const booksById = new Map();
 let allBooks = [];
+let eventsConnected = false;
 
 
 const formatOperationsError = (detail, label = "member") =>
@@ -76,6 +87,10 @@ const updateBorrowButtonState = () => {
     const hasSelections = Boolean(bookId && memberId);
     borrowSubmitButton.disabled = !hasSelections || Boolean(book && isBorrowed);
     borrowSubmitButton.title = isBorrowed ? "Book is already borrowed." : "";
+    if (placeHoldButton) {
+        placeHoldButton.disabled = !hasSelections || !isBorrowed;
+        placeHoldButton.title = isBorrowed ? "" : "Holds can only be placed on borrowed books.";
+    }
 };
 
 
@@ -85,6 +100,7 @@ const resetForm = (id) => {
     form.reset();
     const idField = form.querySelector("input[name=id]");
     if (idField) idField.value = "";
+    delete form.dataset.version;
 };
 
 
@@ -197,10 +213,22 @@ const loadBooksOptions = async () => {
     updateBorrowButtonState();
 };
 
+const compareNames = (a, b) => (a.name < b.name ? -1 : a.name > b.name ? 1 : 0);
+
+const renderMemberOptions = () => {
+    const borrowSelected = borrowMemberSelect.value;
+    const historySelected = historyMemberSelect.value;
+    setSelectOptions(borrowMemberSelect, memberOptions, (m) => m.name, "Select member");
+    setSelectOptions(historyMemberSelect, memberOptions, (m) => m.name, "Select member");
+    borrowMemberSelect.value = borrowSelected;
+    historyMemberSelect.value = historySelected;
+};
+
 const loadMembersOptions = async () => {
     const r = await api("/members?limit=1000&page=1");
     if (!r.ok) return;
 
+    memberOptions = r.data;
     setSelectOptions(borrowMemberSelect, r.data, (m) => m.name, "Select member");
     setSelectOptions(historyMemberSelect, r.data, (m) => m.name, "Select member");
     borrowGenreSelect.disabled = true;
@@ -269,12 +297,20 @@ const loadMembersPage = async () => {
         return loadMembersPage();
     }
 
-    renderMembers(members.data);
-    updatePagination(membersPagination, memberPage, total, PAGE_SIZE);
+    membersPageData = members.data;
+    membersTotal = total;
+    showMembersPage();
 
     return members;
 };
 
+const showMembersPage = () => {
+    membersById.clear();
+    membersPageData.forEach((m) => membersById.set(m.id, m));
+    renderMembers(membersPageData);
+    updatePagination(membersPagination, memberPage, membersTotal, PAGE_SIZE);
+};
+
 const loadLoansPage = async () => {
     const r = await api(`/loans/active?limit=${PAGE_SIZE}&page=${loanPage}`);
     if (!r.ok) return r;
@@ -286,11 +322,17 @@ const loadLoansPage = async () => {
         return loadLoansPage();
     }
 
-    renderLoans(r.data);
-    updatePagination(loansPagination, loanPage, total, PAGE_SIZE);
+    loansPageData = r.data;
+    loansTotal = total;
+    showLoansPage();
     return r;
 };
 
+const showLoansPage = () => {
+    renderLoans(loansPageData);
+    updatePagination(loansPagination, loanPage, loansTotal, PAGE_SIZE);
+};
+
 const loadHistoryPage = async () => {
     if (!currentHistoryMemberId) {
         historyBody.innerHTML = `<tr><td colspan="4">Select a member.</td></tr>`;
@@ -299,20 +341,38 @@ const loadHistoryPage = async () => {
         return;
     }
 
-    const r = await api(
-        `/members/${currentHistoryMemberId}/history?limit=${HISTORY_PAGE_SIZE}&page=${historyPage}`
-    );
-    if (!r.ok) return r;
+    let items;
+    let total;
+    if (historyPage === 1) {
+        const r = await api(
+            `/members/${currentHistoryMemberId}/dashboard?history_limit=${HISTORY_PAGE_SIZE}`
+        );
+        if (!r.ok) return r;
+        items = r.data.history;
+        total = r.data.history_total;
+    } else {
+        const r = await api(
+            `/members/${currentHistoryMemberId}/history?limit=${HISTORY_PAGE_SIZE}&page=${historyPage}`
+        );
+        if (!r.ok) return r;
+        items = r.data;
+        total = r.total ?? 0;
+    }
 
-    const total = r.total ?? 0;
     const totalPages = getTotalPages(total, HISTORY_PAGE_SIZE);
     if (historyPage > totalPages) {
         historyPage = totalPages;
         return loadHistoryPage();
     }
 
-    renderHistory(r.data);
-    updatePagination(historyPagination, historyPage, total, HISTORY_PAGE_SIZE);
+    historyPageData = items;
+    historyTotal = total;
+    showHistoryPage();
+};
+
+const showHistoryPage = () => {
+    renderHistory(historyPageData);
+    updatePagination(historyPagination, historyPage, historyTotal, HISTORY_PAGE_SIZE);
 };
 
 const loadOverdueLoans = async () => {
@@ -328,6 +388,196 @@ const reloadMembers = async () => {
     await loadMembersPage();
 };
 
+const applyBookChange = (book) => {
+    if (!book) return;
+    const index = allBooks.findIndex((b) => b.id === book.id);
+    if (index >= 0) allBooks[index] = book;
+    else allBooks.push(book);
+    booksById.set(book.id, book);
+};
+
+const removeBook = (id) => {
+    allBooks = allBooks.filter((b) => b.id !== id);
+    booksById.delete(id);
+};
+
+const refreshBorrowBooksKeepingSelection = () => {
+    const selected = borrowBookSelect.value;
+    refreshBorrowBooks();
+    if (selected && booksById.has(Number(selected))) {
+        borrowBookSelect.value = selected;
+    }
+    updateBorrowButtonState();
+};
+
+const adjustMemberLoans = (memberId, delta) => {
+    const member = membersById.get(memberId);
+    if (!member) return;
+    member.active_loans = Math.max(0, member.active_loans + delta);
+    showMembersPage();
+};
+
+// Events carry the changed rows, so the loaded pages are patched in place. A page is only fetched again when a
+// change shifts rows in from a page that is not loaded.
+const applyLoanBorrowed = async (loan) => {
+    loansTotal += 1;
+    if (loanPage > 1) {
+        await loadLoansPage();
+    } else {
+        loansPageData = [loan, ...loansPageData].slice(0, PAGE_SIZE);
+        showLoansPage();
+    }
+
+    if (String(loan.member_id) !== String(currentHistoryMemberId)) return;
+    historyTotal += 1;
+    if (historyPage > 1) {
+        await loadHistoryPage();
+    } else {
+        const row = {
+            loan_id: loan.id,
+            book_id: loan.book_id,
+            book_title: loan.book_title,
+            loan_date: loan.loan_date,
+            return_date: null,
+        };
+        historyPageData = [row, ...historyPageData].slice(0, HISTORY_PAGE_SIZE);
+        showHistoryPage();
+    }
+};
+
+const applyLoanReturned = async (loan) => {
+    loansTotal = Math.max(0, loansTotal - 1);
+    const loaded = loansPageData.some((l) => l.id === loan.id);
+    const newer = loansPageData.length && loan.loan_date > loansPageData[0].loan_date;
+    loansPageData = loansPageData.filter((l) => l.id !== loan.id);
+    const shown = (loanPage - 1) * PAGE_SIZE + loansPageData.length;
+    const emptied = !loansPageData.length && loanPage > 1;
+    if ((loaded && loansTotal > shown) || (!loaded && newer && loanPage > 1) || emptied) {
+        await loadLoansPage();
+    } else {
+        showLoansPage();
+    }
+
+    const row = historyPageData.find((r) => r.loan_id === loan.id);
+    if (row) {
+        row.return_date = loan.return_date;
+        showHistoryPage();
+    }
+};
+
+const applyMemberChange = async (action, id, member) => {
+    const known = memberOptions.find((m) => m.id === id);
+    if (action === "deleted") {
+        memberOptions = memberOptions.filter((m) => m.id !== id);
+    } else if (known) {
+        Object.assign(known, member);
+        memberOptions.sort(compareNames);
+    } else {
+        memberOptions = [...memberOptions, member].sort(compareNames);
+    }
+    renderMemberOptions();
+
+    const loaded = membersById.get(id);
+    if (action === "updated") {
+        if (loaded) {
+            Object.assign(loaded, member);
+            showMembersPage();
+        }
+        return;
+    }
+
+    const first = membersPageData[0];
+    const before = first && compareNames(member ?? known ?? {}, first) < 0;
+    if (action === "created") {
+        membersTotal += 1;
+        const last = membersPageData[membersPageData.length - 1];
+        if (before && memberPage > 1) {
+            await loadMembersPage();
+            return;
+        }
+        if (!last || compareNames(member, last) < 0 || membersPageData.length < PAGE_SIZE) {
+            const row = {...member, active_loans: 0};
+            membersPageData = [...membersPageData, row].sort(compareNames).slice(0, PAGE_SIZE);
+        }
+        showMembersPage();
+        return;
+    }
+
+    membersTotal = Math.max(0, membersTotal - 1);
+    membersPageData = membersPageData.filter((m) => m.id !== id);
+    const shown = (memberPage - 1) * PAGE_SIZE + membersPageData.length;
+    const emptied = !membersPageData.length && memberPage > 1;
+    if ((loaded && membersTotal > shown) || (!loaded && before && memberPage > 1) || emptied) {
+        await loadMembersPage();
+    } else {
+        showMembersPage();
+    }
+};
+
+const onLoanEvent = async (data, delta) => {
+    applyBookChange(data.book);
+    refreshBorrowBooksKeepingSelection();
+    adjustMemberLoans(data.loan.member_id, delta);
+
+    if (delta < 0) {
+        overdueLoansData = overdueLoansData.filter((o) => o.loan_id !== data.loan.id);
+        overduePage = Math.min(
+            overduePage,
+            getTotalPages(overdueLoansData.length, HISTORY_PAGE_SIZE)
+        );
+        renderOverduePage();
+    }
+
+    if (delta > 0) await applyLoanBorrowed(data.loan);
+    else await applyLoanReturned(data.loan);
+};
+
+const onCatalogChange = async ({entity, action, id, data}) => {
+    if (entity === "book") {
+        if (action === "deleted") removeBook(id);
+        else applyBookChange(data);
+        refreshBorrowBooksKeepingSelection();
+    }
+
+    if (entity === "genre") {
+        const selectedGenre = borrowGenreSelect.value;
+        await loadGenreOptions();
+        borrowGenreSelect.disabled = !borrowMemberSelect.value;
+        borrowGenreSelect.value = selectedGenre;
+        refreshBorrowBooksKeepingSelection();
+    }
+
+    if (entity === "member") {
+        await applyMemberChange(action, id, data);
+    }
+};
+
+const subscribeToEvents = () => {
+    if (!window.EventSource) return;
+
+    const source = new EventSource(`${API_BASE}/events`);
+    source.onopen = () => {
+        eventsConnected = true;
+    };
+    source.onerror = () => {
+        eventsConnected = false;
+    };
+    source.addEventListener("loan.borrowed", (e) =>
+        onLoanEvent(JSON.parse(e.data), 1)
+    );
+    source.addEventListener("loan.returned", (e) =>
+        onLoanEvent(JSON.parse(e.data), -1)
+    );
+    source.addEventListener("catalog.changed", (e) =>
+        onCatalogChange(JSON.parse(e.data))
+    );
+    source.addEventListener("loans.overdue", () => loadOverdueLoans());
+    source.addEventListener("hold.ready", (e) => {
+        const {hold} = JSON.parse(e.data);
+        showToast(`${hold.book_title} is ready for ${hold.member_name}.`, false);
+    });
+};
+
 const reloadLoans = async () => {
     await loadLoansPage();
     await loadOverdueLoans();
@@ -346,6 +596,7 @@ const saveMember = async (e) => {
 
     const r = await api(id ? `/members/${id}` : "/members", {
         method: id ? "PUT" : "POST",
+        headers: versionHeaders(f),
         body: JSON.stringify(payload),
     });
 
@@ -353,8 +604,10 @@ const saveMember = async (e) => {
         resetForm("member-form");
         const message = formatSuccessMessage(r);
         showToast(message, false);
-        await loadMembersOptions();
-        await reloadMembers();
+        if (!eventsConnected) {
+            await loadMembersOptions();
+            await reloadMembers();
+        }
     } else {
         const message = formatOperationsError(r.data?.detail, "member");
         showToast(message, true);
@@ -381,25 +634,46 @@ const borrowBook = async (e) => {
     if (r.ok) {
         const message = formatSuccessMessage(r);
         showToast(message, false);
-        await reloadLoans();
-        await loadMembersOptions();
-        await reloadMembers();
-        await reloadBooks();
+        if (!eventsConnected) {
+            await reloadLoans();
+            await reloadMembers();
+        }
     } else {
         const message = formatOperationsError(r.data?.detail, "borrow");
         showToast(message, true);
     }
 };
 
+const placeHold = async () => {
+    const bookId = Number(borrowBookSelect.value);
+    const memberId = Number(borrowMemberSelect.value);
+    if (!bookId || !memberId) {
+        showToast("Please select a member, genre, and book.", true);
+        return;
+    }
+
+    const r = await api(`/books/${bookId}/holds`, {
+        method: "POST",
+        body: JSON.stringify({member_id: memberId}),
+    });
+
+    if (r.ok) {
+        showToast(formatSuccessMessage(r), false);
+    } else {
+        showToast(formatOperationsError(r.data?.detail, "hold"), true);
+    }
+};
+
 const returnBook = async (id) => {
     if (!window.confirm("Return this book?")) return;
     const r = await api(`/loans/${id}/return`, {method: "POST"});
     if (r.ok) {
         const message = formatSuccessMessage(r);
         showToast(message, false);
-        await reloadLoans();
-        await reloadMembers();
-        await reloadBooks();
+        if (!eventsConnected) {
+            await reloadLoans();
+            await reloadMembers();
+        }
     } else {
         const message = formatOperationsError(r.data?.detail, "return");
         showToast(message, true);
@@ -417,6 +691,7 @@ membersBody.addEventListener("click", async (e) => {
         const m = membersById.get(id);
         const f = document.getElementById("member-form");
         f.id.value = m.id;
+        f.dataset.version = m.version ?? "";
         f.name.value = m.name;
         f.email.value = m.email;
     }
@@ -428,8 +703,10 @@ membersBody.addEventListener("click", async (e) => {
             resetForm("member-form");
             const message = formatSuccessMessage(r);
             showToast(message, false);
-            await reloadMembers();
-            await loadMembersOptions();
+            if (!eventsConnected) {
+                await reloadMembers();
+                await loadMembersOptions();
+            }
         } else {
             const message = formatOperationsError(r.data?.detail, "member");
             showToast(message, true);
@@ -488,6 +765,7 @@ document.getElementById("reset-member").addEventListener("click", () => {
     showToast("", false);
 });
 document.getElementById("borrow-form").addEventListener("submit", borrowBook);
+placeHoldButton?.addEventListener("click", placeHold);
 borrowMemberSelect.addEventListener("change", () => {
     const hasMember = Boolean(borrowMemberSelect.value);
     borrowGenreSelect.disabled = !hasMember;
@@ -511,4 +789,5 @@ document.getElementById("history-form").addEventListener("submit", (e) => {
     await loadLoansPage();
     await loadOverdueLoans();
     await loadHistoryPage();
+    subscribeToEvents();
 })();
@@ -0,0 +1,31 @@
+import os
+import tempfile
+
+import pytest
+from fastapi.testclient import TestClient
+
+_data_dir = tempfile.mkdtemp(prefix="easystock-tests-")
+os.environ.setdefault("EASYSTOCK_DB_BACKEND", "sqlite")
+os.environ.setdefault("EASYSTOCK_DB_PATH", os.path.join(_data_dir, "easystock.db"))
+os.environ.setdefault("EASYSTOCK_BACKUP_DIR", os.path.join(_data_dir, "backups"))
+os.environ.setdefault("EASYSTOCK_JOBS_ENABLED", "0")
+os.environ.setdefault("EASYSTOCK_ADMISSION_CONTROL", "0")
+
+from app.data import backends  # noqa: E402
+from app.data.backends.sqlite import SQLiteBackend  # noqa: E402
+from app.data.db import init_db  # noqa: E402
+from app.main import create_app  # noqa: E402
+
+
+@pytest.fixture
+def backend(tmp_path, monkeypatch):
+    backend = SQLiteBackend(tmp_path / "easystock.db")
+    monkeypatch.setattr(backends, "_backend", backend)
+    monkeypatch.setattr(backends, "_replicas", [])
+    return backend
+
+
+@pytest.fixture
+def client(backend):
+    init_db(seed=False)
+    return TestClient(create_app())
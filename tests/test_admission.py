@@ -0,0 +1,38 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.admission import AdmissionControlMiddleware, classify
+
+LIMITS = {
+    route_class: {"rate": 0.1, "burst": 2, "concurrency": 4, "queue": 4}
+    for route_class in ("cheap", "heavy", "writes")
+}
+
+
+def test_client_over_its_rate_gets_429_with_retry_after():
+    api = FastAPI()
+
+    @api.get("/api/books")
+    def books() -> list:
+        return []
+
+    @api.post("/api/books")
+    def create_book() -> dict:
+        return {}
+
+    api.add_middleware(AdmissionControlMiddleware, limits=LIMITS)
+    client = TestClient(api)
+
+    assert [client.get("/api/books").status_code for _ in range(2)] == [200, 200]
+    rejected = client.get("/api/books")
+    assert rejected.status_code == 429
+    assert rejected.headers["retry-after"] == "10"
+    assert rejected.json() == {"detail": "Too many requests, slow down."}
+    assert client.post("/api/books").status_code == 200
+
+
+def test_reports_and_large_pages_are_heavy():
+    assert classify("GET", "/api/reports/top-books", b"") == "heavy"
+    assert classify("GET", "/api/books", b"limit=500") == "heavy"
+    assert classify("GET", "/api/books", b"limit=10") == "cheap"
+    assert classify("DELETE", "/api/books/1", b"") == "writes"
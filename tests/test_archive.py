@@ -0,0 +1,40 @@
+from datetime import datetime, timezone
+
+from app.data.archive_repo import list_archive_tables
+from app.data.db import init_db
+from app.service.loan_service import LoanService
+
+
+def epoch(year: int, month: int = 1) -> int:
+    return int(datetime(year, month, 1, tzinfo=timezone.utc).timestamp())
+
+
+def test_returned_loans_move_to_their_year_and_stay_in_history(backend):
+    init_db(seed=False)
+    with backend.connect() as conn:
+        book_id = conn.execute("INSERT INTO books (title, isbn) VALUES ('Dune', '9780441172719')").lastrowid
+        member_id = conn.execute(
+            "INSERT INTO members (name, email, registered_at) VALUES ('Ana', 'ana@example.com', 0)"
+        ).lastrowid
+        conn.executemany(
+            "INSERT INTO loans (book_id, member_id, loan_date, return_date) VALUES (?, ?, ?, ?)",
+            [
+                (book_id, member_id, epoch(2020), epoch(2020, 2)),
+                (book_id, member_id, epoch(2021), epoch(2021, 2)),
+                (book_id, member_id, epoch(2024), None),
+            ],
+        )
+        conn.commit()
+
+    loans = LoanService()
+    assert loans.archive_returned_loans(older_than_days=30) == 2
+    assert loans.archive_returned_loans(older_than_days=30) == 0
+
+    with backend.connect() as conn:
+        assert list_archive_tables(conn) == ["loans_archive_2021", "loans_archive_2020"]
+        assert [row[0] for row in conn.execute("SELECT loan_date FROM loans")] == [epoch(2024)]
+
+    history = loans.member_history(member_id, page=1, limit=10)
+    assert [loan["loan_id"] for loan in history] == [3, 2, 1]
+    assert loans.count_member_history(member_id) == 3
+    assert [loan["loan_id"] for loan in loans.member_history(member_id, page=2, limit=2)] == [1]
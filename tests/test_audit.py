@@ -0,0 +1,41 @@
+import pytest
+
+from app.data import backends
+from app.data.backends import refresh_snapshots
+from app.data.backends.sqlite import SQLiteBackend
+from app.data.db import init_db
+from app.data.errors import VersionConflictError
+from app.models.author import Author
+from app.service.audit_service import AuditService, audit_buffer
+from app.service.author_service import AuthorService
+
+
+def test_entries_are_read_from_the_primary_after_a_flush(backend, tmp_path, monkeypatch):
+    init_db(seed=False)
+    monkeypatch.setattr(backends, "_replicas", [SQLiteBackend(tmp_path / "replica.db", read_only=True)])
+    assert refresh_snapshots() == 1
+
+    audit_buffer.record("member", "created", 7, None, {"id": 7, "name": "Ana"})
+    entries = AuditService().list_entries("member", 7, None, page=1, limit=10)
+
+    assert [(entry["entity_id"], entry["action"]) for entry in entries] == [(7, "created")]
+    assert AuditService().count_entries("member", 7, None) == 1
+
+
+def test_update_and_delete_record_the_row_read_in_the_write(backend):
+    init_db(seed=False)
+    service = AuthorService()
+    author = service.create_author(Author(name="Ana Blandiana", birth_year=1942))
+    updated = service.update_author(author["id"], Author(name="Ana Blandiana", birth_year=1943), author["version"])
+    with pytest.raises(VersionConflictError):
+        service.update_author(author["id"], Author(name="Ana", birth_year=1942), author["version"])
+    assert service.delete_author(author["id"]) is True
+    assert service.delete_author(author["id"]) is False
+    audit_buffer.flush()
+
+    entries = AuditService().list_entries("author", author["id"], None, page=1, limit=10)
+    assert [(entry["action"], entry["before"], entry["after"]) for entry in entries] == [
+        ("deleted", updated, None),
+        ("updated", author, updated),
+        ("created", None, author),
+    ]
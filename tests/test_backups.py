@@ -0,0 +1,41 @@
+import sqlite3
+import threading
+import time
+
+from app.data import backup_repo
+from app.data.db import init_db
+from app.service.backup_service import BackupService
+from app.service.member_service import MemberService
+
+READ_BUDGET_SECONDS = 0.5
+
+
+def test_reads_continue_while_a_backup_runs(backend, tmp_path, monkeypatch):
+    init_db(seed=False)
+    with backend.connect() as conn:
+        conn.executemany(
+            "INSERT INTO members (name, email, registered_at) VALUES (?, ?, 0)",
+            ((f"Member {i} " + "x" * 40, f"member{i}@example.com") for i in range(50000)),
+        )
+        conn.commit()
+    monkeypatch.setattr(backup_repo, "BACKUP_DIR", tmp_path / "backups")
+    monkeypatch.setattr(backup_repo, "BACKUP_PAGES_PER_STEP", 16)
+    monkeypatch.setattr(backup_repo, "BACKUP_STEP_SLEEP_MS", 2)
+
+    backups = []
+    worker = threading.Thread(target=lambda: backups.append(BackupService().create_backup()))
+    worker.start()
+    reads = []
+    while worker.is_alive():
+        started = time.perf_counter()
+        MemberService().list_members(page=1, limit=50)
+        reads.append(time.perf_counter() - started)
+    worker.join()
+
+    assert len(reads) >= 5
+    assert max(reads) < READ_BUDGET_SECONDS
+    backup = sqlite3.connect(tmp_path / "backups" / backups[0]["name"])
+    try:
+        assert backup.execute("SELECT COUNT(*) FROM members").fetchone()[0] == 50000
+    finally:
+        backup.close()
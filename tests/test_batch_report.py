@@ -0,0 +1,39 @@
+import pytest
+
+from app.data import backends
+from app.data.db import init_db
+from app.service.batch_report_service import BatchReportService
+
+pytest.importorskip("numpy")
+
+
+def insert_loans(loans):
+    with backends.get_backend().connect() as conn:
+        book_id = conn.execute("INSERT INTO books (title, isbn) VALUES ('Dune', '9780441172719')").lastrowid
+        member_id = conn.execute(
+            "INSERT INTO members (name, email, registered_at) VALUES ('Ana', 'ana@example.com', 0)"
+        ).lastrowid
+        conn.executemany(
+            "INSERT INTO loans (book_id, member_id, loan_date, return_date) VALUES (?, ?, ?, ?)",
+            [(book_id, member_id, loan_date, return_date) for loan_date, return_date in loans],
+        )
+        conn.commit()
+
+
+def test_loan_days_come_from_returned_loans(backend):
+    init_db(seed=False)
+    insert_loans([(0, 2 * 86400), (0, 4 * 86400), (0, None)])
+
+    report = BatchReportService(chunk_size=2).loan_statistics()
+
+    assert (report["loans"], report["active"], report["returned"]) == (3, 1, 2)
+    assert report["loan_days"]["mean"] == 3.0
+    assert report["loan_days"]["max"] == 4
+
+
+def test_return_before_loan_is_rejected(backend):
+    init_db(seed=False)
+    insert_loans([(86400, 2 * 86400), (5 * 86400, 86400)])
+
+    with pytest.raises(ValueError, match="returned before they were borrowed: 2$"):
+        BatchReportService().loan_statistics()
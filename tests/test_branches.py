@@ -0,0 +1,32 @@
+import pytest
+
+from app.data import backends
+from app.data.db import provision_branch
+
+
+@pytest.fixture
+def north(client, tmp_path, monkeypatch):
+    monkeypatch.setattr(backends, "BRANCH_DIR", tmp_path / "branches")
+    monkeypatch.setattr(backends, "_shards", {})
+    (tmp_path / "branches").mkdir()
+    provision_branch("north")
+    return client
+
+
+def names(response) -> list[str]:
+    return [member["name"] for member in response.json()]
+
+
+def test_requests_go_to_their_branch_shard(north):
+    client = north
+    client.post("/api/members", json={"name": "Ana", "email": "ana@example.com"})
+    client.post("/b/north/api/members", json={"name": "Bob", "email": "bob@example.com"})
+    client.post("/api/members", json={"name": "Cleo", "email": "cleo@example.com"}, headers={"X-Branch": "North"})
+
+    assert names(client.get("/api/members")) == ["Ana"]
+    assert names(client.get("/b/north/api/members")) == ["Bob", "Cleo"]
+    assert names(client.get("/api/members", headers={"X-Branch": "north"})) == ["Bob", "Cleo"]
+
+    unknown = client.get("/b/south/api/members")
+    assert unknown.status_code == 404
+    assert unknown.json() == {"detail": "Unknown branch: south"}
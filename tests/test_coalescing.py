@@ -0,0 +1,64 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.service.coalescing import SingleFlight
+
+
+class CountingEvent(threading.Event):
+    def __init__(self):
+        super().__init__()
+        self.waiters = 0
+
+    def wait(self, timeout=None):
+        self.waiters += 1
+        return super().wait(timeout)
+
+
+def run_with_followers(flights: SingleFlight, key: tuple, query, started, release, followers: int) -> list:
+    with ThreadPoolExecutor(followers + 1) as pool:
+        futures = [pool.submit(flights.do, key, query)]
+        started.wait(5)
+        done = flights._flights[key].done = CountingEvent()
+        futures += [pool.submit(flights.do, key, query) for _ in range(followers)]
+        while done.waiters < followers:
+            time.sleep(0.001)
+        release.set()
+        return [future.exception() or future.result() for future in futures]
+
+
+def test_concurrent_calls_share_one_result():
+    flights = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def slow_query():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return ["shared"]
+
+    results = run_with_followers(flights, ("books", 1), slow_query, started, release, followers=3)
+
+    assert calls == [1]
+    assert all(result is results[0][0] for result, _ in results)
+    assert [shared for _, shared in results] == [False, True, True, True]
+    assert flights.do(("books", 1), lambda: ["fresh"]) == (["fresh"], False)
+
+
+def test_followers_get_the_leaders_error():
+    flights = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+
+    def failing_query():
+        started.set()
+        release.wait(5)
+        raise RuntimeError("database is locked")
+
+    errors = run_with_followers(flights, ("books",), failing_query, started, release, followers=2)
+
+    assert [str(error) for error in errors] == ["database is locked"] * 3
+    with pytest.raises(RuntimeError):
+        flights.do(("books",), failing_query)
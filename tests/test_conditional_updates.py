@@ -0,0 +1,20 @@
+def test_stale_if_match_is_rejected(client):
+    member = client.post("/api/members", json={"name": "Ana", "email": "ana@example.com"}).json()["data"]
+    url = f"/api/members/{member['id']}"
+    assert member["version"] == 1
+
+    updated = client.put(url, json={"name": "Ana Pop", "email": "ana@example.com"}, headers={"If-Match": '"1"'})
+    assert updated.status_code == 200
+    assert updated.headers["etag"] == '"2"'
+
+    stale = client.put(url, json={"name": "Ana B", "email": "ana@example.com"}, headers={"If-Match": '"1"'})
+    assert stale.status_code == 412
+    assert client.get(f"/api/members?ids={member['id']}").json()[0]["name"] == "Ana Pop"
+
+    malformed = client.put(url, json={"name": "Ana B", "email": "ana@example.com"}, headers={"If-Match": "v2"})
+    assert malformed.status_code == 412
+    unconditional = client.put(url, json={"name": "Ana B", "email": "ana@example.com"})
+    assert unconditional.headers["etag"] == '"3"'
+
+    missing = client.put("/api/members/99", json={"name": "Bob", "email": "bob@example.com"}, headers={"If-Match": '"1"'})
+    assert missing.status_code == 404
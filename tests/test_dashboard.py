@@ -0,0 +1,42 @@
+import pytest
+
+from app.config import LOAN_PERIOD_DAYS
+from app.data.dates import DAY_SECONDS, now_epoch
+from app.data.db import init_db
+from app.service.member_service import MemberService
+
+
+def test_dashboard_combines_active_loans_and_history(backend):
+    init_db(seed=False)
+    now = now_epoch()
+    with backend.connect() as conn:
+        book_id = conn.execute("INSERT INTO books (title, isbn) VALUES ('Dune', '9780441172719')").lastrowid
+        member_id = conn.execute(
+            "INSERT INTO members (name, email, registered_at) VALUES ('Ana', 'ana@example.com', 0)"
+        ).lastrowid
+        conn.executemany(
+            "INSERT INTO loans (book_id, member_id, loan_date, return_date) VALUES (?, ?, ?, ?)",
+            [
+                (book_id, member_id, now - 40 * DAY_SECONDS, None),
+                (book_id, member_id, now - DAY_SECONDS, None),
+                (book_id, member_id, now - 90 * DAY_SECONDS, now - 80 * DAY_SECONDS),
+            ],
+        )
+        conn.commit()
+
+    dashboard = MemberService().get_dashboard(member_id, history_limit=2)
+
+    assert dashboard["member"]["name"] == "Ana"
+    assert [loan["loan_id"] for loan in dashboard["active_loans"]] == [1, 2]
+    assert [loan["is_overdue"] for loan in dashboard["active_loans"]] == [True, False]
+    assert dashboard["active_loans"][0]["days_overdue"] == 40 - LOAN_PERIOD_DAYS
+    assert dashboard["overdue_count"] == 1
+    assert [loan["loan_id"] for loan in dashboard["history"]] == [2, 1]
+    assert dashboard["history_total"] == 3
+
+
+def test_dashboard_of_a_missing_member_is_rejected(backend):
+    init_db(seed=False)
+
+    with pytest.raises(ValueError, match="Member not found"):
+        MemberService().get_dashboard(99, history_limit=5)
@@ -0,0 +1,85 @@
+import asyncio
+
+from app.data.db import init_db, use_branch
+from app.models.book import BookCreate
+from app.models.member import Member
+from app.service import events
+from app.service.book_service import BookService
+from app.service.events import EventBus
+from app.service.loan_service import LoanService
+from app.service.member_service import MemberService
+
+
+def drain(subscriber) -> list[dict]:
+    received = []
+    while not subscriber.queue.empty():
+        received.append(subscriber.queue.get_nowait())
+    return received
+
+
+def test_events_stay_on_their_branch(monkeypatch):
+    bus = EventBus()
+    monkeypatch.setattr(events, "event_bus", bus)
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        main, _ = bus.subscribe(loop)
+        north, _ = bus.subscribe(loop, branch="north")
+        events.publish("loan.borrowed", {"loan": {"id": 1}})
+        with use_branch("north"):
+            events.publish("loan.borrowed", {"loan": {"id": 1}})
+        await asyncio.sleep(0)
+        _, replay = bus.subscribe(loop, last_event_id=0, branch="north")
+        return drain(main), drain(north), replay
+
+    main, north, replay = asyncio.run(run())
+
+    assert [(event["id"], event["branch"]) for event in main] == [(1, None)]
+    assert [(event["id"], event["branch"]) for event in north] == [(2, "north")]
+    assert [event["id"] for event in replay] == [2]
+
+
+def test_stream_replays_events_after_last_event_id(monkeypatch):
+    bus = EventBus()
+    monkeypatch.setattr(events, "event_bus", bus)
+    for loan_id in (1, 2, 3):
+        events.publish("loan.returned", {"loan": {"id": loan_id}})
+
+    async def disconnected() -> bool:
+        return True
+
+    async def run():
+        return [chunk async for chunk in events.event_stream(disconnected, last_event_id=1)]
+
+    assert asyncio.run(run()) == [
+        "retry: 3000\n\n",
+        'id: 2\nevent: loan.returned\ndata: {"loan": {"id": 2}}\n\n',
+        'id: 3\nevent: loan.returned\ndata: {"loan": {"id": 3}}\n\n',
+    ]
+    assert bus.subscriber_count() == 0
+
+
+def test_borrow_and_catalog_changes_are_published(backend, monkeypatch):
+    bus = EventBus()
+    monkeypatch.setattr(events, "event_bus", bus)
+    init_db(seed=False)
+    with backend.connect() as conn:
+        conn.execute("INSERT INTO authors (name) VALUES ('Frank Herbert')")
+        conn.execute("INSERT INTO genres (name) VALUES ('Science fiction')")
+        conn.commit()
+
+    async def run():
+        subscriber, _ = bus.subscribe(asyncio.get_running_loop())
+        member = MemberService().create_member(Member(name="Ana", email="ana@example.com"))
+        book = BookService().create_book(
+            BookCreate(title="Dune", isbn="9780441172719", author_id=1, genre_id=1, copies=1)
+        )
+        LoanService().borrow_book(book["id"], member["id"])
+        await asyncio.sleep(0)
+        return drain(subscriber)
+
+    received = asyncio.run(run())
+
+    assert [event["type"] for event in received] == ["catalog.changed", "catalog.changed", "loan.borrowed"]
+    assert [event["data"]["entity"] for event in received[:2]] == ["member", "book"]
+    assert received[2]["data"]["loan"]["book_id"] == received[1]["data"]["id"]
@@ -0,0 +1,31 @@
+def create_book(client) -> dict:
+    author = client.post("/api/authors", json={"name": "Frank Herbert", "birth_year": 1920}).json()["data"]
+    genre = client.post("/api/genres", json={"name": "Science fiction"}).json()["data"]
+    payload = {"title": "Dune", "isbn": "9780441172719", "author_id": author["id"], "genre_id": genre["id"], "copies": 2}
+    return client.post("/api/books", json=payload).json()["data"]
+
+
+def test_fields_limits_the_returned_columns(client):
+    book = create_book(client)
+
+    listed = client.get("/api/books?fields=title,is_borrowed")
+    assert listed.json() == [{"title": "Dune", "is_borrowed": False}]
+    assert listed.headers["x-total-count"] == "1"
+
+    single = client.get(f"/api/books/{book['id']}?fields=genre, isbn")
+    assert single.json() == {"isbn": "9780441172719", "genre": "Science fiction"}
+    assert single.headers["etag"] == '"1"'
+
+    client.post("/api/members", json={"name": "Ana", "email": "ana@example.com"})
+    assert client.get("/api/members?fields=name").json() == [{"name": "Ana"}]
+
+    full = client.get(f"/api/books/{book['id']}").json()
+    assert {"id", "title", "author", "genre", "total_copies"} <= full.keys()
+
+
+def test_unknown_fields_are_rejected(client):
+    response = client.get("/api/books?fields=title,price")
+
+    assert response.status_code == 400
+    assert response.json()["detail"].startswith("Unknown fields: price.")
+    assert client.get("/api/books?fields=").status_code == 400
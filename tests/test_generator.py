@@ -0,0 +1,42 @@
+import sqlite3
+
+from app.data.generator import GENERATED_TABLES, main
+
+ARGS = ["--authors", "5", "--books", "20", "--members", "8", "--loans", "120", "--now", "2026-01-01T00:00:00"]
+
+
+def generate_dump(path, seed: str) -> dict[str, list[tuple]]:
+    main(["--db", str(path), "--seed", seed, *ARGS])
+    with sqlite3.connect(path) as conn:
+        return {
+            table: conn.execute(f"SELECT * FROM {table} ORDER BY 1, 2").fetchall()
+            for table in GENERATED_TABLES
+        }
+
+
+def test_same_seed_and_now_give_the_same_dataset(tmp_path):
+    first = generate_dump(tmp_path / "first.db", "7")
+    second = generate_dump(tmp_path / "second.db", "7")
+    other = generate_dump(tmp_path / "other.db", "8")
+
+    assert first == second
+    assert len(first["loans"]) == 120
+    assert first["loans"] != other["loans"]
+
+
+def test_copy_counters_match_the_generated_loans(tmp_path):
+    path = tmp_path / "easystock.db"
+    main(["--db", str(path), "--seed", "7", *ARGS])
+
+    with sqlite3.connect(path) as conn:
+        mismatched = conn.execute(
+            """
+            SELECT COUNT(*) FROM books b
+            WHERE b.available_copies != b.total_copies - (
+                SELECT COUNT(*) FROM loans l WHERE l.book_id = b.id AND l.return_date IS NULL
+            )
+            """
+        ).fetchone()[0]
+        backwards = conn.execute("SELECT COUNT(*) FROM loans WHERE return_date < loan_date").fetchone()[0]
+
+    assert (mismatched, backwards) == (0, 0)
@@ -0,0 +1,78 @@
+import pytest
+
+from app.data.db import init_db
+from app.models.book import BookCreate
+from app.models.member import Member
+from app.service.book_service import BookService
+from app.service.hold_service import HoldService
+from app.service.loan_service import LoanService
+from app.service.member_service import MemberService
+
+
+@pytest.fixture
+def library(backend):
+    init_db(seed=False)
+    with backend.connect() as conn:
+        conn.execute("INSERT INTO authors (name) VALUES ('Frank Herbert')")
+        conn.execute("INSERT INTO genres (name) VALUES ('Science fiction')")
+        conn.commit()
+    members = [
+        MemberService().create_member(Member(name=name, email=f"{name.lower()}@example.com"))["id"]
+        for name in ("Ana", "Bob", "Cleo", "Dan", "Eve")
+    ]
+    return members
+
+
+def create_book(copies: int) -> int:
+    payload = BookCreate(title="Dune", isbn="9780441172719", author_id=1, genre_id=1, copies=copies)
+    return BookService().create_book(payload)["id"]
+
+
+def test_ready_hold_reserves_only_one_copy(library):
+    ana, bob, cleo, dan, eve = library
+    loans, holds = LoanService(), HoldService()
+    book_id = create_book(copies=2)
+    first = loans.borrow_book(book_id, ana)
+    second = loans.borrow_book(book_id, bob)
+    holds.place_hold(book_id, cleo)
+
+    loans.return_book(first["id"])
+    loans.return_book(second["id"])
+
+    loans.borrow_book(book_id, dan)
+    with pytest.raises(ValueError, match="reserved"):
+        loans.borrow_book(book_id, eve)
+    loans.borrow_book(book_id, cleo)
+
+
+def test_is_borrowed_needs_a_copy(library):
+    ana = library[0]
+    empty = create_book(copies=0)
+    assert BookService().get_book(empty)["is_borrowed"] is False
+
+    book_id = BookService().create_book(
+        BookCreate(title="Emma", isbn="9780141439587", author_id=1, genre_id=1, copies=1)
+    )["id"]
+    LoanService().borrow_book(book_id, ana)
+    assert BookService().get_book(book_id)["is_borrowed"] is True
+    assert BookService().get_book(book_id, ("is_borrowed",))["is_borrowed"] is True
+
+
+def test_return_promotes_the_oldest_waiting_hold(library):
+    ana, bob, cleo, dan, _ = library
+    loans, holds = LoanService(), HoldService()
+    book_id = create_book(copies=1)
+    loan = loans.borrow_book(book_id, ana)
+    for member_id in (bob, cleo, dan):
+        holds.place_hold(book_id, member_id)
+
+    loans.return_book(loan["id"])
+
+    queue = [(hold["member_id"], hold["status"], hold["position"]) for hold in holds.list_holds(book_id)]
+    assert queue == [(bob, "ready", None), (cleo, "waiting", 1), (dan, "waiting", 2)]
+    with pytest.raises(ValueError, match="reserved"):
+        loans.borrow_book(book_id, cleo)
+
+    second = loans.borrow_book(book_id, bob)
+    loans.return_book(second["id"])
+    assert [(hold["member_id"], hold["status"]) for hold in holds.list_holds(book_id)][0] == (cleo, "ready")
@@ -0,0 +1,45 @@
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from app.api.idempotency import IdempotencyMiddleware
+from app.data.db import init_db
+
+
+@pytest.fixture
+def client(backend):
+    init_db(seed=False)
+    api = FastAPI()
+    api.state.calls = 0
+
+    @api.post("/api/echo")
+    async def echo(request: Request) -> dict:
+        api.state.calls += 1
+        return {"call": api.state.calls, "query": str(request.query_params), "body": (await request.body()).decode()}
+
+    api.add_middleware(IdempotencyMiddleware)
+    with TestClient(api) as client:
+        yield client
+
+
+def test_retry_replays_stored_response(client):
+    headers = {"Idempotency-Key": "desk-1"}
+    first = client.post("/api/echo?copies=1", content=b"{}", headers=headers)
+    retry = client.post("/api/echo?copies=1", content=b"{}", headers=headers)
+
+    assert retry.json() == first.json() == {"call": 1, "query": "copies=1", "body": "{}"}
+    assert retry.headers["idempotent-replayed"] == "true"
+
+
+@pytest.mark.parametrize(
+    "path, body",
+    [("/api/echo?copies=2", b"{}"), ("/api/echo?copies=1", b'{"a": 1}'), ("/api/echo", b"{}")],
+)
+def test_key_reused_for_another_request_is_rejected(client, path, body):
+    headers = {"Idempotency-Key": "desk-2"}
+    client.post("/api/echo?copies=1", content=b"{}", headers=headers)
+
+    response = client.post(path, content=body, headers=headers)
+
+    assert response.status_code == 422
+    assert "idempotent-replayed" not in response.headers
@@ -0,0 +1,38 @@
+from app.data import job_repo
+from app.data.db import init_db
+from app.service.job_service import JobRunner
+
+
+def test_claim_is_won_once_and_failures_retry(backend):
+    init_db(seed=False)
+    calls = []
+
+    def flaky() -> str:
+        calls.append(len(calls) + 1)
+        if len(calls) == 1:
+            raise RuntimeError("disk busy")
+        return "done"
+
+    runner = JobRunner({"flaky": {"run": flaky, "interval": 3600, "delay": 0, "max_retries": 2}})
+    runner.register_jobs()
+    job = job_repo.get_job("flaky")
+    assert job_repo.claim_job("flaky", job["next_run_at"], "2999-01-01T00:00:00")
+    assert not job_repo.claim_job("flaky", job["next_run_at"], "2999-01-01T00:00:00")
+
+    job_repo.trigger_job("flaky")
+    runner.run_due_jobs()
+    job = job_repo.get_job("flaky")
+    assert (job["attempts"], job["last_status"]) == (1, "retrying")
+    runner.run_due_jobs()
+    assert calls == [1]
+
+    job_repo.trigger_job("flaky")
+    runner.run_due_jobs()
+    job = job_repo.get_job("flaky")
+    assert (job["attempts"], job["last_status"]) == (0, "succeeded")
+    runs = job_repo.list_job_runs("flaky", limit=10, offset=0)
+    assert [(run["attempt"], run["status"], run["result"]) for run in runs] == [
+        (2, "succeeded", "done"),
+        (1, "failed", None),
+    ]
+    assert runs[1]["error"] == "RuntimeError: disk busy"
@@ -0,0 +1,19 @@
+from app.config import LOOKUP_MAX_IDS
+
+
+def test_ids_lookup_keeps_the_request_order(client):
+    ids = [
+        client.post("/api/members", json={"name": name, "email": f"{name.lower()}@example.com"}).json()["data"]["id"]
+        for name in ("Ana", "Bob", "Cleo")
+    ]
+
+    response = client.get(f"/api/members?ids={ids[2]},99,{ids[0]},{ids[2]},{ids[1]}")
+
+    assert [member["id"] for member in response.json()] == [ids[2], ids[0], ids[1]]
+    assert response.headers["x-total-count"] == "3"
+
+
+def test_ids_lookup_rejects_bad_lists(client):
+    assert client.get("/api/members?ids=1,two").status_code == 400
+    assert client.get("/api/members?ids=").status_code == 400
+    assert client.get("/api/books?ids=" + ",".join(str(i) for i in range(1, LOOKUP_MAX_IDS + 2))).status_code == 400
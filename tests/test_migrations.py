@@ -0,0 +1,149 @@
+from app.data import backends
+from app.data.archive_repo import archive_table
+from app.data.backends.sqlite import SQLiteBackend
+from app.data.db import DELETE_RULES, SCHEMA_VERSION, init_db
+
+BASELINE_SCHEMA = """
+CREATE TABLE genres (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL UNIQUE);
+CREATE TABLE authors (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL, birth_year INTEGER);
+CREATE TABLE books (id INTEGER PRIMARY KEY AUTOINCREMENT, title TEXT NOT NULL, isbn TEXT NOT NULL UNIQUE);
+CREATE TABLE book_authors (
+    book_id INTEGER NOT NULL,
+    author_id INTEGER NOT NULL,
+    PRIMARY KEY (book_id, author_id),
+    FOREIGN KEY (book_id) REFERENCES books (id),
+    FOREIGN KEY (author_id) REFERENCES authors (id)
+);
+CREATE TABLE book_genres (
+    book_id INTEGER NOT NULL,
+    genre_id INTEGER NOT NULL,
+    PRIMARY KEY (book_id, genre_id),
+    FOREIGN KEY (book_id) REFERENCES books (id),
+    FOREIGN KEY (genre_id) REFERENCES genres (id)
+);
+CREATE TABLE members (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    email TEXT NOT NULL UNIQUE,
+    registered_at TEXT NOT NULL
+);
+CREATE TABLE loans (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    book_id INTEGER NOT NULL,
+    member_id INTEGER NOT NULL,
+    loan_date TEXT NOT NULL,
+    return_date TEXT,
+    FOREIGN KEY (book_id) REFERENCES books (id),
+    FOREIGN KEY (member_id) REFERENCES members (id)
+);
+INSERT INTO books (title, isbn) VALUES ('Dune', '9780441172719'), ('Emma', '9780141439587');
+INSERT INTO members (name, email, registered_at) VALUES ('Ana', 'ana@example.com', '2023-01-02T10:00:00');
+INSERT INTO loans (book_id, member_id, loan_date, return_date)
+VALUES (1, 1, '2024-03-01T09:00:00', '2024-03-10T09:00:00'), (2, 1, '2024-04-01T09:00:00', NULL);
+"""
+
+
+def schema_objects(conn, table=None):
+    rows = conn.execute(
+        """
+        SELECT name
+        FROM sqlite_master
+        WHERE type IN ('index', 'trigger') AND sql IS NOT NULL AND tbl_name LIKE ?
+        """,
+        (table or "%",),
+    ).fetchall()
+    return {row["name"] for row in rows}
+
+
+def test_upgrade_from_baseline(backend):
+    with backend.connect() as conn:
+        conn.executescript(BASELINE_SCHEMA)
+
+    init_db(seed=False)
+
+    with backend.connect() as conn:
+        assert conn.execute("SELECT version FROM schema_version").fetchone()[0] == SCHEMA_VERSION
+        assert backend.column_type(conn, "loans", "loan_date") == "integer"
+        assert conn.execute("SELECT COUNT(*) FROM loans WHERE return_date IS NULL AND copy_id IS NULL").fetchone()[0] == 0
+        assert {"idx_loans_book", "idx_loans_copy", "trg_books_active_loans", "trg_members_active_loans"} <= (
+            schema_objects(conn)
+        )
+        for table, rules in DELETE_RULES.items():
+            current = backend.delete_rules(conn, table)
+            assert {column: current[column] for column in rules} == {
+                column: action for column, (_, action) in rules.items()
+            }
+        assert [row[0] for row in conn.execute("SELECT available_copies FROM books ORDER BY id")] == [1, 0]
+
+
+def test_delete_rules_migration_keeps_archive_indexes(backend):
+    init_db(seed=False)
+    table = archive_table("2020")
+    with backend.connect() as conn:
+        conn.execute(
+            f"""
+            CREATE TABLE {table} (
+                id INTEGER PRIMARY KEY,
+                book_id INTEGER NOT NULL,
+                member_id INTEGER NOT NULL,
+                loan_date INTEGER NOT NULL,
+                return_date INTEGER NOT NULL
+            )
+            """
+        )
+        conn.execute(f"CREATE INDEX idx_{table}_member ON {table} (member_id, loan_date)")
+        conn.execute(f"CREATE INDEX idx_{table}_book ON {table} (book_id)")
+        conn.execute("UPDATE schema_version SET version = ?", (SCHEMA_VERSION - 1,))
+        conn.commit()
+
+    init_db(seed=False)
+
+    with backend.connect() as conn:
+        assert schema_objects(conn, table) == {f"idx_{table}_member", f"idx_{table}_book"}
+        assert backend.delete_rules(conn, table) == {"book_id": "CASCADE", "member_id": "CASCADE"}
+
+
+def test_set_delete_rules_replays_indexes_and_triggers(backend):
+    init_db(seed=False)
+    with backend.connect() as conn:
+        conn.execute("CREATE INDEX idx_loans_custom ON loans (return_date)")
+        conn.execute("CREATE TRIGGER trg_loans_custom AFTER INSERT ON loans BEGIN SELECT 1; END")
+        conn.commit()
+        before = schema_objects(conn, "loans")
+
+        backend.set_delete_rules(conn, "loans", DELETE_RULES["loans"])
+
+        assert schema_objects(conn, "loans") == before
+
+
+def test_migration_refreshes_replica_snapshots(backend, tmp_path, monkeypatch):
+    replica = SQLiteBackend(tmp_path / "replica.db", read_only=True)
+    monkeypatch.setattr(backends, "_replicas", [replica])
+    init_db(seed=False)
+    with backend.connect() as conn:
+        conn.execute("UPDATE schema_version SET version = ?", (SCHEMA_VERSION - 1,))
+        conn.commit()
+    backends.refresh_snapshots()
+
+    init_db(seed=False)
+
+    with replica.connect() as conn:
+        assert conn.execute("SELECT version FROM schema_version").fetchone()[0] == SCHEMA_VERSION
+
+
+def test_upgrade_gives_each_active_loan_its_own_copy(backend):
+    with backend.connect() as conn:
+        conn.executescript(BASELINE_SCHEMA)
+        conn.execute("INSERT INTO members (name, email, registered_at) VALUES ('Bo', 'bo@example.com', '2023-01-02')")
+        conn.execute("INSERT INTO loans (book_id, member_id, loan_date) VALUES (2, 2, '2024-04-02T09:00:00')")
+        conn.commit()
+
+    init_db(seed=False)
+
+    with backend.connect() as conn:
+        loans = conn.execute("SELECT copy_id FROM loans WHERE book_id = 2 AND return_date IS NULL").fetchall()
+        assert len({row["copy_id"] for row in loans}) == 2
+        book = conn.execute("SELECT total_copies, available_copies FROM books WHERE id = 2").fetchone()
+        assert (book["total_copies"], book["available_copies"]) == (2, 0)
+        statuses = conn.execute("SELECT status FROM copies WHERE book_id = 2").fetchall()
+        assert [row["status"] for row in statuses] == ["on_loan", "on_loan"]
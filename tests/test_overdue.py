@@ -0,0 +1,35 @@
+from app.data import loan_repo
+from app.data.dates import DAY_SECONDS
+from app.data.db import init_db
+from app.data.loan_repo import LOAN_PERIOD_SECONDS
+
+NOW = 1_760_000_000
+
+
+def test_overdue_starts_one_second_after_the_loan_period(backend, monkeypatch):
+    monkeypatch.setattr(loan_repo, "now_epoch", lambda: NOW)
+    init_db(seed=False)
+    cutoff = NOW - LOAN_PERIOD_SECONDS
+    with backend.connect() as conn:
+        book_id = conn.execute("INSERT INTO books (title, isbn) VALUES ('Dune', '9780441172719')").lastrowid
+        member_id = conn.execute(
+            "INSERT INTO members (name, email, registered_at) VALUES ('Ana', 'ana@example.com', 0)"
+        ).lastrowid
+        conn.executemany(
+            "INSERT INTO loans (book_id, member_id, loan_date, return_date) VALUES (?, ?, ?, ?)",
+            [
+                (book_id, member_id, cutoff, None),
+                (book_id, member_id, cutoff - 1, None),
+                (book_id, member_id, cutoff - DAY_SECONDS, None),
+                (book_id, member_id, cutoff - DAY_SECONDS - 1, None),
+                (book_id, member_id, cutoff - 5 * DAY_SECONDS, NOW),
+            ],
+        )
+        conn.commit()
+
+    overdue = loan_repo.overdue_loans()
+    assert [(loan["loan_id"], loan["days_overdue"]) for loan in overdue] == [(4, 1), (3, 1), (2, 0)]
+
+    with backend.connect() as conn:
+        active = loan_repo.active_loans_for_member(conn, member_id)
+    assert [loan["is_overdue"] for loan in active] == [True, True, True, False]
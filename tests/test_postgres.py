@@ -0,0 +1,142 @@
+import os
+import uuid
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.idempotency import IdempotencyMiddleware
+from app.data import backends, loan_repo
+from app.data.archive_repo import archive_returned_loans
+from app.data.db import CASCADE_INDEXES, DELETE_RULES, SCHEMA_VERSION, init_db
+
+DATABASE_URL = os.environ.get("EASYSTOCK_TEST_DATABASE_URL", "")
+
+pytestmark = pytest.mark.skipif(not DATABASE_URL, reason="EASYSTOCK_TEST_DATABASE_URL is not set")
+
+
+@pytest.fixture
+def pg_backend(monkeypatch):
+    psycopg = pytest.importorskip("psycopg")
+    pytest.importorskip("psycopg_pool")
+    from psycopg.conninfo import make_conninfo
+
+    from app.data.backends.postgres import PostgresBackend
+
+    schema = f"easystock_test_{uuid.uuid4().hex[:12]}"
+    with psycopg.connect(DATABASE_URL, autocommit=True) as admin:
+        admin.execute(f"CREATE SCHEMA {schema}")
+    backend = PostgresBackend(make_conninfo(DATABASE_URL, options=f"-c search_path={schema}"), 1, 2)
+    monkeypatch.setattr(backends, "_backend", backend)
+    monkeypatch.setattr(backends, "_replicas", [])
+    try:
+        yield backend
+    finally:
+        backend.close()
+        with psycopg.connect(DATABASE_URL, autocommit=True) as admin:
+            admin.execute(f"DROP SCHEMA {schema} CASCADE")
+
+
+def test_schema_and_delete_rules(pg_backend):
+    init_db(seed=False)
+
+    with pg_backend.connect() as conn:
+        for table, rules in DELETE_RULES.items():
+            current = pg_backend.delete_rules(conn, table)
+            assert {column: current[column] for column in rules} == {
+                column: action for column, (_, action) in rules.items()
+            }
+        indexes = {row["indexname"] for row in conn.execute("SELECT indexname FROM pg_indexes WHERE tablename = 'loans'")}
+        assert set(CASCADE_INDEXES) <= indexes
+
+        pg_backend.set_delete_rules(conn, "loans", {"book_id": ("books", "RESTRICT")})
+        assert pg_backend.delete_rules(conn, "loans")["book_id"] == "RESTRICT"
+        pg_backend.set_delete_rules(conn, "loans", DELETE_RULES["loans"])
+        assert pg_backend.delete_rules(conn, "loans")["book_id"] == "CASCADE"
+
+
+def test_active_loan_blocks_book_delete(pg_backend):
+    init_db(seed=False)
+
+    with pg_backend.connect() as conn:
+        book_id = conn.execute("INSERT INTO books (title, isbn) VALUES ('Dune', '9780441172719')").lastrowid
+        member_id = conn.execute(
+            "INSERT INTO members (name, email, registered_at) VALUES ('Ana', 'ana@example.com', 0)"
+        ).lastrowid
+        conn.execute("INSERT INTO loans (book_id, member_id, loan_date) VALUES (?, ?, 0)", (book_id, member_id))
+        conn.commit()
+
+        with pytest.raises(pg_backend.integrity_error):
+            conn.execute("DELETE FROM books WHERE id = ?", (book_id,))
+        conn.rollback()
+
+        conn.execute("UPDATE loans SET return_date = 1")
+        conn.execute("DELETE FROM books WHERE id = ?", (book_id,))
+        assert conn.execute("SELECT COUNT(*) AS n FROM loans").fetchone()["n"] == 0
+        conn.commit()
+
+
+def test_reset_sequences(pg_backend):
+    init_db(seed=False)
+
+    with pg_backend.connect() as conn:
+        conn.execute("INSERT INTO authors (id, name) VALUES (10, 'Frank Herbert')")
+        pg_backend.reset_sequences(conn, ["authors"])
+        assert conn.execute("INSERT INTO authors (name) VALUES ('Jane Austen')").lastrowid == 11
+        conn.commit()
+
+
+def test_member_history_spans_live_and_archived_loans(pg_backend):
+    init_db(seed=False)
+
+    with pg_backend.connect() as conn:
+        book_id = conn.execute("INSERT INTO books (title, isbn) VALUES ('Dune', '9780441172719')").lastrowid
+        member_id = conn.execute(
+            "INSERT INTO members (name, email, registered_at) VALUES ('Ana', 'ana@example.com', 0)"
+        ).lastrowid
+        conn.execute(
+            "INSERT INTO loans (book_id, member_id, loan_date, return_date) VALUES (?, ?, 100, 200)",
+            (book_id, member_id),
+        )
+        conn.execute("INSERT INTO loans (book_id, member_id, loan_date) VALUES (?, ?, 4102444800)", (book_id, member_id))
+        conn.commit()
+
+    assert archive_returned_loans(older_than_days=1, batch_size=10) == 1
+    assert loan_repo.count_member_history(member_id) == 2
+    history = loan_repo.member_history(member_id, limit=10, offset=0)
+    assert [loan["return_date"] is None for loan in history] == [True, False]
+
+
+def test_idempotent_retry_is_replayed(pg_backend):
+    init_db(seed=False)
+    api = FastAPI()
+    api.state.calls = 0
+
+    @api.post("/api/echo")
+    def echo() -> dict:
+        api.state.calls += 1
+        return {"call": api.state.calls}
+
+    api.add_middleware(IdempotencyMiddleware)
+    with TestClient(api) as client:
+        first = client.post("/api/echo", headers={"Idempotency-Key": "desk-1"})
+        retry = client.post("/api/echo", headers={"Idempotency-Key": "desk-1"})
+
+    assert retry.json() == first.json() == {"call": 1}
+    assert retry.headers["idempotent-replayed"] == "true"
+
+
+def test_upgrade_widens_idempotency_timestamps(pg_backend):
+    init_db(seed=False)
+
+    with pg_backend.connect() as conn:
+        for column in ("created_at", "expires_at"):
+            conn.execute(f"ALTER TABLE idempotency_keys ALTER COLUMN {column} TYPE INTEGER")
+        conn.execute("UPDATE schema_version SET version = ?", (SCHEMA_VERSION - 1,))
+        conn.commit()
+
+    init_db(seed=False)
+
+    with pg_backend.connect() as conn:
+        assert pg_backend.column_type(conn, "idempotency_keys", "created_at") == "bigint"
+        assert pg_backend.column_type(conn, "idempotency_keys", "expires_at") == "bigint"
@@ -0,0 +1,54 @@
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.read_routing import ReadYourWritesMiddleware
+from app.data import backends
+from app.data.backends import refresh_snapshots
+from app.data.backends.sqlite import SQLiteBackend
+from app.data.db import init_db
+from app.models.member import Member
+from app.service.member_service import MemberService
+
+STICKINESS_SECONDS = 0.05
+
+
+@pytest.fixture
+def client(backend, tmp_path, monkeypatch):
+    init_db(seed=False)
+    monkeypatch.setattr(backends, "_replicas", [SQLiteBackend(tmp_path / "replica.db", read_only=True)])
+    refresh_snapshots()
+    api = FastAPI()
+
+    @api.post("/api/members")
+    def create_member(payload: Member) -> dict:
+        return MemberService().create_member(payload)
+
+    @api.get("/api/members/{member_id}")
+    def get_member(member_id: int) -> dict:
+        return {"member": MemberService().get_member(member_id)}
+
+    api.add_middleware(ReadYourWritesMiddleware, stickiness_seconds=STICKINESS_SECONDS)
+    with TestClient(api) as client:
+        yield client
+
+
+def test_write_is_visible_after_the_stickiness_window(client):
+    member_id = client.post("/api/members", json={"name": "Ana", "email": "ana@example.com"}).json()["id"]
+    time.sleep(STICKINESS_SECONDS * 2)
+
+    assert client.get(f"/api/members/{member_id}").json()["member"]["name"] == "Ana"
+
+
+def test_reads_use_replicas_refreshed_after_the_write(client):
+    member_id = client.post("/api/members", json={"name": "Ana", "email": "ana@example.com"}).json()["id"]
+    time.sleep(STICKINESS_SECONDS * 2)
+    refresh_snapshots()
+
+    with backends.get_backend().connect() as conn:
+        conn.execute("UPDATE members SET name = 'Primary' WHERE id = ?", (member_id,))
+        conn.commit()
+
+    assert client.get(f"/api/members/{member_id}").json()["member"]["name"] == "Ana"
@@ -0,0 +1,34 @@
+import re
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.request_id import RequestIdMiddleware
+from app.logs import request_id
+
+
+def test_request_id_is_echoed_and_set_for_logging():
+    api = FastAPI()
+
+    @api.get("/api/ping")
+    def ping() -> dict:
+        return {"request_id": request_id.get()}
+
+    api.add_middleware(RequestIdMiddleware)
+    client = TestClient(api)
+
+    echoed = client.get("/api/ping", headers={"X-Request-ID": "desk-7f3a"})
+    assert echoed.headers["x-request-id"] == "desk-7f3a"
+    assert echoed.json() == {"request_id": "desk-7f3a"}
+
+    for headers in ({}, {"X-Request-ID": "x" * 129}):
+        generated = client.get("/api/ping", headers=headers)
+        assert re.fullmatch(r"[0-9a-f]{32}", generated.headers["x-request-id"])
+        assert generated.json() == {"request_id": generated.headers["x-request-id"]}
+
+
+def test_error_responses_carry_the_request_id(client):
+    response = client.get("/api/members?ids=one", headers={"X-Request-ID": "desk-1"})
+
+    assert response.status_code == 400
+    assert response.headers["x-request-id"] == "desk-1"
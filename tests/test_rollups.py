@@ -0,0 +1,46 @@
+from app.data.db import init_db
+from app.data.rollups import ROLLUP_TABLES
+from app.models.book import BookCreate
+from app.models.member import Member
+from app.service.analytics_service import AnalyticsService
+from app.service.book_service import BookService
+from app.service.loan_service import LoanService
+from app.service.member_service import MemberService
+
+
+def rollup_rows(backend) -> dict[str, list[tuple]]:
+    with backend.connect() as conn:
+        return {
+            table: [tuple(row) for row in conn.execute(f"SELECT * FROM {table} ORDER BY 1, 2")]
+            for table in ROLLUP_TABLES.values()
+        }
+
+
+def test_incremental_rollups_match_a_rebuild(backend):
+    init_db(seed=False)
+    with backend.connect() as conn:
+        conn.execute("INSERT INTO authors (name) VALUES ('Frank Herbert')")
+        conn.executemany("INSERT INTO genres (name) VALUES (?)", [("Science fiction",), ("Classic",)])
+        conn.commit()
+    books = [
+        BookService().create_book(
+            BookCreate(title=title, isbn=isbn, author_id=1, genre_id=genre_id, copies=2)
+        )["id"]
+        for title, isbn, genre_id in (("Dune", "9780441172719", 1), ("Emma", "9780141439587", 2))
+    ]
+    members = [
+        MemberService().create_member(Member(name=name, email=f"{name.lower()}@example.com"))["id"]
+        for name in ("Ana", "Bob")
+    ]
+    loans = LoanService()
+    borrowed = [loans.borrow_book(book_id, member_id) for book_id in books for member_id in members]
+    for loan in borrowed[:3]:
+        loans.return_book(loan["id"])
+    loans.borrow_book(books[0], members[0])
+
+    incremental = rollup_rows(backend)
+    assert sum(row[2] for row in incremental["daily_book_loans"]) == 5
+    assert sum(row[3] for row in incremental["daily_book_loans"]) == 3
+
+    assert AnalyticsService().rebuild_rollups() == 5
+    assert rollup_rows(backend) == incremental
@@ -0,0 +1,65 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+from app.data.db import init_db
+from app.main import create_app
+
+IMPORT_BUDGET_MS = 1500
+STARTUP_BUDGET_MS = 100
+
+MEASURE = """
+import json, time
+started = time.perf_counter()
+import app.main
+import_ms = (time.perf_counter() - started) * 1000
+routes = "/api/books" in {route.path for route in app.main.app.routes}
+from fastapi.testclient import TestClient
+from app import metrics
+with TestClient(app.main.app) as client:
+    status = client.get("/api/books?limit=1").status_code
+gauges = {key: value for key, value in metrics.snapshot()["gauges"].items() if key.startswith("startup_ms")}
+print(json.dumps({"import_ms": import_ms, "routes": routes, "status": status, "gauges": gauges}))
+"""
+
+
+def start_worker(tmp_path, fast_start: bool) -> dict:
+    env = {
+        **os.environ,
+        "EASYSTOCK_DB_PATH": str(tmp_path / "easystock.db"),
+        "EASYSTOCK_FAST_START": "1" if fast_start else "0",
+        "EASYSTOCK_JOBS_ENABLED": "0",
+        "EASYSTOCK_READ_REPLICAS": "",
+        "EASYSTOCK_BRANCH_DIR": "",
+    }
+    result = subprocess.run(
+        [sys.executable, "-c", MEASURE],
+        cwd=Path(__file__).resolve().parent.parent,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def test_fast_start_worker(tmp_path):
+    start_worker(tmp_path, fast_start=False)
+
+    worker = start_worker(tmp_path, fast_start=True)
+
+    assert worker["routes"]
+    assert worker["status"] == 200
+    assert worker["import_ms"] < IMPORT_BUDGET_MS
+    assert worker["gauges"]["startup_ms{phase=startup}"] < STARTUP_BUDGET_MS
+
+
+def test_api_routes_exist_without_the_lifespan(backend):
+    init_db(seed=False)
+    client = TestClient(create_app())
+
+    assert client.get("/api/books?limit=1").status_code == 200
@@ -0,0 +1,37 @@
+import pytest
+
+from app.data.db import init_db
+from app.data.writer import GroupCommitWriter
+
+
+def test_failing_write_is_rolled_back_alone(backend):
+    init_db(seed=False)
+    writer = GroupCommitWriter(window_seconds=0.5, max_batch=10)
+    connections = []
+
+    def insert(name: str, fail: bool = False):
+        def run(conn):
+            connections.append(conn)
+            conn.execute("INSERT INTO genres (name) VALUES (?)", (name,))
+            if fail:
+                raise ValueError(f"{name} rejected")
+            return name
+
+        return run
+
+    try:
+        futures = [
+            writer.submit(insert("Poetry")),
+            writer.submit(insert("Horror", fail=True)),
+            writer.submit(insert("Travel")),
+        ]
+        assert futures[0].result(5) == "Poetry"
+        with pytest.raises(ValueError, match="Horror rejected"):
+            futures[1].result(5)
+        assert futures[2].result(5) == "Travel"
+    finally:
+        writer.stop()
+
+    assert all(conn is connections[0] for conn in connections)
+    with backend.connect() as conn:
+        assert [row[0] for row in conn.execute("SELECT name FROM genres ORDER BY id")] == ["Poetry", "Travel"]